@@ -1,5 +1,7 @@
 import streamlit as st
 
+from core.prewarm import prewarm
+
 # Setting the page configuration
 st.set_page_config(page_title="โปรเจคการทำนาย", page_icon="🏠", layout="wide")
 
@@ -28,3 +30,6 @@ st.header("👨‍💻ข้อมูลผู้จัดทำ")
 st.markdown("""
 ชื่อ: นางสาวนลินรัตน์ รุ่งทรัพย์สิน   รหัสนักศึกษา: 6604062630277  เซค:  3
 """)
+
+# เตรียม module และโมเดลของหน้าอื่นไว้เบื้องหลัง หลังจากแสดงผลหน้านี้แล้ว
+prewarm()
@@ -0,0 +1,24 @@
+import hashlib
+import os
+import warnings
+from contextlib import contextmanager
+
+# รากของ repo (models/, data/, .cache/ อ้างอิงจากที่นี่)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# โมเดลถูกเทรนด้วย DataFrame แต่ตอนทำนายเราส่ง NumPy array ที่เรียงคอลัมน์ตรงกันแล้ว
+# ปิดคำเตือนเรื่องชื่อคอลัมน์เฉพาะตอนเรียกโมเดล/scaler เท่านั้น คำเตือนอื่นของ process ยังแสดงตามปกติ
+@contextmanager
+def array_input():
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        yield
+
+
+# sha256 ของไฟล์ อ่านทีละ block ไม่โหลดทั้งไฟล์เข้าหน่วยความจำ (ใช้ทั้งกับ CSV ขนาดใหญ่และไฟล์โมเดล)
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from core import ROOT_DIR, file_sha256
+
+ARTIFACT_DIR = os.path.join(ROOT_DIR, '.cache', 'artifacts')
+# จำนวนผลสูงสุดที่เก็บไว้ในหน่วยความจำ (LRU) ที่เกินยังอ่านกลับจากดิสก์ได้
+MEMORY_ENTRIES = int(os.environ.get('ARTIFACT_MEMORY_ENTRIES', 32))
+# ไฟล์ที่เขียนไม่จบ เสียหาย หรือ pickle จากโค้ด/ไลบรารีเวอร์ชันอื่น ถือว่าไม่มี cache แล้วสร้างใหม่
+# (joblib ใช้ Unpickler ที่เขียนด้วย Python ไบต์ที่ไม่ใช่ opcode จะได้ KeyError แทน UnpicklingError)
+LOAD_ERRORS = (OSError, EOFError, pickle.UnpicklingError, KeyError, ValueError, AttributeError, ImportError)
+
+
+# สร้าง key จากข้อมูล (DataFrame/Series/ndarray) และพารามิเตอร์ใดๆ ที่แปลงเป็น JSON ได้
+def fingerprint(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            digest.update(json.dumps([str(c) for c in part.columns]).encode())
+            digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+        elif isinstance(part, pd.Series):
+            digest.update(str(part.name).encode())
+            digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+        elif isinstance(part, np.ndarray):
+            digest.update(f'{part.dtype}{part.shape}'.encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+_sha256_memo = {}
+
+
+# sha256 ของไฟล์ (โมเดล/ข้อมูล) คำนวณใหม่เฉพาะเมื่อ mtime หรือขนาดไฟล์เปลี่ยน
+def cached_sha256(path):
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _sha256_memo:
+        _sha256_memo[key] = file_sha256(path)
+    return _sha256_memo[key]
+
+
+# cache ของผลการเทรน/ประเมินผล เก็บทั้งในหน่วยความจำของ process และบนดิสก์ (joblib)
+# rerun ของ Streamlit หรือ process ใหม่จะได้ผลเดิมทันทีถ้าข้อมูลและพารามิเตอร์ไม่เปลี่ยน
+class ArtifactCache:
+    def __init__(self, directory=ARTIFACT_DIR, max_entries=MEMORY_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def path(self, name, key):
+        return os.path.join(self.directory, name, f'{key}.joblib')
+
+    def _key_lock(self, name, key):
+        with self._lock:
+            return self._locks.setdefault((name, key), threading.Lock())
+
+    # มีผลที่คำนวณไว้แล้วหรือไม่ (ใช้ตัดสินใจว่าจะแสดงผลทันทีหรือรอให้ผู้ใช้สั่งคำนวณ)
+    def contains(self, name, key):
+        with self._lock:
+            if (name, key) in self._memory:
+                return True
+        return os.path.exists(self.path(name, key))
+
+    def _recall(self, name, key):
+        with self._lock:
+            if (name, key) not in self._memory:
+                return False, None
+            self._memory.move_to_end((name, key))
+            self.hits += 1
+            return True, self._memory[(name, key)]
+
+    def _remember(self, name, key, value):
+        with self._lock:
+            self._memory[(name, key)] = value
+            self._memory.move_to_end((name, key))
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_build(self, name, key, build):
+        with self._key_lock(name, key):
+            found, value = self._recall(name, key)
+            if found:
+                return value
+
+            path = self.path(name, key)
+            if os.path.exists(path):
+                try:
+                    value = joblib.load(path)
+                    self.disk_hits += 1
+                    self._remember(name, key, value)
+                    return value
+                except LOAD_ERRORS:
+                    pass  # ไฟล์เสียหรือเวอร์ชันไม่ตรง สร้างใหม่
+
+            value = build()
+            self.builds += 1
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            joblib.dump(value, tmp)
+            os.replace(tmp, path)
+            self._remember(name, key, value)
+            return value
+
+    def stats(self):
+        with self._lock:
+            return {'memory_hits': self.hits, 'disk_hits': self.disk_hits, 'builds': self.builds,
+                    'memory_entries': len(self._memory), 'evictions': self.evictions}
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_artifact_cache():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ArtifactCache()
+        return _default
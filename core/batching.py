@@ -0,0 +1,123 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 5.0
+
+
+# รวมคำขอทำนายทีละแถวที่เข้ามาพร้อมกันให้เป็น batch เดียว แล้วเรียกโมเดลครั้งเดียว
+# predict_fn รับ matrix (n, k) และคืนค่าผลลัพธ์ n ค่าเรียงตามแถว
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS, history=10000):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._delays = deque(maxlen=history)
+        self._requests = 0
+        self._batches = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    # ส่งข้อมูลหนึ่งแถวเข้าคิว คืนค่า Future ของผลลัพธ์
+    # ถ้าปิดไปแล้ว (เช่น registry คืนโมเดลระหว่างที่มีคำขอค้าง) จะทำนายทันทีใน thread ของผู้เรียกแทน
+    def submit(self, row):
+        future = Future()
+        row = np.asarray(row, dtype=np.float64).reshape(-1)
+        with self._lock:
+            if not self._closed:
+                self._queue.put((row, time.perf_counter(), future))
+                return future
+        try:
+            future.set_result(self.predict_fn(row[None, :])[0])
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def predict(self, row, timeout=None):
+        return self.submit(row).result(timeout)
+
+    # หยุดรับคำขอเข้าคิว แล้วรอ thread เบื้องหลังทำคำขอที่ค้างอยู่ในคิวให้เสร็จ
+    # (sentinel ถูกใส่ภายใต้ lock เดียวกับ submit จึงไม่มีคำขอใดตามหลัง sentinel แล้วค้างอยู่)
+    def close(self, timeout=None):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        items = [first]
+        deadline = items[0][1] + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # เลยเวลาแล้วก็ยังดึงคำขอที่ค้างอยู่ในคิวมารวมได้โดยไม่ต้องรอ
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            items.append(item)
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            if items is None:
+                return
+            started = time.perf_counter()
+            try:
+                results = self.predict_fn(np.stack([row for row, _, _ in items]))
+            except Exception as e:
+                for _, _, future in items:
+                    future.set_exception(e)
+                results = None
+
+            with self._lock:
+                self._requests += len(items)
+                self._batches += 1
+                self._batch_sizes[len(items)] += 1
+                self._delays.extend(started - queued for _, queued, _ in items)
+
+            if results is not None:
+                for (_, _, future), result in zip(items, results):
+                    future.set_result(result)
+
+    # สถิติขนาด batch และเวลาที่คำขอต้องรอในคิว (มิลลิวินาที)
+    def stats(self):
+        with self._lock:
+            delays = np.array(self._delays) * 1000.0
+            sizes = dict(sorted(self._batch_sizes.items()))
+            requests, batches = self._requests, self._batches
+        stats = {
+            'requests': requests,
+            'batches': batches,
+            'mean_batch_size': requests / batches if batches else 0.0,
+            'batch_sizes': sizes,
+        }
+        if len(delays):
+            stats['queue_delay_ms'] = {
+                'mean': float(delays.mean()),
+                'p50': float(np.percentile(delays, 50)),
+                'p95': float(np.percentile(delays, 95)),
+                'p99': float(np.percentile(delays, 99)),
+                'max': float(delays.max()),
+            }
+        return stats
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# จำนวนผลทำนายสูงสุดที่เก็บไว้ และอายุของแต่ละรายการ (วินาที) 0 = ไม่ใช้ cache / ไม่หมดอายุ
+CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 4096))
+CACHE_TTL_S = float(os.environ.get('PREDICTION_CACHE_TTL_S', 600))
+
+
+# cache ผลการทำนายแบบ LRU + TTL ใช้ร่วมกันทุก session ใน process
+# key คือ (ชื่อโมเดล, เวอร์ชันของ artifact, ข้อมูลที่ encode แล้ว) ข้อมูลที่เขียนต่างกันแต่ความหมายเดียวกัน
+# (เช่น 'graduate' กับ "Bachelor's") จึงได้ผลเดียวกัน
+class PredictionCache:
+    def __init__(self, max_entries=CACHE_SIZE, ttl_s=CACHE_TTL_S):
+        self.max_entries = max_entries
+        self.ttl = ttl_s
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires, value = item
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # ลบผลของโมเดลนี้ทั้งหมดเมื่อเวอร์ชันของ artifact เปลี่ยน (key ตัวแรกคือชื่อโมเดล)
+    def set_version(self, model, version):
+        with self._lock:
+            if self._versions.get(model, version) != version:
+                stale = [key for key in self._entries if key[0] == model]
+                for key in stale:
+                    del self._entries[key]
+                self.invalidations += len(stale)
+            self._versions[model] = version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_s': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,109 @@
+import os
+import time
+
+import numpy as np
+
+from core.artifacts import cached_sha256, fingerprint, get_artifact_cache
+from core.dataset import DIABETES_CSV, LOAN_CSV
+from core.training import FEATURE_PIPELINE_VERSION, RANDOM_STATE, _metrics, diabetes_features, loan_features
+from core.tuning import DATASETS, make_model
+
+# Cross-validation แบบ k-fold (stratified ตามค่าเริ่มต้น) สำหรับ RF/XGBoost (Loan) และ MLP (Diabetes)
+# ใช้ hyperparameter ชุดเดียวกับ training pipeline / core.tuning
+# fold ของแต่ละแถวคำนวณครั้งเดียวต่อชุดข้อมูล (ตาม sha256) และใช้ร่วมกันทุกโมเดล ทุกโมเดลจึงถูกวัดบน fold เดียวกัน
+# แต่ละ fold เทรนพร้อมกันด้วย joblib (matrix ขนาดใหญ่ถูก memory-map ให้ worker ไม่ copy ซ้ำ)
+# ผลทั้งหมดเก็บใน artifact cache หน้าเว็บ rerun แล้วไม่ต้องคำนวณใหม่
+
+CV_FOLDS = 5
+# เทรนพร้อมกันไม่เกินจำนวน core (แต่ละ fold ใช้ 1 thread)
+CV_JOBS = int(os.environ.get('CV_JOBS', 0)) or os.cpu_count() or 1
+METRICS = ['accuracy', 'roc_auc']
+
+
+def _features(dataset, csv_path, sha256):
+    if dataset == 'loan':
+        return loan_features(csv_path, sha256)
+    return diabetes_features(csv_path, sha256)
+
+
+# เลข fold (0..k-1) ของทุกแถว เก็บเป็น int8 หนึ่งค่าต่อแถว
+def fold_assignments(y, data_key, k=CV_FOLDS, stratified=True):
+    def build():
+        from sklearn.model_selection import KFold, StratifiedKFold
+
+        splitter = (StratifiedKFold if stratified else KFold)(n_splits=k, shuffle=True, random_state=RANDOM_STATE)
+        folds = np.empty(len(y), dtype=np.int8)
+        for fold, (_, test) in enumerate(splitter.split(np.zeros(len(y)), y)):
+            folds[test] = fold
+        return folds
+
+    key = fingerprint(data_key, k, stratified, RANDOM_STATE)
+    return get_artifact_cache().get_or_build('cv_folds', key, build)
+
+
+def fit_fold(family, X, y, folds, fold, params=None):
+    from threadpoolctl import threadpool_limits
+
+    train, test = folds != fold, folds == fold
+    model = make_model(family, params or {})
+    if family == 'mlp':
+        # scaler fit เฉพาะแถว train ของ fold นั้น
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        model = make_pipeline(StandardScaler(), model)
+
+    with threadpool_limits(1):
+        started = time.perf_counter()
+        model.fit(X[train], y[train])
+        fit_time = time.perf_counter() - started
+        started = time.perf_counter()
+        prob = model.predict_proba(X[test])[:, 1]
+        predict_time = time.perf_counter() - started
+    return dict({'fold': fold, 'train_rows': int(train.sum()), 'test_rows': int(test.sum()),
+                 'fit_s': fit_time, 'predict_s': predict_time}, **_metrics(y[test], prob))
+
+
+def cv_key(family, csv_path=None, k=CV_FOLDS, stratified=True, params=None):
+    csv_path = csv_path or (LOAN_CSV if DATASETS[family] == 'loan' else DIABETES_CSV)
+    return fingerprint(family, cached_sha256(csv_path), FEATURE_PIPELINE_VERSION, k, stratified, params or {})
+
+
+# คืนค่า {'folds': [ผลแต่ละ fold], 'summary': {metric: {'mean', 'std'}}, 'wall_s': เวลารวม, ...}
+def cross_validate(family, csv_path=None, k=CV_FOLDS, stratified=True, params=None, n_jobs=CV_JOBS):
+    from joblib import Parallel, delayed
+
+    dataset = DATASETS[family]
+    csv_path = csv_path or (LOAN_CSV if dataset == 'loan' else DIABETES_CSV)
+
+    def build():
+        sha256 = cached_sha256(csv_path)
+        features = _features(dataset, csv_path, sha256)
+        X, y = features['X'], np.asarray(features['y'])
+        folds = fold_assignments(y, fingerprint(sha256, FEATURE_PIPELINE_VERSION), k, stratified)
+
+        started = time.perf_counter()
+        per_fold = Parallel(n_jobs=min(n_jobs, k))(
+            delayed(fit_fold)(family, X, y, folds, fold, params) for fold in range(k))
+        wall_time = time.perf_counter() - started
+        return {
+            'family': family,
+            'dataset': dataset,
+            'k': k,
+            'stratified': stratified,
+            'rows': len(y),
+            'folds': per_fold,
+            'summary': {metric: {'mean': float(np.mean([f[metric] for f in per_fold])),
+                                 'std': float(np.std([f[metric] for f in per_fold]))} for metric in METRICS},
+            'fit_s': float(sum(f['fit_s'] for f in per_fold)),
+            'wall_s': wall_time,
+        }
+
+    return get_artifact_cache().get_or_build('cross_validation', cv_key(family, csv_path, k, stratified, params), build)
+
+
+# ผลที่คำนวณไว้แล้วใน cache (None = ยังไม่เคยรัน)
+def cached_cross_validation(family, csv_path=None, k=CV_FOLDS, stratified=True, params=None):
+    key = cv_key(family, csv_path, k, stratified, params)
+    if not get_artifact_cache().contains('cross_validation', key):
+        return None
+    return cross_validate(family, csv_path, k, stratified, params)
@@ -0,0 +1,158 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core import ROOT_DIR, file_sha256
+
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+CACHE_DIR = os.path.join(DATA_DIR, '.cache')
+DIABETES_CSV = os.path.join(DATA_DIR, 'diabetes_dataset.csv')
+# Loan_default.csv (Kaggle) ไม่ได้อยู่ใน repo ดาวน์โหลดมาไว้ที่ data/ หรือระบุ path ผ่าน LOAN_DATA_PATH
+LOAN_CSV = os.environ.get('LOAN_DATA_PATH', os.path.join(DATA_DIR, 'Loan_default.csv'))
+
+# dtype ที่เก็บใน sidecar: category เก็บเป็นรหัส int8 + รายชื่อหมวดหมู่ใน meta.json
+DIABETES_SCHEMA = {
+    'gender': 'category',
+    'age': 'float32',
+    'hypertension': 'int8',
+    'heart_disease': 'int8',
+    'smoking_history': 'category',
+    'bmi': 'float32',
+    'HbA1c_level': 'float32',
+    'blood_glucose_level': 'float32',
+    'diabetes': 'int8',
+}
+
+_lock = threading.Lock()
+
+
+# ตัวชี้ไปยัง sidecar ปัจจุบันของ CSV แต่ละไฟล์ (meta + mtime/size ล่าสุดที่ตรวจแล้ว)
+def _pointer_path(csv_path):
+    return os.path.join(CACHE_DIR, os.path.splitext(os.path.basename(csv_path))[0] + '.json')
+
+
+# โฟลเดอร์ sidecar ตั้งชื่อตามเนื้อหา CSV + schema สร้างแล้วไม่แก้ไขอีก
+# process อื่นที่ memory-map ไฟล์อยู่จึงไม่ถูกลบหรือเขียนทับกลางทาง
+def _sidecar_name(csv_path, schema, sha256):
+    key = hashlib.sha256((sha256 + json.dumps(schema, sort_keys=True)).encode()).hexdigest()[:16]
+    return f'{os.path.splitext(os.path.basename(csv_path))[0]}-{key}'
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# เขียนผ่านไฟล์ชั่วคราวชื่อไม่ซ้ำแล้ว os.replace หลาย process เขียนพร้อมกันได้โดยไม่ทับไฟล์ครึ่งๆ กลางๆ ของกันและกัน
+def _write_json(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+
+
+# แปลง CSV เป็นไฟล์ .npy ต่อคอลัมน์ (ทำครั้งเดียวต่อเนื้อหาไฟล์)
+# สร้างในโฟลเดอร์ชั่วคราวของตัวเองแล้ว rename ครั้งเดียว ถ้า process อื่นสร้างเสร็จก่อนก็ทิ้งของตัวเองแล้วใช้ของเขา
+def build_sidecar(csv_path, schema, sha256):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    name = _sidecar_name(csv_path, schema, sha256)
+    sidecar = os.path.join(CACHE_DIR, name)
+    meta = _read_json(os.path.join(sidecar, 'meta.json'))
+    if meta is None:
+        tmp = tempfile.mkdtemp(dir=CACHE_DIR, prefix='.tmp-')
+        try:
+            df = pd.read_csv(csv_path, usecols=list(schema))
+            columns = {}
+            for column, dtype in schema.items():
+                if dtype == 'category':
+                    values = df[column].astype('category')
+                    np.save(os.path.join(tmp, f'{column}.npy'), values.cat.codes.to_numpy(dtype=np.int8))
+                    columns[column] = {'dtype': dtype, 'categories': [str(c) for c in values.cat.categories]}
+                else:
+                    np.save(os.path.join(tmp, f'{column}.npy'), df[column].to_numpy(dtype=dtype))
+                    columns[column] = {'dtype': dtype}
+            meta = {
+                'source': os.path.basename(csv_path),
+                'sha256': sha256,
+                'rows': len(df),
+                'columns': columns,
+            }
+            with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            os.chmod(tmp, 0o755)
+            os.rename(tmp, sidecar)
+        except OSError:
+            # process อื่นสร้างโฟลเดอร์เดียวกันเสร็จก่อน
+            shutil.rmtree(tmp, ignore_errors=True)
+            meta = _read_json(os.path.join(sidecar, 'meta.json'))
+            if meta is None:
+                raise
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    stat = os.stat(csv_path)
+    meta = dict(meta, dir=name, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    _write_json(_pointer_path(csv_path), meta)
+    return meta
+
+
+# คืน meta ของ sidecar ที่ตรงกับเนื้อหา CSV ปัจจุบัน สร้างใหม่ถ้ายังไม่มีหรือไฟล์ต้นทางเปลี่ยน
+# ถ้า mtime/size ไม่เปลี่ยนจะไม่ต้องคำนวณ hash ใหม่
+def ensure_sidecar(csv_path, schema):
+    with _lock:
+        meta = _read_json(_pointer_path(csv_path))
+        stat = os.stat(csv_path)
+        if (meta is not None and set(meta['columns']) == set(schema)
+                and (meta['mtime_ns'], meta['size']) == (stat.st_mtime_ns, stat.st_size)
+                and meta['dir'] == _sidecar_name(csv_path, schema, meta['sha256'])
+                and os.path.exists(os.path.join(CACHE_DIR, meta['dir'], 'meta.json'))):
+            return meta
+        # build_sidecar ใช้โฟลเดอร์เดิมถ้าเนื้อหาไม่เปลี่ยน (แค่ mtime เปลี่ยน) ไม่ต้องแปลง CSV ใหม่
+        return build_sidecar(csv_path, schema, file_sha256(csv_path))
+
+
+# อ่านคอลัมน์แบบ memory-map (ไม่คัดลอกข้อมูล) คืนค่า {ชื่อคอลัมน์: array}
+# คอลัมน์ category จะได้รหัส int8 ส่วนรายชื่อหมวดหมู่อยู่ใน meta['columns'][ชื่อ]['categories']
+def load_columns(csv_path=DIABETES_CSV, schema=DIABETES_SCHEMA, columns=None):
+    meta = ensure_sidecar(csv_path, schema)
+    sidecar = os.path.join(CACHE_DIR, meta['dir'])
+    names = columns or list(schema)
+    arrays = {name: np.load(os.path.join(sidecar, f'{name}.npy'), mmap_mode='r') for name in names}
+    return arrays, meta
+
+
+def load_frame(csv_path=DIABETES_CSV, schema=DIABETES_SCHEMA, columns=None):
+    arrays, meta = load_columns(csv_path, schema, columns)
+    data = {}
+    for name, values in arrays.items():
+        info = meta['columns'][name]
+        if info['dtype'] == 'category':
+            data[name] = pd.Categorical.from_codes(values, info['categories'])
+        else:
+            data[name] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def load_diabetes(columns=None):
+    return load_frame(DIABETES_CSV, DIABETES_SCHEMA, columns)
+
+
+# ลายนิ้วมือของข้อมูล (ใช้เป็น key ของ cache อื่นๆ)
+def dataset_fingerprint(csv_path=DIABETES_CSV, schema=DIABETES_SCHEMA):
+    return ensure_sidecar(csv_path, schema)['sha256']
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+# ลำดับคอลัมน์ที่ scaler.pkl และ mlp_model.h5 ถูกเทรนมา
+FEATURES = ['gender', 'age', 'hypertension', 'heart_disease', 'bmi', 'HbA1c_level', 'blood_glucose_level']
+
+# ตอนเทรนใช้ LabelEncoder กับ gender (Female=0, Male=1, Other=2) ดูได้จาก scaler.mean_
+CATEGORY_CODES = {
+    'gender': {'female': 0, 'หญิง': 0, 'male': 1, 'ชาย': 1, 'other': 2},
+    'hypertension': {'yes': 1, 'ใช่': 1, 'no': 0, 'ไม่ใช่': 0},
+    'heart_disease': {'yes': 1, 'ใช่': 1, 'no': 0, 'ไม่ใช่': 0},
+}
+
+THRESHOLD = 0.5
+
+
+def encode_value(field, value):
+    if isinstance(value, str):
+        codes = CATEGORY_CODES.get(field, {})
+        key = value.strip().lower()
+        if key in codes:
+            return codes[key]
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"ค่า '{value}' ของ {field} ไม่ถูกต้อง")
+
+
+# แปลงข้อมูลผู้ป่วยหนึ่งรายเป็นแถวตามลำดับ FEATURES
+def encode_record(record):
+    missing = [f for f in FEATURES if f not in record]
+    if missing:
+        raise ValueError(f"ข้อมูลไม่ครบ: {', '.join(missing)}")
+    return np.array([[encode_value(f, record[f]) for f in FEATURES]], dtype=np.float64)
+
+
+# แปลงข้อมูลทั้งตาราง (เช่น data/diabetes_dataset.csv) เป็น matrix ตามลำดับ FEATURES
+def encode_frame(df):
+    missing = [f for f in FEATURES if f not in df.columns]
+    if missing:
+        raise ValueError(f"ข้อมูลไม่ครบ: {', '.join(missing)}")
+
+    out = np.empty((len(df), len(FEATURES)), dtype=np.float64)
+    for j, field in enumerate(FEATURES):
+        column = df[field]
+        if field in CATEGORY_CODES and not pd.api.types.is_numeric_dtype(column):
+            column = column.astype(str).str.strip().str.lower().map(CATEGORY_CODES[field])
+            if column.isna().any():
+                raise ValueError(f"คอลัมน์ {field} มีค่าที่ไม่รู้จัก")
+        out[:, j] = column.to_numpy(dtype=np.float64)
+    return out
+
+
+def result_message(prob):
+    return "ท่านมีโอกาสเป็นโรคเบาหวาน" if prob >= THRESHOLD else "ท่านไม่มีโอกาสเป็นโรคเบาหวาน"
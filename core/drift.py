@@ -0,0 +1,346 @@
+import bisect
+import math
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from core import diabetes
+from core.dataset import DIABETES_CSV, LOAN_CSV
+from core.loan import VALUE_ALIASES, normalize_category, normalize_field
+
+# ตรวจว่าข้อมูลที่เข้ามาทำนาย (หน้า 01/03 และ serve.py) ยังมีการกระจายเหมือนข้อมูลที่ใช้เทรนหรือไม่
+# baseline ของแต่ละ feature คำนวณครั้งเดียวจาก data/diabetes_dataset.csv หรือ Loan_default.csv (cache ตาม sha256)
+# ข้อมูลจริงเก็บเป็นสรุปขนาดคงที่: feature ตัวเลขนับลง bucket ที่ขอบคือ quantile ของ baseline
+# feature หมวดหมู่นับตามค่า (ไม่เกิน MAX_CATEGORIES ค่า) แต่ละคำขอจึงเป็นแค่การบวกตัวนับไม่กี่ตัว
+# แล้วเทียบกับ baseline ด้วย PSI (ทุก feature) และ KS (feature ตัวเลข คำนวณจาก bucket)
+
+DRIFT_MONITORING = os.environ.get('DRIFT_MONITORING', '1') != '0'
+# จำนวน bucket ของ feature ตัวเลข (ขอบคือ quantile ของ baseline)
+BINS = 20
+MAX_CATEGORIES = 50
+OTHER = '__other__'
+# คำขอที่เข้ามาระหว่างสร้าง baseline เก็บไว้ไม่เกินนี้แล้วนับย้อนหลังเมื่อ baseline พร้อม
+PENDING_MAX = 1024
+# ต้องมีข้อมูลอย่างน้อยเท่านี้ก่อนตัดสินว่า drift
+MIN_OBSERVATIONS = 100
+# เกณฑ์ PSI ที่ใช้กันทั่วไป: < 0.1 คงที่, 0.1-0.25 เปลี่ยนเล็กน้อย, > 0.25 เปลี่ยนมาก
+PSI_WARNING = 0.1
+PSI_ALERT = 0.25
+# เปลี่ยนค่านี้เมื่อวิธีสร้าง baseline เปลี่ยน เพื่อไม่ให้ใช้ baseline เก่าใน cache
+BASELINE_VERSION = 1
+
+DOMAINS = {
+    'diabetes': {
+        'numeric': ['age', 'bmi', 'HbA1c_level', 'blood_glucose_level'],
+        'categorical': ['gender', 'hypertension', 'heart_disease'],
+    },
+    'loan': {
+        'numeric': ['age', 'income', 'loanamount', 'loanterm', 'creditscore', 'dtiratio'],
+        'categorical': ['education', 'employmenttype', 'maritalstatus'],
+    },
+}
+
+
+# ---------- baseline ----------
+
+def _numeric_baseline(values):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, BINS + 1)[1:-1]))
+    counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+    return {'edges': edges.tolist(), 'counts': counts.tolist()}
+
+
+def _categorical_baseline(values):
+    return {str(k): int(v) for k, v in pd.Series(values).value_counts().items()}
+
+
+def _diabetes_key(value):
+    return str(int(value))
+
+
+def _loan_key(field, value):
+    key = normalize_category(value)
+    return VALUE_ALIASES.get(field, {}).get(key, [key])[0]
+
+
+def build_baseline(domain, csv_path):
+    spec = DOMAINS[domain]
+    if domain == 'diabetes':
+        # อ่านจาก CSV ตรงๆ (float64) ให้ค่าที่ตรงกับขอบ bucket พอดีตกช่องเดียวกับค่าที่ผู้ใช้กรอก
+        # (sidecar เก็บเป็น float32 เช่น 5.7 -> 5.6999998 จะตกคนละช่อง)
+        X = diabetes.encode_frame(pd.read_csv(csv_path, usecols=diabetes.FEATURES))
+        columns = {field: X[:, diabetes.FEATURES.index(field)] for field in spec['numeric'] + spec['categorical']}
+        categorical = {field: [_diabetes_key(v) for v in columns[field]] for field in spec['categorical']}
+    else:
+        df = pd.read_csv(csv_path)
+        df.columns = [normalize_field(c) for c in df.columns]
+        columns = {field: df[field].to_numpy() for field in spec['numeric'] + spec['categorical']}
+        categorical = {field: df[field].map(lambda v, f=field: _loan_key(f, v)) for field in spec['categorical']}
+    return {
+        'rows': len(next(iter(columns.values()))),
+        'numeric': {field: _numeric_baseline(columns[field]) for field in spec['numeric']},
+        'categorical': {field: _categorical_baseline(categorical[field]) for field in spec['categorical']},
+    }
+
+
+def load_baseline(domain, csv_path):
+    from core.artifacts import cached_sha256, fingerprint, get_artifact_cache
+
+    key = fingerprint(domain, cached_sha256(csv_path), DOMAINS[domain], BINS, BASELINE_VERSION)
+    return get_artifact_cache().get_or_build('drift_baseline', key, lambda: build_baseline(domain, csv_path))
+
+
+# ---------- สถิติ ----------
+
+def psi(expected, actual, eps=1e-4):
+    expected = np.maximum(np.asarray(expected, dtype=np.float64) / max(sum(expected), 1), eps)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64) / max(sum(actual), 1), eps)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+# KS จากการกระจายสะสมที่ขอบ bucket (ค่าประมาณจากด้านล่างของ KS จริง)
+def ks_binned(expected, actual):
+    expected = np.cumsum(expected) / max(sum(expected), 1)
+    actual = np.cumsum(actual) / max(sum(actual), 1)
+    return float(np.max(np.abs(expected - actual)))
+
+
+def drift_status(n, psi_value):
+    if n < MIN_OBSERVATIONS:
+        return 'insufficient'
+    if psi_value > PSI_ALERT:
+        return 'drift'
+    if psi_value > PSI_WARNING:
+        return 'warning'
+    return 'stable'
+
+
+# ---------- สรุปข้อมูลจริง ----------
+
+class NumericSketch:
+    def __init__(self, edges):
+        self.edges = list(edges)
+        self._edges = np.asarray(edges, dtype=np.float64)
+        self.counts = [0] * (len(edges) + 1)
+        self.n = 0
+        self.sum = 0.0
+
+    def add(self, value):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return
+        if math.isnan(value):
+            return
+        self.counts[bisect.bisect_right(self.edges, value)] += 1
+        self.n += 1
+        self.sum += value
+
+    def add_many(self, values):
+        values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values)]
+        counts = np.bincount(np.searchsorted(self._edges, values, side='right'), minlength=len(self.counts))
+        self.counts = (np.asarray(self.counts) + counts).tolist()
+        self.n += len(values)
+        self.sum += float(values.sum())
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.n = 0
+        self.sum = 0.0
+
+
+class CategoricalSketch:
+    def __init__(self, key):
+        self.key = key
+        self.counts = {}
+        self.n = 0
+
+    def add(self, value):
+        key = self.key(value)
+        if key not in self.counts and len(self.counts) >= MAX_CATEGORIES:
+            key = OTHER
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.n += 1
+
+    def add_many(self, values):
+        for value, count in pd.Series(values).value_counts().items():
+            key = self.key(value)
+            if key not in self.counts and len(self.counts) >= MAX_CATEGORIES:
+                key = OTHER
+            self.counts[key] = self.counts.get(key, 0) + int(count)
+            self.n += int(count)
+
+    def reset(self):
+        self.counts = {}
+        self.n = 0
+
+
+# ตัวติดตาม drift ของข้อมูลหนึ่งชุด (loan / diabetes) ใช้ร่วมกันทุกโมเดลและทุก session ใน process
+# baseline สร้างใน thread เบื้องหลังเมื่อมีคำขอแรก (หรือเมื่อเปิดหน้ารายงาน) คำขอไม่ต้องรอ
+class DriftMonitor:
+    def __init__(self, domain, csv_path):
+        self.domain = domain
+        self.csv_path = csv_path
+        self.spec = DOMAINS[domain]
+        self.baseline = None
+        self.sketches = None
+        self.error = None
+        self.started = time.time()
+        self._pending = deque(maxlen=PENDING_MAX)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # เริ่มสร้าง baseline ครั้งเดียว (เรียกขณะถือ _lock)
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name=f'drift-{self.domain}', daemon=True)
+            self._thread.start()
+
+    def _load(self):
+        try:
+            if not os.path.exists(self.csv_path):
+                raise FileNotFoundError(f"ไม่พบไฟล์ข้อมูล {self.csv_path}")
+            baseline = load_baseline(self.domain, self.csv_path)
+        except Exception as e:
+            self.error = str(e)
+            with self._lock:
+                self._pending.clear()
+            return
+        sketches = {field: NumericSketch(baseline['numeric'][field]['edges']) for field in self.spec['numeric']}
+        for field in self.spec['categorical']:
+            if self.domain == 'diabetes':
+                sketches[field] = CategoricalSketch(_diabetes_key)
+            else:
+                sketches[field] = CategoricalSketch(lambda v, f=field: _loan_key(f, v))
+        with self._lock:
+            self.baseline, self.sketches = baseline, sketches
+            while self._pending:
+                kind, values = self._pending.popleft()
+                self._apply(kind, values)
+
+    def wait_ready(self, timeout=None):
+        with self._lock:
+            self._start()
+        self._thread.join(timeout)
+        return self.sketches is not None
+
+    def _apply(self, kind, values):
+        if kind == 'row':
+            for field, value in zip(diabetes.FEATURES, values):
+                sketch = self.sketches.get(field)
+                if sketch is not None:
+                    sketch.add(value)
+        elif kind == 'record':
+            for field, value in values.items():
+                sketch = self.sketches.get(normalize_field(field))
+                if sketch is not None and value is not None:
+                    sketch.add(value)
+        elif kind == 'matrix':
+            for j, field in enumerate(diabetes.FEATURES):
+                sketch = self.sketches.get(field)
+                if sketch is not None:
+                    sketch.add_many(values[:, j])
+        else:
+            for column in values.columns:
+                sketch = self.sketches.get(normalize_field(column))
+                if sketch is not None:
+                    sketch.add_many(values[column])
+
+    def _observe(self, kind, values):
+        if self.error is not None:
+            return
+        with self._lock:
+            if self.sketches is None:
+                self._start()
+                # เก็บเฉพาะคำขอทีละแถว (batch ใหญ่ที่มาก่อน baseline พร้อมจะไม่ถูกนับ)
+                if kind in ('row', 'record'):
+                    self._pending.append((kind, values))
+            else:
+                self._apply(kind, values)
+
+    # แถวที่ encode แล้วตามลำดับ diabetes.FEATURES
+    def observe_row(self, row):
+        self._observe('row', row)
+
+    # ข้อมูลผู้กู้หนึ่งราย (dict แบบเดียวกับที่ส่งให้ LoanScorer.predict_one)
+    def observe_record(self, record):
+        self._observe('record', record)
+
+    # matrix ที่ encode แล้วตามลำดับ diabetes.FEATURES
+    def observe_matrix(self, X):
+        self._observe('matrix', X)
+
+    def observe_frame(self, df):
+        self._observe('frame', df)
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._pending.clear()
+            for sketch in (self.sketches or {}).values():
+                sketch.reset()
+
+    # การกระจายของ baseline เทียบกับข้อมูลจริงของ feature หนึ่ง (สัดส่วนต่อ bucket/หมวดหมู่)
+    def distribution(self, field):
+        with self._lock:
+            sketch = self.sketches[field]
+            if field in self.baseline['numeric']:
+                edges = self.baseline['numeric'][field]['edges']
+                labels = [f'< {edges[0]:g}'] + [f'{a:g} - {b:g}' for a, b in zip(edges[:-1], edges[1:])] + [f'>= {edges[-1]:g}']
+                expected, actual = self.baseline['numeric'][field]['counts'], list(sketch.counts)
+            else:
+                base = self.baseline['categorical'][field]
+                labels = list(base) + [k for k in sketch.counts if k not in base]
+                expected = [base.get(k, 0) for k in labels]
+                actual = [sketch.counts.get(k, 0) for k in labels]
+        return pd.DataFrame({
+            'bucket': labels,
+            'baseline': np.asarray(expected) / max(sum(expected), 1),
+            'live': np.asarray(actual) / max(sum(actual), 1),
+        })
+
+    def report(self):
+        result = {'domain': self.domain, 'ready': self.sketches is not None, 'error': self.error,
+                  'since': self.started, 'baseline_rows': None, 'features': []}
+        if self.sketches is None:
+            return result
+        result['baseline_rows'] = self.baseline['rows']
+        with self._lock:
+            snapshot = {field: (sketch.n, list(sketch.counts) if isinstance(sketch, NumericSketch) else dict(sketch.counts),
+                                sketch.sum / sketch.n if isinstance(sketch, NumericSketch) and sketch.n else None)
+                        for field, sketch in self.sketches.items()}
+        for field, (n, counts, mean) in snapshot.items():
+            if field in self.baseline['numeric']:
+                expected = self.baseline['numeric'][field]['counts']
+                psi_value = psi(expected, counts) if n else None
+                ks_value = ks_binned(expected, counts) if n else None
+                kind = 'numeric'
+            else:
+                base = self.baseline['categorical'][field]
+                keys = list(base) + [k for k in counts if k not in base]
+                psi_value = psi([base.get(k, 0) for k in keys], [counts.get(k, 0) for k in keys]) if n else None
+                ks_value = None
+                kind = 'categorical'
+            result['features'].append({
+                'feature': field, 'kind': kind, 'n': n, 'mean': mean, 'psi': psi_value, 'ks': ks_value,
+                'status': drift_status(n, psi_value or 0.0),
+            })
+        return result
+
+
+_monitors = {}
+_monitors_lock = threading.Lock()
+
+
+# ตัวติดตามกลางของ process ต่อชุดข้อมูล
+def get_drift_monitor(domain):
+    with _monitors_lock:
+        if domain not in _monitors:
+            _monitors[domain] = DriftMonitor(domain, DIABETES_CSV if domain == 'diabetes' else LOAN_CSV)
+        return _monitors[domain]
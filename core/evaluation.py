@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.artifacts import cached_sha256, fingerprint, get_artifact_cache
+from core.dataset import LOAN_CSV
+from core.explain import explain_frame
+from core.loan import score_matrix, synthetic_applicants
+from core.scoring import LOAN_MODEL_FILES, model_path
+from core.training import FEATURE_PIPELINE_VERSION, RANDOM_STATE, TEST_SIZE, loan_features, split_data
+
+# ผลที่แสดงในหน้าคำอธิบายโมเดล (02) คำนวณจากโมเดลและข้อมูลจริง
+# แต่ละผลคำนวณครั้งเดียวต่อ sha256 ของข้อมูล/โมเดล แล้วเก็บใน ArtifactCache (.cache/artifacts/)
+
+SAMPLE_ROWS = 10
+BACKGROUND_ROWS = 2000
+
+
+def loan_data_available(csv_path=LOAN_CSV):
+    return os.path.exists(csv_path)
+
+
+# สถิติของชุดข้อมูล: ตัวอย่างแถว, describe(), ค่าหายไป, อัตราการผิดนัด
+def loan_summary(csv_path=LOAN_CSV):
+    def build():
+        df = pd.read_csv(csv_path)
+        df.columns = df.columns.str.lower()
+        return {
+            'rows': len(df),
+            'columns': len(df.columns),
+            'head': df.head(SAMPLE_ROWS),
+            'describe': df.describe().round(2),
+            'missing': df.isna().sum(),
+            'default_rate': float(df['default'].mean()),
+        }
+
+    return get_artifact_cache().get_or_build('loan_summary', fingerprint(cached_sha256(csv_path)), build)
+
+
+# ประเมินโมเดลบนชุดทดสอบเดียวกับตอนเทรน (train_test_split 80/20, random_state=42)
+def evaluate_loan_model(key, scorer, csv_path=LOAN_CSV):
+    from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+
+    data_sha = cached_sha256(csv_path)
+    model_sha = cached_sha256(model_path(LOAN_MODEL_FILES[key]))
+
+    def build():
+        features = loan_features(csv_path, data_sha)
+        X = pd.DataFrame(features['X'], columns=features['feature_names'])
+        _, X_test, _, y_test = split_data(X, features['y'])
+        # เรียงคอลัมน์ตามที่โมเดลเรียนรู้ (หมวดหมู่ที่ไม่มีในข้อมูลชุดนี้เป็น 0)
+        X_model = X_test.reindex(columns=scorer.encoder.feature_names, fill_value=0).to_numpy(dtype=np.float32)
+        probs = score_matrix(scorer.model, X_model)
+        pred = (probs > 0.5).astype(np.int8)
+
+        sample = X_test[['age', 'income', 'loanamount']].head(SAMPLE_ROWS).copy()
+        sample['prediction'] = pred[:SAMPLE_ROWS]
+        sample['actual'] = y_test[:SAMPLE_ROWS]
+        return {
+            'test_rows': len(y_test),
+            'accuracy': float(accuracy_score(y_test, pred)),
+            'confusion_matrix': confusion_matrix(y_test, pred, labels=[0, 1]),
+            'report': classification_report(y_test, pred, output_dict=True, zero_division=0),
+            'sample': sample,
+        }
+
+    key_parts = fingerprint(key, model_sha, data_sha, FEATURE_PIPELINE_VERSION, TEST_SIZE, RANDOM_STATE)
+    return get_artifact_cache().get_or_build('loan_evaluation', key_parts, build)
+
+
+# feature_importances_ ของโมเดลที่โหลดอยู่ เรียงจากมากไปน้อย
+def feature_importance(key, scorer):
+    def build():
+        return pd.Series(scorer.model.feature_importances_, index=scorer.encoder.feature_names,
+                         name='importance').sort_values(ascending=False)
+
+    model_sha = cached_sha256(model_path(LOAN_MODEL_FILES[key]))
+    return get_artifact_cache().get_or_build('feature_importance', fingerprint(key, model_sha), build)
+
+
+# ค่าเฉลี่ย |contribution| ต่อ field บนข้อมูลอ้างอิง (แถวแรกของชุดข้อมูลจริง หรือข้อมูลสังเคราะห์ถ้าไม่มีไฟล์)
+def contribution_importance(key, scorer, csv_path=LOAN_CSV):
+    if loan_data_available(csv_path):
+        data_key = cached_sha256(csv_path)
+        load = lambda: pd.read_csv(csv_path, nrows=BACKGROUND_ROWS)
+    else:
+        data_key = 'synthetic'
+        load = lambda: synthetic_applicants(BACKGROUND_ROWS)
+
+    def build():
+        return explain_frame(scorer, load()).abs().mean().sort_values(ascending=False)
+
+    model_sha = cached_sha256(model_path(LOAN_MODEL_FILES[key]))
+    key_parts = fingerprint(key, model_sha, data_key, BACKGROUND_ROWS)
+    return get_artifact_cache().get_or_build('contribution_importance', key_parts, build)
@@ -0,0 +1,303 @@
+import json
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core.artifacts import fingerprint, get_artifact_cache
+from core.loan import CHUNK_SIZE
+from core.scoring import count_rows, stage_span
+
+# คำอธิบายรายผู้กู้: ผลรวมของ contribution ทุก feature + expected value = ผลทำนายของโมเดล
+# - XGBoost ใช้ TreeSHAP (ผลเท่ากับ pred_contribs ของ XGBoost) หน่วยเป็น log-odds
+# - Random Forest ใช้ path attribution: ทุกครั้งที่เดินผ่าน split ค่าคาดหวังของ node ที่เปลี่ยนไป
+#   (คำนวณจากสัดส่วนข้อมูลตอนเทรน) ถูกนับให้ feature ของ split นั้น หน่วยเป็นความน่าจะเป็น
+#   ใช้เวลา O(ความลึก) ต่อแถวต่อต้น และเดินทุกต้นพร้อมกันทั้ง batch แบบเดียวกับ core.trees
+
+
+# TreeSHAP แบบ path-dependent สำหรับ XGBoost (ผลเท่ากับ pred_contribs ของ XGBoost)
+# ทุกใบ ℓ มีชุด feature บนเส้นทาง P (feature ซ้ำถูกรวมเป็นตัวเดียว) แต่ละ feature มี
+#   p_j = สัดส่วน cover (sum_hessian) ที่ไหลไปตามเส้นทาง และ o_j(x) = x ผ่านทุกเงื่อนไขของ j บนเส้นทางหรือไม่
+# ค่า SHAP ของใบนี้ขึ้นกับ x ผ่าน bit o เท่านั้น (ไม่เกิน 2^ความลึก แบบ) จึงคำนวณตารางของทุกแบบไว้ล่วงหน้า
+# ตอนอธิบายเหลือแค่หา o ของทุกใบแล้วเปิดตาราง (แนวคิดเดียวกับ Fast TreeSHAP v2)
+class XGBExplainer:
+    units = 'log-odds'
+    # ชื่อของค่าเฉลี่ย |contribution| ที่ใช้แสดงบนกราฟ
+    summary_label = '|SHAP| เฉลี่ย'
+
+    def __init__(self, model):
+        from scipy import sparse
+
+        booster = model.get_booster()
+        self.feature_names = booster.feature_names
+        self.n_features = len(self.feature_names)
+        raw = booster.save_raw('json')
+        tables = get_artifact_cache().get_or_build(
+            'xgb_shap_tables', fingerprint(np.frombuffer(bytes(raw), dtype=np.uint8)),
+            lambda: build_xgb_shap_tables(json.loads(raw)['learner'], self.n_features))
+        self.__dict__.update(tables)
+
+        # ตารางและ index เป็น float32/int32 เพื่อลดขนาดข้อมูลที่ต้องอ่านต่อแถว
+        # การรวมตามกลุ่ม/ใบ/feature ทำด้วย sparse matrix (เร็วกว่า reduceat มาก)
+        n_elems, n_groups, n_leaves = len(self.elem_node), len(self.group_leaf), len(self.leaf_group_start)
+        self.table = self.table.astype(np.float32)
+        self.elem_to_group = sparse.csr_matrix(
+            (np.ones(n_elems, dtype=np.float32), np.arange(n_elems), np.append(self.group_start, n_elems)),
+            shape=(n_groups, n_elems))
+        self.group_to_leaf = sparse.csr_matrix(
+            (self.group_bit.astype(np.float32), np.arange(n_groups), np.append(self.leaf_group_start, n_groups)),
+            shape=(n_leaves, n_groups))
+        self.group_to_feature = sparse.csr_matrix(self.group_onehot.T.astype(np.float32))
+        self.group_k = self.group_k.astype(np.int32)[:, None]
+        self.leaf_base = self.leaf_base.astype(np.int32)[:, None]
+        self.leaf_m = self.leaf_m.astype(np.int32)[:, None]
+        # จำนวนแถวต่อรอบ ให้ matrix (กลุ่ม x แถว) มีขนาดไม่เกินราว 4 ล้านช่อง
+        self.chunk_rows = max(1, (1 << 22) // max(n_groups, 1))
+
+    # คืนค่า (n, k + 1) คอลัมน์สุดท้ายคือ expected value (bias)
+    def contributions(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty((len(X), self.n_features + 1))
+        for start in range(0, len(X), self.chunk_rows):
+            out[start:start + self.chunk_rows, :-1] = self._contributions(X[start:start + self.chunk_rows]).T
+        out[:, -1] = self.expected_value
+        return out
+
+    # คำนวณแบบ (node/กลุ่ม/ใบ x แถว) คืนค่า (k, n)
+    def _contributions(self, X):
+        x = X.T[self.node_feature]
+        go_right = x >= self.node_threshold[:, None]
+        missing = np.isnan(x)
+        if missing.any():
+            go_right = np.where(missing, ~self.node_default_left[:, None], go_right)
+
+        failed = (go_right[self.elem_node] != self.elem_right[:, None]).astype(np.float32)
+        o = (self.elem_to_group @ failed) == 0
+        mask = (self.group_to_leaf @ o.astype(np.float32)).astype(np.int32)
+        index = (self.leaf_base + mask * self.leaf_m)[self.group_leaf] + self.group_k
+        return self.group_to_feature @ self.table.take(index)
+
+
+def _shapley_weights(m):
+    return np.array([math.factorial(s) * math.factorial(m - s - 1) / math.factorial(m) for s in range(m)])
+
+
+# ตาราง SHAP ของใบที่มีจำนวน feature บนเส้นทางเท่ากัน (m) ทั้งหมดพร้อมกัน
+# p: (ใบ, m), v: (ใบ,) คืนค่า (ใบ, 2^m, m) ตามแบบของ bit o และตำแหน่ง feature
+def _leaf_tables(p, v, m):
+    masks = np.arange(1 << m)
+    o = ((masks[:, None] >> np.arange(m)) & 1).astype(np.float64)
+    weights = _shapley_weights(m)
+    table = np.empty((len(v), len(masks), m))
+    for k in range(m):
+        # สัมประสิทธิ์ของ z^s ใน Π_{j != k} (p_j + o_j z)
+        poly = np.zeros((len(v), len(masks), m))
+        poly[..., 0] = 1.0
+        for j in range(m):
+            if j == k:
+                continue
+            shifted = np.zeros_like(poly)
+            shifted[..., 1:] = poly[..., :-1] * o[None, :, j, None]
+            poly = poly * p[:, j, None, None] + shifted
+        table[..., k] = v[:, None] * (o[None, :, k] - p[:, k, None]) * (poly @ weights)
+    return table
+
+
+def build_xgb_shap_tables(learner, n_features):
+    node_feature, node_threshold, node_default_left = [], [], []
+    leaves = []  # (ค่าใบ, [(feature, [(node, ไปขวา)], p)])
+    offset = 0
+    for tree in learner['gradient_booster']['model']['trees']:
+        left = tree['left_children']
+        right = tree['right_children']
+        feature = tree['split_indices']
+        cover = tree['sum_hessian']
+        node_feature += feature
+        node_threshold += tree['split_conditions']
+        node_default_left += tree['default_left']
+
+        stack = [(0, {})]
+        while stack:
+            node, path = stack.pop()
+            if left[node] == -1:
+                leaves.append((tree['split_conditions'][node], path))
+                continue
+            for child, go_right in ((left[node], False), (right[node], True)):
+                child_path = {f: (list(steps), p) for f, (steps, p) in path.items()}
+                steps, p = child_path.get(feature[node], ([], 1.0))
+                steps.append((offset + node, go_right))
+                child_path[feature[node]] = (steps, p * cover[child] / cover[node])
+                stack.append((child, child_path))
+        offset += len(left)
+
+    base_score = float(str(learner['learner_model_param']['base_score']).strip('[]'))
+    expected_value = float(np.log(base_score / (1.0 - base_score)))
+
+    # จัดกลุ่มใบตามจำนวน feature บนเส้นทาง แล้วคำนวณตารางทีละกลุ่ม
+    by_m = {}
+    for leaf, (value, path) in enumerate(leaves):
+        by_m.setdefault(len(path), []).append(leaf)
+        expected_value += value * math.prod(p for _, p in path.values())
+
+    leaf_base = np.zeros(len(leaves), dtype=np.int64)
+    tables, size = [], 0
+    for m, ids in sorted(by_m.items()):
+        if m == 0:
+            continue
+        p = np.array([[p for _, p in leaves[i][1].values()] for i in ids])
+        v = np.array([leaves[i][0] for i in ids])
+        tables.append(_leaf_tables(p, v, m).ravel())
+        leaf_base[ids] = size + np.arange(len(ids)) * ((1 << m) * m)
+        size += len(ids) * (1 << m) * m
+
+    elem_node, elem_right, group_start = [], [], []
+    group_leaf, group_k, group_feature, leaf_group_start = [], [], [], []
+    for leaf, (_, path) in enumerate(leaves):
+        if not path:
+            continue
+        leaf_group_start.append(len(group_leaf))
+        for k, (f, (steps, _)) in enumerate(path.items()):
+            group_start.append(len(elem_node))
+            for node, go_right in steps:
+                elem_node.append(node)
+                elem_right.append(go_right)
+            group_leaf.append(leaf)
+            group_k.append(k)
+            group_feature.append(f)
+
+    # mask ถูกคำนวณต่อใบที่มี path เท่านั้น จึงต้องแปลง index ของใบเป็นลำดับในกลุ่มนั้น
+    with_path = sorted(set(group_leaf))
+    leaf_order = np.full(len(leaves), -1, dtype=np.int64)
+    leaf_order[with_path] = np.arange(len(with_path))
+    group_leaf = np.array(group_leaf, dtype=np.int64)
+    group_k = np.array(group_k, dtype=np.int64)
+    onehot = np.zeros((len(group_leaf), n_features))
+    onehot[np.arange(len(group_leaf)), group_feature] = 1.0
+
+    return {
+        'node_feature': np.array(node_feature, dtype=np.intp),
+        'node_threshold': np.array(node_threshold, dtype=np.float32),
+        'node_default_left': np.array(node_default_left, dtype=bool),
+        'elem_node': np.array(elem_node, dtype=np.intp),
+        'elem_right': np.array(elem_right, dtype=bool),
+        'group_start': np.array(group_start, dtype=np.intp),
+        'leaf_group_start': np.array(leaf_group_start, dtype=np.intp),
+        'group_bit': 1 << group_k,
+        'group_k': group_k,
+        'group_leaf': leaf_order[group_leaf],
+        'group_onehot': onehot,
+        'leaf_base': leaf_base[with_path],
+        'leaf_m': np.array([len(leaves[i][1]) for i in with_path], dtype=np.int64),
+        'table': np.concatenate(tables) if tables else np.zeros(0),
+        'expected_value': expected_value,
+    }
+
+
+class PathExplainer:
+    units = 'probability'
+    # path attribution แบบ Saabas ไม่ใช่ค่า SHAP
+    summary_label = '|contribution| เฉลี่ย (Saabas)'
+
+    # ค่าคาดหวังของทุก node (ไม่ใช่แค่ใบ) คำนวณครั้งเดียวต่อโมเดล แล้วใช้กับทุกคำขอ
+    def __init__(self, model, compiled):
+        node_value = []
+        for estimator in model.estimators_:
+            counts = estimator.tree_.value[:, 0, :]
+            node_value.append(counts[:, 1] / np.maximum(counts.sum(axis=1), np.finfo(np.float64).tiny))
+        self.compiled = compiled
+        self.node_value = np.concatenate(node_value)
+        self.n_features = model.n_features_in_
+        self.expected_value = float(self.node_value[compiled.roots].mean())
+
+    def contributions(self, X):
+        tree = self.compiled
+        X = np.asarray(X, dtype=tree.input_dtype)
+        n, width = len(X), self.n_features + 1
+        has_missing = np.isnan(X).any()
+        idx = np.broadcast_to(tree.roots, (n, tree.n_trees))
+        row_offsets = (np.arange(n) * width)[:, None]
+        feature_offsets = (np.arange(n) * self.n_features)[:, None]
+        flat_X = X.ravel()
+
+        out = np.zeros(n * width)
+        for _ in range(tree.depth):
+            split = tree.feature.take(idx)
+            x = flat_X.take(feature_offsets + split)
+            go_right = tree._go_right(x, tree.threshold.take(idx), tree.default_left.take(idx), has_missing)
+            nxt = tree.children.take(2 * idx + go_right)
+            # ใบชี้กลับมาที่ตัวเอง ผลต่างจึงเป็น 0 หลังถึงใบ
+            delta = self.node_value.take(nxt) - self.node_value.take(idx)
+            out += np.bincount((row_offsets + split).ravel(), weights=delta.ravel(), minlength=n * width)
+            idx = nxt
+
+        out = out.reshape(n, width) / tree.n_trees
+        out[:, -1] = self.expected_value
+        return out
+
+
+def _explainer_class(scorer, model):
+    name = type(model).__name__
+    if name == 'XGBClassifier':
+        return XGBExplainer
+    if name == 'RandomForestClassifier' and scorer.compiled is not None:
+        return PathExplainer
+    raise ValueError(f"ไม่รองรับการอธิบายโมเดลชนิด {name}")
+
+
+def build_explainer(scorer):
+    model = scorer.native_model()
+    cls = _explainer_class(scorer, model)
+    return cls(model) if cls is XGBExplainer else cls(model, scorer.compiled)
+
+
+# ชื่อค่าสรุปของ explainer ที่ใช้กับ scorer นี้ (ไม่ต้องสร้าง explainer จริง)
+def summary_label(scorer):
+    return _explainer_class(scorer, scorer.native_model()).summary_label
+
+
+_lock = threading.Lock()
+
+
+# explainer ถูกสร้างครั้งแรกที่ใช้แล้วเก็บไว้กับ scorer (registry สร้าง scorer ใหม่เมื่อไฟล์โมเดลเปลี่ยน)
+def get_explainer(scorer):
+    with _lock:
+        explainer = getattr(scorer, 'explainer', None)
+        if explainer is None:
+            explainer = scorer.explainer = build_explainer(scorer)
+        return explainer
+
+
+# รวม contribution ของคอลัมน์ one-hot กลับเป็น field เดิม เช่น education_PhD -> education
+def group_by_field(contributions, feature_names):
+    fields = [name.partition('_')[0] for name in feature_names]
+    frame = pd.DataFrame(contributions[:, :len(feature_names)], columns=feature_names)
+    return frame.T.groupby(fields, sort=False).sum().T
+
+
+# อธิบายผู้กู้หนึ่งราย คืนค่า Series {field: contribution} เรียงตามขนาด และ expected value
+def explain_one(scorer, record):
+    explainer = get_explainer(scorer)
+    with stage_span(scorer.name, 'encode'):
+        row, _ = scorer.encoder.encode_row(record)
+    with stage_span(scorer.name, 'explain'):
+        contributions = explainer.contributions(row)
+    count_rows(scorer.name, 1)
+    grouped = group_by_field(contributions, scorer.encoder.feature_names).iloc[0]
+    return grouped.reindex(grouped.abs().sort_values(ascending=False).index), explainer.expected_value
+
+
+# อธิบายทั้งตาราง ทีละ chunk คืนค่า DataFrame ของ contribution ต่อ field (index เดียวกับ df)
+def explain_frame(scorer, df, chunk_size=CHUNK_SIZE):
+    explainer = get_explainer(scorer)
+    with stage_span(scorer.name, 'encode'):
+        X, _ = scorer.encoder.encode_frame(df)
+    parts = []
+    with stage_span(scorer.name, 'explain'):
+        for start in range(0, len(X), chunk_size):
+            parts.append(explainer.contributions(X[start:start + chunk_size]))
+    count_rows(scorer.name, len(X))
+    contributions = np.concatenate(parts) if parts else np.zeros((0, len(scorer.encoder.feature_names) + 1))
+    grouped = group_by_field(contributions, scorer.encoder.feature_names)
+    grouped.index = df.index
+    return grouped
@@ -0,0 +1,159 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from core.artifacts import cached_sha256
+from core.mlp_numpy import NumpyMLP
+from core.scoring import LOAN_MODEL_FILES, MLP_MODEL_FILE, MLP_NUMPY_FILE, MODELS_DIR, SCALER_FILE, load_loan_model, model_path
+from core.trees import TreeEnsemble, compile_ensemble
+
+# โฮสต์น้ำหนักโมเดลเป็นไฟล์ .npy แล้วเปิดแบบ memory-mapped (MODEL_HOSTING=mmap)
+# ทุก process ที่เปิดไฟล์เดียวกันใช้หน้า memory ชุดเดียวกันใน page cache ของระบบ
+# เพิ่ม Streamlit/uvicorn worker จึงแทบไม่เพิ่มหน่วยความจำ และเริ่มได้โดยไม่ต้อง unpickle หรือ import XGBoost/sklearn
+#
+# แต่ละโมเดลเป็นโฟลเดอร์ models/hosted/<ชื่อ>-<sha256 ของไฟล์ต้นฉบับ>/ (ไฟล์ .npy + meta.json)
+# ไฟล์ต้นฉบับเปลี่ยน = ชื่อโฟลเดอร์ใหม่ process แรกที่ใช้จะสร้างให้เอง หรือสร้างล่วงหน้าด้วย python -m tools.host_models
+
+HOSTED_DIR = os.path.join(MODELS_DIR, 'hosted')
+HOSTING = os.environ.get('MODEL_HOSTING', '').lower()
+
+
+def hosting_enabled():
+    return HOSTING == 'mmap'
+
+
+def bundle_path(name, source_path):
+    return os.path.join(HOSTED_DIR, f'{name}-{cached_sha256(source_path)[:16]}')
+
+
+# เขียนลงโฟลเดอร์ชั่วคราวก่อนแล้ว rename ทีเดียว process อื่นจึงไม่เห็นไฟล์ที่เขียนไม่เสร็จ
+def write_bundle(directory, arrays, meta):
+    os.makedirs(os.path.dirname(directory), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(directory), prefix='.tmp-')
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(array))
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(dict(meta, arrays=sorted(arrays)), f)
+        os.chmod(tmp_dir, 0o755)
+        os.rename(tmp_dir, directory)
+    except OSError:
+        # process อื่นสร้างโฟลเดอร์เดียวกันเสร็จก่อน
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(directory, 'meta.json')):
+            raise
+
+
+def read_bundle_meta(directory):
+    with open(os.path.join(directory, 'meta.json')) as f:
+        return json.load(f)
+
+
+def read_bundle(directory):
+    meta = read_bundle_meta(directory)
+    arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in meta['arrays']}
+    return arrays, meta
+
+
+def export_tree_bundle(model, directory):
+    tree = compile_ensemble(model)
+    arrays = {
+        'feature': tree.feature, 'threshold': tree.threshold, 'left': tree.left, 'right': tree.right,
+        'default_left': tree.default_left, 'value': tree.value, 'roots': tree.roots, 'children': tree.children,
+    }
+    importances = getattr(model, 'feature_importances_', None)
+    if importances is not None:
+        arrays['feature_importances'] = np.asarray(importances, dtype=np.float64)
+    meta = {
+        'type': 'tree',
+        'kind': tree.kind,
+        'depth': int(tree.depth),
+        'base_margin': float(tree.base_margin),
+        'input_dtype': np.dtype(tree.input_dtype).name,
+        'feature_names': [str(n) for n in tree.feature_names_in_] if tree.feature_names_in_ is not None else None,
+    }
+    write_bundle(directory, arrays, meta)
+
+
+def read_tree_bundle(directory):
+    arrays, meta = read_bundle(directory)
+    tree = TreeEnsemble(
+        meta['kind'], arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'],
+        arrays['default_left'], arrays['value'], arrays['roots'], meta['depth'],
+        base_margin=meta['base_margin'], feature_names=meta['feature_names'],
+        input_dtype=np.dtype(meta['input_dtype']), children=arrays['children'])
+    if 'feature_importances' in arrays:
+        tree.feature_importances_ = arrays['feature_importances']
+    return tree
+
+
+def export_mlp_bundle(model, directory):
+    arrays = {}
+    for i, (kernel, bias) in enumerate(zip(model.kernels, model.biases)):
+        arrays[f'kernel_{i}'] = kernel
+        arrays[f'bias_{i}'] = bias
+    write_bundle(directory, arrays, dict(model.meta, type='mlp'))
+
+
+def read_mlp_bundle(directory):
+    arrays, meta = read_bundle(directory)
+    n_layers = len(meta['activations'])
+    kernels = [arrays[f'kernel_{i}'] for i in range(n_layers)]
+    biases = [arrays[f'bias_{i}'] for i in range(n_layers)]
+    return NumpyMLP(kernels, biases, meta['activations'], meta)
+
+
+# สร้าง bundle จาก .pkl ถ้ายังไม่มี คืนค่าโฟลเดอร์ของ bundle
+def ensure_loan_bundle(key):
+    directory = bundle_path(key, model_path(LOAN_MODEL_FILES[key]))
+    if not os.path.exists(directory):
+        export_tree_bundle(load_loan_model(key), directory)
+    return directory
+
+
+def _mlp_sources_match(meta):
+    sources = meta.get('source_sha256', {})
+    return (sources.get('model') == cached_sha256(model_path(MLP_MODEL_FILE))
+            and sources.get('scaler') == cached_sha256(model_path(SCALER_FILE)))
+
+
+# สร้างจาก mlp_model.npz (scaler รวมอยู่ใน layer แรกแล้ว) ที่ตรงกับ .h5 ปัจจุบันเท่านั้น
+# ตรวจทั้งตอนสร้างและตอนใช้ bundle ที่มีอยู่แล้ว (.h5/scaler อาจถูกเปลี่ยนโดยไม่ได้ export .npz ใหม่)
+def ensure_mlp_bundle():
+    npz_path = model_path(MLP_NUMPY_FILE)
+    directory = bundle_path('mlp', npz_path)
+    model = None
+    if os.path.exists(directory):
+        meta = read_bundle_meta(directory)
+    else:
+        model = NumpyMLP.load(npz_path)
+        meta = model.meta
+    if not _mlp_sources_match(meta):
+        raise ValueError(f"{MLP_NUMPY_FILE} ไม่ตรงกับ {MLP_MODEL_FILE} ให้รัน python -m tools.export_mlp ก่อน")
+    if model is not None:
+        export_mlp_bundle(model, directory)
+    return directory
+
+
+def hosted_loan_model(key):
+    return read_tree_bundle(ensure_loan_bundle(key))
+
+
+def hosted_mlp():
+    return read_mlp_bundle(ensure_mlp_bundle())
+
+
+# ลบ bundle ของไฟล์โมเดลเวอร์ชันเก่า (process ที่ยังเปิดอยู่ใช้ต่อได้จนกว่าจะปิด)
+def prune_bundles(keep):
+    if not os.path.isdir(HOSTED_DIR):
+        return []
+    keep = {os.path.basename(path) for path in keep}
+    removed = []
+    for entry in os.listdir(HOSTED_DIR):
+        if entry not in keep and not entry.startswith('.tmp-'):
+            shutil.rmtree(os.path.join(HOSTED_DIR, entry), ignore_errors=True)
+            removed.append(entry)
+    return removed
@@ -0,0 +1,203 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from core import array_input
+
+# ชื่อฟิลด์จากหน้าเว็บที่ไม่ตรงกับชื่อคอลัมน์ตอนเทรน
+FIELD_ALIASES = {
+    'employmentstatus': 'employmenttype',
+}
+
+# ค่าจากหน้าเว็บ -> ค่าใน dataset ต้นฉบับ (หลัง normalize แล้ว) เรียงตามลำดับที่ต้องการ
+VALUE_ALIASES = {
+    'education': {'graduate': ['bachelors'], 'postgraduate': ['masters', 'phd']},
+}
+
+# หมวดหมู่ที่ get_dummies(drop_first=True) ตัดทิ้งไป (ทุกคอลัมน์เป็น 0)
+DROPPED_CATEGORIES = {
+    'education': "Bachelor's",
+    'employmenttype': 'Full-time',
+    'maritalstatus': 'Divorced',
+    'hasmortgage': 'No',
+    'hasdependents': 'No',
+    'loanpurpose': 'Auto',
+    'hascosigner': 'No',
+}
+
+CHUNK_SIZE = 10000
+
+
+# ทำให้ค่าหมวดหมู่เทียบกันได้ เช่น "High School" == "highschool", "Full-time" == "fulltime"
+def normalize_category(value):
+    return re.sub(r'[^0-9a-z]', '', str(value).lower())
+
+
+def normalize_field(name):
+    name = str(name).strip().lower()
+    return FIELD_ALIASES.get(name, name)
+
+
+# ดึงรายชื่อคอลัมน์จากโมเดล ถ้าไม่มีให้ดูจากโมเดลสำรอง
+def get_feature_names(model, fallback=None):
+    for m in (model, fallback):
+        if m is not None and hasattr(m, 'feature_names_in_'):
+            return [str(name) for name in m.feature_names_in_]
+    return None
+
+
+# ค่าตัวเลขที่แปลงไม่ได้ (รวมถึง None/NaN) ถือเป็นข้อมูลผิดพลาด ไม่แทนด้วย 0 หรือ NaN แบบเงียบๆ
+def numeric_value(field, value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"ค่า '{value}' ของ {field} ไม่ใช่ตัวเลข")
+    if not np.isfinite(number):
+        raise ValueError(f"ค่า '{value}' ของ {field} ไม่ใช่ตัวเลข")
+    return number
+
+
+# แผนการแปลงข้อมูลที่คำนวณไว้ล่วงหน้าจาก feature_names_in_ ของโมเดล
+# (field, ค่า) -> ตำแหน่งคอลัมน์ โดย -1 หมายถึงหมวดหมู่ฐานที่ไม่มีคอลัมน์ของตัวเอง
+class LoanEncoder:
+    def __init__(self, feature_names):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.numeric = {}
+        self.categorical = {}
+
+        for j, name in enumerate(self.feature_names):
+            field, _, category = name.partition('_')
+            if category:
+                self.categorical.setdefault(field, {})[normalize_category(category)] = j
+            else:
+                self.numeric[name] = j
+
+        for field, category in DROPPED_CATEGORIES.items():
+            if field in self.categorical:
+                self.categorical[field].setdefault(normalize_category(category), -1)
+
+        for field, aliases in VALUE_ALIASES.items():
+            lookup = self.categorical.get(field)
+            if lookup is None:
+                continue
+            for value, targets in aliases.items():
+                for target in targets:
+                    if target in lookup:
+                        lookup.setdefault(value, lookup[target])
+                        break
+
+    # ฟิลด์ตัวเลขที่ไม่ได้ส่งมาไม่แทนด้วย 0 (โมเดลไม่เคยเห็นค่าแบบนั้น)
+    def check_numeric(self, fields):
+        fields = {normalize_field(field) for field in fields}
+        missing = [field for field in self.numeric if field not in fields]
+        if missing:
+            raise ValueError(f"ข้อมูลไม่ครบ: {', '.join(missing)}")
+
+    # แปลงข้อมูลผู้กู้หนึ่งราย คืนค่า (แถวข้อมูล, รายการ (field, ค่า) ที่ไม่รู้จัก)
+    # ฟิลด์ตัวเลขต้องมีครบและเป็นตัวเลข ไม่เช่นนั้น raise ValueError
+    def encode_row(self, input_data):
+        row = np.zeros((1, self.n_features), dtype=np.float64)
+        unknown = []
+        self.check_numeric(input_data)
+        for field, value in input_data.items():
+            field = normalize_field(field)
+            j = self.numeric.get(field)
+            if j is not None:
+                row[0, j] = numeric_value(field, value)
+                continue
+            lookup = self.categorical.get(field)
+            if lookup is None or value is None:
+                continue
+            j = lookup.get(normalize_category(value))
+            if j is None:
+                unknown.append((field, value))
+            elif j >= 0:
+                row[0, j] = 1
+        return row, unknown
+
+    # แปลงข้อมูลทั้งตารางในครั้งเดียว คืนค่า (matrix, {field: [ค่าที่ไม่รู้จัก]})
+    # คอลัมน์ตัวเลขที่ขาดหรือมีค่าที่ไม่ใช่ตัวเลข (รวมถึงช่องว่าง) raise ValueError
+    def encode_frame(self, df):
+        out = np.zeros((len(df), self.n_features), dtype=np.float64)
+        unknown = {}
+        rows = np.arange(len(df))
+        self.check_numeric(df.columns)
+        for column in df.columns:
+            field = normalize_field(column)
+            j = self.numeric.get(field)
+            if j is not None:
+                values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+                bad = ~np.isfinite(values)
+                if bad.any():
+                    examples = ', '.join(f"'{v}'" for v in pd.unique(df[column][bad])[:5])
+                    raise ValueError(f"คอลัมน์ {column} มีค่าที่ไม่ใช่ตัวเลข {int(bad.sum()):,} แถว เช่น {examples}")
+                out[:, j] = values
+                continue
+            lookup = self.categorical.get(field)
+            if lookup is None:
+                continue
+
+            # แปลงเฉพาะค่าที่ไม่ซ้ำกันแล้วกระจายกลับด้วย index
+            codes, uniques = pd.factorize(df[column])
+            targets = np.array([lookup.get(normalize_category(v), -2) for v in uniques] + [-1], dtype=np.intp)
+            cols = targets[codes]
+            hit = cols >= 0
+            out[rows[hit], cols[hit]] = 1
+
+            missing = [uniques[i] for i in np.flatnonzero(targets[:-1] == -2)]
+            if missing:
+                unknown[field] = missing
+        return out, unknown
+
+
+# สร้างข้อมูลผู้กู้สมมติตาม schema ของชุดข้อมูล Loan Default สำหรับทดสอบและ benchmark
+def synthetic_applicants(n, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'age': rng.integers(18, 70, n),
+        'income': rng.integers(15000, 150000, n),
+        'loanamount': rng.integers(5000, 250000, n),
+        'creditscore': rng.integers(300, 850, n),
+        'monthsemployed': rng.integers(0, 120, n),
+        'numcreditlines': rng.integers(1, 5, n),
+        'interestrate': rng.uniform(2, 25, n).round(2),
+        'loanterm': rng.choice([12, 24, 36, 48, 60], n),
+        'dtiratio': rng.uniform(0.1, 0.9, n).round(2),
+        'education': rng.choice(["Bachelor's", 'High School', "Master's", 'PhD'], n),
+        'employmenttype': rng.choice(['Full-time', 'Part-time', 'Self-employed', 'Unemployed'], n),
+        'maritalstatus': rng.choice(['Divorced', 'Married', 'Single'], n),
+        'hasmortgage': rng.choice(['Yes', 'No'], n),
+        'hasdependents': rng.choice(['Yes', 'No'], n),
+        'loanpurpose': rng.choice(['Auto', 'Business', 'Education', 'Home', 'Other'], n),
+        'hascosigner': rng.choice(['Yes', 'No'], n),
+    })
+
+
+# ทำนายความน่าจะเป็นทีละ chunk เพื่อไม่ให้ใช้หน่วยความจำมากเกินไป
+def score_matrix(model, X, chunk_size=CHUNK_SIZE):
+    probs = np.empty(len(X), dtype=np.float64)
+    with array_input():
+        for start in range(0, len(X), chunk_size):
+            probs[start:start + chunk_size] = model.predict_proba(X[start:start + chunk_size])[:, 1]
+    return probs
+
+
+def risk_levels(probs):
+    return np.select([probs > 0.7, probs > 0.3], ['สูง', 'ปานกลาง'], default='ต่ำ')
+
+
+# ต่อผลการทำนายท้ายตารางเดิม
+def frame_result(df, probs):
+    result = df.copy()
+    result['prediction'] = (probs > 0.5).astype(np.int8)
+    result['default_probability'] = probs
+    result['risk_level'] = risk_levels(probs)
+    return result
+
+
+# ทำนายทั้งไฟล์แล้วต่อผลลัพธ์ท้ายตารางเดิม คืนค่า (ตารางผลลัพธ์, ค่าที่ไม่รู้จัก)
+def score_frame(model, df, encoder, chunk_size=CHUNK_SIZE):
+    X, unknown = encoder.encode_frame(df)
+    return frame_result(df, score_matrix(model, X, chunk_size)), unknown
@@ -0,0 +1,207 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# ตัวเก็บ metrics ภายใน process (counter / histogram) สำหรับหน้า diagnostics และ /metrics ของ serve.py
+# histogram เก็บทั้ง bucket สะสมแบบ Prometheus และค่าล่าสุดจำนวนหนึ่งเพื่อคำนวณ percentile แบบ rolling
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WINDOW_SIZE = 2048
+# ปิดการจับเวลาได้ด้วย METRICS_ENABLED=0 (ตัวนับและ export ยังใช้ได้ตามปกติ)
+ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    items = list(key) + list(extra)
+    if not items:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + '}'
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS, window=WINDOW_SIZE):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        now = time.monotonic()
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+            self._recent.append((now, value))
+
+    # percentile ของค่าล่าสุด (เฉพาะ window_s วินาทีล่าสุดถ้าระบุ)
+    def percentiles(self, qs=(50, 95, 99), window_s=None):
+        with self._lock:
+            recent = list(self._recent)
+        if window_s is not None:
+            cutoff = time.monotonic() - window_s
+            recent = [item for item in recent if item[0] >= cutoff]
+        if not recent:
+            return None
+        values = np.fromiter((value for _, value in recent), dtype=np.float64, count=len(recent))
+        return {'n': len(values), **{f'p{q}': float(np.percentile(values, q)) for q in qs}}
+
+
+class _Span:
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class MetricsRegistry:
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self._metrics = {}
+        self._lookup = {}
+        self._help = {}
+        self._types = {}
+        self._lock = threading.Lock()
+
+    # เรียกบ่อยใน hot path จึงค้นจาก label ตามลำดับที่ส่งมาก่อน ไม่ต้องเรียงทุกครั้ง
+    def _get(self, kind, factory, name, help, labels):
+        fast_key = (name, tuple(labels.items()))
+        metric = self._lookup.get(fast_key)
+        if metric is not None:
+            return metric
+        with self._lock:
+            if self._types.setdefault(name, kind) != kind:
+                raise ValueError(f"metric {name} ถูกใช้เป็น {self._types[name]} แล้ว")
+            if help:
+                self._help.setdefault(name, help)
+            metric = self._metrics.setdefault((name, _label_key(labels)), factory())
+            self._lookup[fast_key] = metric
+        return metric
+
+    def counter(self, name, help='', **labels):
+        return self._get('counter', Counter, name, help, labels)
+
+    def histogram(self, name, help='', **labels):
+        return self._get('histogram', Histogram, name, help, labels)
+
+    # จับเวลาช่วงโค้ดแล้วบันทึกลง histogram (หน่วยวินาที)
+    #   with metrics.span('prediction_stage_seconds', model='xgb', stage='inference'): ...
+    def span(self, name, help='', **labels):
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self.histogram(name, help, **labels))
+
+    def clear(self):
+        with self._lock:
+            self._metrics.clear()
+            self._lookup.clear()
+
+    # สำเนารายการ series ที่เรียงแล้ว (thread อื่นอาจเพิ่ม series ใหม่ระหว่างที่วนอ่านอยู่)
+    def _snapshot(self):
+        with self._lock:
+            return sorted(self._metrics.items()), dict(self._help), dict(self._types)
+
+    # แถวละ series ของ histogram พร้อม percentile แบบ rolling (สำหรับแสดงเป็นตาราง)
+    def summary(self, name=None, window_s=None):
+        rows = []
+        for (metric_name, key), metric in self._snapshot()[0]:
+            if not isinstance(metric, Histogram) or name not in (None, metric_name):
+                continue
+            stats = metric.percentiles(window_s=window_s)
+            if stats is None:
+                continue
+            with metric._lock:
+                total, count = metric.sum, metric.count
+            rows.append({
+                'metric': metric_name,
+                **dict(key),
+                'count': count,
+                'recent': stats['n'],
+                'p50_ms': stats['p50'] * 1000,
+                'p95_ms': stats['p95'] * 1000,
+                'p99_ms': stats['p99'] * 1000,
+                'mean_ms': total / count * 1000,
+            })
+        return rows
+
+    def counters(self):
+        return [
+            {'metric': name, **dict(key), 'value': metric.value}
+            for (name, key), metric in self._snapshot()[0]
+            if isinstance(metric, Counter)
+        ]
+
+    # รูปแบบ text exposition ของ Prometheus
+    def export_prometheus(self):
+        items, help, types = self._snapshot()
+        by_name = {}
+        for (name, key), metric in items:
+            by_name.setdefault(name, []).append((key, metric))
+
+        lines = []
+        for name, series in by_name.items():
+            if name in help:
+                lines.append(f'# HELP {name} {help[name]}')
+            lines.append(f'# TYPE {name} {types[name]}')
+            for key, metric in series:
+                if isinstance(metric, Counter):
+                    lines.append(f'{name}{_format_labels(key)} {metric.value:g}')
+                    continue
+                with metric._lock:
+                    counts, total, count = list(metric.counts), metric.sum, metric.count
+                cumulative = 0
+                for bound, n in zip(metric.buckets + (float('inf'),), counts):
+                    cumulative += n
+                    le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    lines.append(f'{name}_bucket{_format_labels(key, [("le", le)])} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(key)} {total:.9g}')
+                lines.append(f'{name}_count{_format_labels(key)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+_default = MetricsRegistry()
+
+
+def get_metrics():
+    return _default
@@ -0,0 +1,103 @@
+import json
+
+import numpy as np
+
+from core import file_sha256
+
+# เครื่องทำนาย MLP ด้วย NumPy ล้วน ไม่ต้อง import TensorFlow ตอนให้บริการ
+# น้ำหนักของ Dense layer ถูกดึงจาก mlp_model.h5 ครั้งเดียวแล้วเก็บเป็น .npz
+# โดยรวม mean/scale ของ scaler.pkl เข้าไปใน layer แรกแล้ว จึงรับข้อมูลดิบได้เลย
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'tanh': np.tanh,
+}
+
+
+# อ่าน Dense layer ตามลำดับใน model_config ของไฟล์ .h5 คืนค่า [(kernel, bias, activation)]
+def read_dense_layers(h5_path):
+    import h5py
+
+    layers = []
+    with h5py.File(h5_path, 'r') as f:
+        config = f.attrs['model_config']
+        if isinstance(config, bytes):
+            config = config.decode('utf-8')
+        config = json.loads(config)
+
+        for layer in config['config']['layers']:
+            if layer['class_name'] == 'InputLayer':
+                continue
+            if layer['class_name'] != 'Dense':
+                raise ValueError(f"ไม่รองรับ layer ชนิด {layer['class_name']}")
+
+            weights = {}
+
+            def collect(key, obj):
+                if isinstance(obj, h5py.Dataset):
+                    weights[key.rsplit('/', 1)[-1].split(':')[0]] = obj[()]
+
+            f['model_weights'][layer['config']['name']].visititems(collect)
+            bias = weights.get('bias')
+            if bias is None:
+                bias = np.zeros(weights['kernel'].shape[1], dtype=weights['kernel'].dtype)
+            layers.append((weights['kernel'], bias, layer['config']['activation']))
+    return layers
+
+
+# รวม StandardScaler เข้าไปใน layer แรก: ((x - mean) / scale) @ W + b = x @ (W / scale) + (b - (mean / scale) @ W)
+def fold_scaler(layers, scaler):
+    kernel, bias, activation = layers[0]
+    mean = np.asarray(scaler.mean_, dtype=np.float64)
+    scale = np.asarray(scaler.scale_, dtype=np.float64)
+    kernel = kernel.astype(np.float64)
+    folded_kernel = kernel / scale[:, None]
+    folded_bias = bias.astype(np.float64) - (mean / scale) @ kernel
+    return [(folded_kernel, folded_bias, activation)] + list(layers[1:])
+
+
+def export_mlp(h5_path, scaler_path, npz_path):
+    import joblib
+
+    layers = fold_scaler(read_dense_layers(h5_path), joblib.load(scaler_path))
+    arrays = {}
+    for i, (kernel, bias, _) in enumerate(layers):
+        arrays[f'kernel_{i}'] = kernel.astype(np.float32)
+        arrays[f'bias_{i}'] = bias.astype(np.float32)
+    meta = {
+        'activations': [activation for _, _, activation in layers],
+        'source_sha256': {'model': file_sha256(h5_path), 'scaler': file_sha256(scaler_path)},
+    }
+    np.savez(npz_path, meta=np.array(json.dumps(meta)), **arrays)
+    return meta
+
+
+class NumpyMLP:
+    def __init__(self, kernels, biases, activations, meta=None):
+        self.kernels = kernels
+        self.biases = biases
+        self.activations = [ACTIVATIONS[name] for name in activations]
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, npz_path):
+        with np.load(npz_path) as data:
+            meta = json.loads(str(data['meta']))
+            n_layers = len(meta['activations'])
+            kernels = [data[f'kernel_{i}'] for i in range(n_layers)]
+            biases = [data[f'bias_{i}'] for i in range(n_layers)]
+        return cls(kernels, biases, meta['activations'], meta)
+
+    # ตรวจว่า .npz ถูกสร้างจากไฟล์ .h5 และ scaler ชุดปัจจุบันหรือไม่
+    def matches(self, h5_path, scaler_path):
+        sources = self.meta.get('source_sha256', {})
+        return sources.get('model') == file_sha256(h5_path) and sources.get('scaler') == file_sha256(scaler_path)
+
+    # รับข้อมูลดิบ (ยังไม่ scale) คืนค่า shape (n, units) เหมือน keras model.predict
+    def predict(self, X, verbose=0):
+        h = np.asarray(X, dtype=np.float32)
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            h = activation(h @ kernel + bias)
+        return h
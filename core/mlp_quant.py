@@ -0,0 +1,123 @@
+import json
+
+import numpy as np
+
+from core import file_sha256
+from core.mlp_numpy import ACTIVATIONS, NumpyMLP
+
+# MLP แบบลดความละเอียด (int8 / float16) สร้างจากน้ำหนักใน mlp_model.npz สำหรับงาน batch ขนาดใหญ่
+#
+# int8: ค่าที่เข้าแต่ละ layer ถูก quantize ต่อคอลัมน์ด้วย scale จากการ calibrate บนข้อมูลจริง
+#       scale ของ input ถูกคูณเข้าไปใน kernel ก่อน แล้ว kernel ถูก quantize ต่อ unit ขาออก
+#       ผลคูณเป็นจำนวนเต็ม (|ผลรวม| < 2^24) จึงคำนวณด้วย float32 BLAS ได้ผลเท่ากับ int8 GEMM ทุกบิต
+# float16: เก็บน้ำหนักและค่าระหว่าง layer เป็น float16 แต่สะสมผลคูณด้วย float32
+#
+# NumPy ไม่มี GEMM สำหรับ int8/float16 โดยตรง ข้อดีหลักจึงเป็นขนาดข้อมูลที่ต้องอ่าน/เก็บต่อแถว
+# ดู python -m tools.quantize_mlp สำหรับรายงานความแม่นยำและความเร็วเทียบกับ float32
+
+PRECISIONS = ('int8', 'float16')
+INT8_MAX = 127
+# percentile ของ |ค่า| ที่ใช้เป็นขอบเขตตอน calibrate (ตัดค่าผิดปกติส่วนน้อยทิ้ง)
+CALIBRATION_PERCENTILE = 99.99
+
+
+# ค่าที่เข้าแต่ละ layer บนข้อมูล calibration (ใช้โมเดล float32 เป็นตัวอ้างอิง)
+def layer_inputs(model, X):
+    inputs = []
+    h = np.asarray(X, dtype=np.float32)
+    for kernel, bias, activation in zip(model.kernels, model.biases, model.activations):
+        inputs.append(h)
+        h = activation(h @ kernel + bias)
+    return inputs
+
+
+def calibrate_int8(model, X_calib, percentile=CALIBRATION_PERCENTILE):
+    layers = []
+    for h, kernel, bias in zip(layer_inputs(model, X_calib), model.kernels, model.biases):
+        bound = np.percentile(np.abs(h), percentile, axis=0)
+        input_scale = np.where(bound > 0, bound / INT8_MAX, 1.0).astype(np.float32)
+
+        folded = kernel.astype(np.float64) * input_scale[:, None]
+        weight_bound = np.abs(folded).max(axis=0)
+        weight_scale = np.where(weight_bound > 0, weight_bound / INT8_MAX, 1.0)
+        qkernel = np.clip(np.round(folded / weight_scale), -INT8_MAX, INT8_MAX).astype(np.int8)
+        layers.append({
+            'input_scale': input_scale,
+            'kernel': qkernel,
+            'weight_scale': weight_scale.astype(np.float32),
+            'bias': bias.astype(np.float32),
+        })
+    return layers
+
+
+class QuantizedMLP:
+    def __init__(self, precision, layers, activations, meta=None):
+        if precision not in PRECISIONS:
+            raise ValueError(f"ไม่รองรับความละเอียด {precision}")
+        self.precision = precision
+        self.layers = layers
+        self.activations = [ACTIVATIONS[name] for name in activations]
+        self.meta = meta or {}
+        # kernel ในรูป float32 สำหรับคำนวณ (ค่าเป็นจำนวนเต็ม/ค่า float16 เดิมทุกตัว)
+        self._compute_kernels = [layer['kernel'].astype(np.float32) for layer in layers]
+        if precision == 'int8':
+            self._inverse_scales = [(1.0 / layer['input_scale']).astype(np.float32) for layer in layers]
+
+    @classmethod
+    def from_numpy(cls, model, precision, X_calib=None):
+        if precision == 'int8':
+            if X_calib is None:
+                raise ValueError("int8 ต้องมีข้อมูลสำหรับ calibrate")
+            layers = calibrate_int8(model, X_calib)
+        else:
+            layers = [{'kernel': k.astype(np.float16), 'bias': b.astype(np.float16)}
+                      for k, b in zip(model.kernels, model.biases)]
+        meta = dict(model.meta, precision=precision)
+        if X_calib is not None:
+            meta['calibration_rows'] = int(len(X_calib))
+        return cls(precision, layers, model.meta['activations'], meta)
+
+    def save(self, npz_path, source_npz):
+        arrays = {}
+        for i, layer in enumerate(self.layers):
+            for name, value in layer.items():
+                arrays[f'{name}_{i}'] = value
+        meta = dict(self.meta, quantized_from=file_sha256(source_npz))
+        np.savez(npz_path, meta=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def load(cls, npz_path):
+        with np.load(npz_path) as data:
+            meta = json.loads(str(data['meta']))
+            names = ('input_scale', 'kernel', 'weight_scale', 'bias')
+            layers = [
+                {name: data[f'{name}_{i}'] for name in names if f'{name}_{i}' in data}
+                for i in range(len(meta['activations']))
+            ]
+        return cls(meta['precision'], layers, meta['activations'], meta)
+
+    # ตรวจว่าสร้างจาก mlp_model.npz ปัจจุบัน
+    def matches(self, source_npz):
+        return self.meta.get('quantized_from') == file_sha256(source_npz)
+
+    def nbytes(self):
+        return sum(value.nbytes for layer in self.layers for value in layer.values())
+
+    def predict(self, X, verbose=0):
+        h = np.asarray(X, dtype=np.float32)
+        if self.precision == 'float16':
+            for layer, kernel, activation in zip(self.layers, self._compute_kernels, self.activations):
+                h = activation(h.astype(np.float16).astype(np.float32) @ kernel + layer['bias']).astype(np.float16)
+            return h.astype(np.float32)
+
+        # ค่า int8 ถูกเก็บในรูป float32 ที่เป็นจำนวนเต็ม (ไม่ต้องแปลงชนิดไปกลับ)
+        for layer, kernel, inverse, activation in zip(self.layers, self._compute_kernels,
+                                                       self._inverse_scales, self.activations):
+            q = np.multiply(h, inverse)
+            np.rint(q, out=q)
+            np.clip(q, -INT8_MAX, INT8_MAX, out=q)
+            h = q @ kernel
+            h *= layer['weight_scale']
+            h += layer['bias']
+            h = activation(h)
+        return h
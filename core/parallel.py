@@ -0,0 +1,163 @@
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core import diabetes
+from core.loan import CHUNK_SIZE, frame_result, score_matrix
+from core.registry import get_registry
+from core.scoring import DiabetesScorer, count_rows, stage_span
+
+# ทำนาย batch ขนาดใหญ่ด้วยหลาย process: แบ่งแถวเป็นช่วงๆ ให้ worker แต่ละตัวทำนาย
+# worker โหลดโมเดลจาก models/ ครั้งเดียวตอนเริ่ม (ผ่าน registry ของ process ตัวเอง)
+# matrix ที่ encode แล้วและผลลัพธ์อยู่ใน shared memory ส่งแค่ชื่อ block กับช่วงแถว ไม่ pickle ข้อมูล
+# worker แต่ละตัวใช้ 1 thread (BLAS/XGBoost/RF) เพื่อไม่แย่ง core กัน
+
+WORKERS = int(os.environ.get('SCORING_WORKERS', 0)) or os.cpu_count() or 1
+# batch ที่เล็กกว่านี้ทำนายใน process เดิมเร็วกว่า (ไม่คุ้มค่าส่งงาน)
+MIN_PARALLEL_ROWS = 20000
+# จำนวนช่วงต่อ worker (ช่วงเล็กลงช่วยกระจายงานเมื่อบาง worker ช้ากว่า)
+SHARDS_PER_WORKER = 4
+
+_worker_scorer = None
+
+
+def _init_worker(name):
+    global _worker_scorer
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(1)
+    _worker_scorer = get_registry().get(name)
+    model = getattr(_worker_scorer, 'model', None)
+    if hasattr(model, 'get_booster'):
+        model.get_booster().set_param({'nthread': 1})
+    elif hasattr(model, 'n_jobs'):
+        model.n_jobs = 1
+
+
+def _score_shard(task):
+    in_name, out_name, shape, dtype, start, stop = task
+    # เปิด block ที่ process หลักสร้างไว้ (process หลักเป็นผู้ลบ)
+    source = shared_memory.SharedMemory(name=in_name)
+    target = shared_memory.SharedMemory(name=out_name)
+    try:
+        X = np.ndarray(shape, dtype=dtype, buffer=source.buf)[start:stop]
+        out = np.ndarray((shape[0],), dtype=np.float64, buffer=target.buf)
+        out[start:stop] = _predict_matrix(_worker_scorer, X)
+    finally:
+        source.close()
+        target.close()
+    return start, stop
+
+
+def _predict_matrix(scorer, X):
+    if isinstance(scorer, DiabetesScorer):
+        return scorer.predict_proba(X)
+    return score_matrix(scorer.predictor(min(len(X), CHUNK_SIZE)), X)
+
+
+def shard_bounds(n_rows, n_shards):
+    edges = np.linspace(0, n_rows, n_shards + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+# ตัวทำนายแบบหลาย process สำหรับโมเดลหนึ่งตัวใน registry (xgb, rf, mlp, mlp_int8 ...)
+# encode ใน process หลักด้วย scorer เดิม แล้วกระจายเฉพาะขั้นทำนายไปยัง worker
+class ParallelScorer:
+    def __init__(self, name, workers=WORKERS, min_rows=MIN_PARALLEL_ROWS):
+        self.name = name
+        self.workers = workers
+        self.min_rows = min_rows
+        self.scorer = get_registry().get(name)
+        self.version = get_registry().version(name)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: ไม่ fork process ที่มี thread อื่นทำงานอยู่ (Streamlit, micro-batcher)
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=mp.get_context('spawn'),
+                                                 initializer=_init_worker, initargs=(self.name,))
+            return self._pool
+
+    # เริ่ม worker และโหลดโมเดลล่วงหน้า
+    def warm_up(self):
+        pool = self.pool()
+        list(pool.map(int, range(self.workers)))
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    # matrix ที่ encode แล้ว -> ความน่าจะเป็น เรียงตามแถวเดิม
+    # on_shard(start, stop) ถูกเรียกทุกครั้งที่ช่วงแถวหนึ่งทำนายเสร็จ (ใช้ส่งข้อมูลให้ตัวติดตาม drift)
+    def predict_proba(self, X, on_shard=None):
+        if len(X) < self.min_rows or self.workers <= 1:
+            probs = _predict_matrix(self.scorer, X)
+            if on_shard is not None:
+                on_shard(0, len(X))
+            return probs
+
+        X = np.ascontiguousarray(X)
+        source = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+        target = shared_memory.SharedMemory(create=True, size=len(X) * 8)
+        try:
+            np.ndarray(X.shape, dtype=X.dtype, buffer=source.buf)[:] = X
+            tasks = [(source.name, target.name, X.shape, X.dtype.str, start, stop)
+                     for start, stop in shard_bounds(len(X), self.workers * SHARDS_PER_WORKER)]
+            with stage_span(self.name, 'parallel_inference'):
+                for start, stop in self.pool().map(_score_shard, tasks):
+                    if on_shard is not None:
+                        on_shard(start, stop)
+            probs = np.ndarray((len(X),), dtype=np.float64, buffer=target.buf).copy()
+        finally:
+            source.close()
+            source.unlink()
+            target.close()
+            target.unlink()
+        count_rows(self.name, len(probs))
+        return probs
+
+    # คืนค่ารูปแบบเดียวกับ predict_frame ของ scorer เดิม และส่งข้อมูลให้ตัวติดตาม drift แบบเดียวกัน
+    def predict_frame(self, df, chunk_size=None):
+        scorer = self.scorer
+        with stage_span(self.name, 'total'):
+            if isinstance(scorer, DiabetesScorer):
+                with stage_span(self.name, 'encode'):
+                    X = diabetes.encode_frame(df)
+                return self.predict_proba(X, lambda start, stop: scorer.observe(X[start:stop]))
+            with stage_span(self.name, 'encode'):
+                X, unknown = scorer.encoder.encode_frame(df)
+            return frame_result(df, self.predict_proba(X, self._observe_frame(df))), unknown
+
+    def _observe_frame(self, df):
+        monitor = self.scorer.monitor
+        if monitor is None:
+            return None
+
+        def observe(start, stop):
+            with stage_span(self.name, 'monitor'):
+                monitor.observe_frame(df.iloc[start:stop])
+        return observe
+
+
+_scorers = {}
+_scorers_lock = threading.Lock()
+
+
+# pool ต่อโมเดลใช้ร่วมกันทั้ง process สร้างใหม่เมื่อไฟล์โมเดลเปลี่ยน (worker จะได้โหลดเวอร์ชันใหม่)
+def get_parallel_scorer(name, workers=WORKERS):
+    with _scorers_lock:
+        current = _scorers.get(name)
+        if current is not None and (current.version != get_registry().version(name) or current.workers != workers):
+            current.close()
+            current = None
+        if current is None:
+            current = _scorers[name] = ParallelScorer(name, workers)
+        return current
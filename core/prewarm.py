@@ -0,0 +1,68 @@
+import importlib
+import os
+import threading
+import time
+
+# เตรียม module หนักและโมเดลไว้ล่วงหน้าใน thread เบื้องหลัง หลังจากหน้าแรกแสดงผลแล้ว
+# หน้าอื่นที่ผู้ใช้เปิดต่อจะไม่ต้องรอ import/โหลดโมเดลครั้งแรก (STARTUP_PREWARM=0 เพื่อปิด)
+# ทำครั้งเดียวต่อ process ไม่ว่าจะเรียกจากกี่หน้า
+
+ENABLED = os.environ.get('STARTUP_PREWARM', '1') != '0'
+MODULES = [
+    'plotly.express',
+    'plotly.graph_objects',
+    'core.registry',
+    'core.sensitivity',
+    'core.explain',
+    'core.evaluation',
+    'sklearn.metrics',
+]
+
+_lock = threading.Lock()
+_thread = None
+_status = {'modules': {}, 'models': {}, 'started': None, 'finished': None}
+
+
+def _run(load_models):
+    _status['started'] = time.time()
+    for name in MODULES:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            _status['modules'][name] = time.perf_counter() - started
+        except ImportError as e:
+            _status['modules'][name] = str(e)
+
+    if load_models:
+        from core.registry import get_registry
+
+        registry = get_registry()
+        for name in registry.names():
+            started = time.perf_counter()
+            loaded = registry.try_get(name) is not None
+            _status['models'][name] = time.perf_counter() - started if loaded else None
+    _status['finished'] = time.time()
+
+
+# เรียกท้ายสคริปต์ของหน้า (หลังส่งเนื้อหาหน้าแรกให้ browser แล้ว)
+def prewarm(load_models=True):
+    global _thread
+    if not ENABLED:
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, args=(load_models,), name='prewarm', daemon=True)
+            _thread.start()
+        return _thread
+
+
+# เวลาที่ใช้ import แต่ละ module / โหลดแต่ละโมเดล (None = โหลดไม่สำเร็จ)
+def status():
+    return {
+        'enabled': ENABLED,
+        'running': _thread is not None and _thread.is_alive(),
+        'modules': dict(_status['modules']),
+        'models': dict(_status['models']),
+        'started': _status['started'],
+        'finished': _status['finished'],
+    }
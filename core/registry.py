@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from core.cache import PredictionCache
+from core.drift import DRIFT_MONITORING, get_drift_monitor
+from core.hosting import hosted_loan_model, hosted_mlp, hosting_enabled
+from core.metrics import get_metrics
+from core.scoring import (
+    LOAN_MODEL_FILES, MLP_MODEL_FILE, MLP_NUMPY_FILE, MLP_QUANT_FILES, SCALER_FILE,
+    DiabetesScorer, LoanScorer, load_diabetes_model, load_loan_model, load_quantized_mlp, model_path,
+)
+
+metrics = get_metrics()
+
+# หน่วยความจำสูงสุดที่ให้โมเดลใช้รวมกันต่อ process (ประมาณจากขนาดไฟล์ artifact) 0 = ไม่จำกัด
+MEMORY_BUDGET_MB = float(os.environ.get('MODEL_MEMORY_BUDGET_MB', 0))
+
+
+class ModelLoadError(RuntimeError):
+    pass
+
+
+# สถานะการเปลี่ยนแปลงของไฟล์ artifact ใช้ตรวจว่าต้องโหลดใหม่หรือไม่
+def artifact_signature(paths):
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+class _Entry:
+    def __init__(self, name, loader, paths):
+        self.name = name
+        self.loader = loader
+        self.paths = paths
+        self.lock = threading.Lock()
+        self.value = None
+        self.error = None
+        self.signature = None
+        self.load_time = None
+        self.size_bytes = 0
+        self.loads = 0
+        self.hits = 0
+
+
+# โหลดโมเดลแต่ละตัวเมื่อถูกใช้ครั้งแรก แล้วเก็บไว้ต่อ process
+# โมเดลที่โหลดไม่ได้จะไม่กระทบตัวอื่น และจะลองโหลดใหม่เมื่อไฟล์ artifact เปลี่ยน
+# ถ้าเกินงบหน่วยความจำจะคืนโมเดลที่ไม่ได้ใช้นานที่สุดก่อน (LRU)
+# ถ้ามี prediction_cache จะผูกกับโมเดลทุกตัวที่โหลด และล้างผลเก่าเมื่อ artifact เปลี่ยน
+# drift_monitoring=True ข้อมูลที่เข้ามาทำนายจะถูกนับเข้าตัวติดตาม drift ของชุดข้อมูลนั้น (core.drift)
+class ModelRegistry:
+    def __init__(self, memory_budget_mb=MEMORY_BUDGET_MB, prediction_cache=None, drift_monitoring=False):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.prediction_cache = prediction_cache
+        self.drift_monitoring = drift_monitoring
+        self._entries = {}
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, paths):
+        self._entries[name] = _Entry(name, loader, list(paths))
+
+    def names(self):
+        return list(self._entries)
+
+    def version(self, name):
+        return artifact_signature(self._entries[name].paths)
+
+    def get(self, name):
+        entry = self._entries[name]
+        signature = artifact_signature(entry.paths)
+        with entry.lock:
+            if entry.signature != signature:
+                self._load(entry, signature)
+            if entry.error is not None:
+                raise ModelLoadError(f"ไม่สามารถโหลดโมเดล {name} ได้: {entry.error}")
+            entry.hits += 1
+            # แตะ LRU ขณะยังถือ entry.lock อยู่ (ถูก evict ไปพร้อมกันไม่ได้) แต่ยอมให้ไม่มี key
+            with self._lock:
+                if name in self._lru:
+                    self._lru.move_to_end(name)
+            return entry.value
+
+    # คืนโมเดลถ้ามี ไม่อย่างนั้นคืน None (ใช้กับหน้าเว็บที่ต้องทำงานต่อแม้บางโมเดลหาย)
+    def try_get(self, name):
+        try:
+            return self.get(name)
+        except ModelLoadError:
+            return None
+
+    # โมเดลที่โหลดไว้แล้วใน process นี้ (None = ยังไม่ได้โหลด) ไม่โหลดและไม่ตรวจไฟล์ artifact
+    def loaded(self, name):
+        return self._entries[name].value
+
+    def _load(self, entry, signature):
+        self._release(entry)
+        entry.signature = signature
+        started = time.perf_counter()
+        try:
+            entry.value = entry.loader()
+            entry.error = None
+        except Exception as e:
+            entry.error = str(e)
+            metrics.counter('model_load_failures_total', "จำนวนครั้งที่โหลดโมเดลไม่สำเร็จ", model=entry.name).inc()
+            return
+        entry.load_time = time.perf_counter() - started
+        if self.prediction_cache is not None and hasattr(entry.value, 'enable_cache'):
+            entry.value.enable_cache(self.prediction_cache, signature)
+        if self.drift_monitoring and hasattr(entry.value, 'enable_monitoring'):
+            entry.value.enable_monitoring(get_drift_monitor(entry.value.domain))
+        metrics.histogram('model_load_seconds', "เวลาที่ใช้โหลดโมเดล (วินาที)", model=entry.name).observe(entry.load_time)
+        # นับเฉพาะไฟล์ที่โมเดลโหลดจริง (เช่น MLP ที่ใช้ NumPy engine ไม่ได้โหลด .h5 และ scaler)
+        loaded = set(getattr(entry.value, 'artifact_paths', None) or entry.paths)
+        entry.size_bytes = sum(size for path, _, size in signature if size and path in loaded)
+        entry.loads += 1
+        with self._lock:
+            self._lru[entry.name] = None
+        self._evict(keep=entry.name)
+
+    def _release(self, entry):
+        if entry.value is not None and hasattr(entry.value, 'close'):
+            entry.value.close()
+        entry.value = None
+        entry.size_bytes = 0
+        with self._lock:
+            self._lru.pop(entry.name, None)
+
+    def _evict(self, keep):
+        if not self.memory_budget:
+            return
+        with self._lock:
+            candidates = [name for name in self._lru if name != keep]
+        for name in candidates:
+            if self.memory_bytes() <= self.memory_budget:
+                break
+            entry = self._entries[name]
+            if entry.lock.acquire(blocking=False):
+                try:
+                    self._release(entry)
+                    entry.signature = None
+                finally:
+                    entry.lock.release()
+
+    def memory_bytes(self):
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def stats(self):
+        return {
+            name: {
+                'loaded': entry.value is not None,
+                'error': entry.error,
+                'load_time_s': entry.load_time,
+                'size_mb': entry.size_bytes / (1024 * 1024),
+                'loads': entry.loads,
+                'hits': entry.hits,
+            }
+            for name, entry in self._entries.items()
+        }
+
+
+def _loan_loader(key):
+    if hosting_enabled():
+        return lambda: LoanScorer(hosted_loan_model(key), name=key, native_loader=lambda: load_loan_model(key))
+    return lambda: LoanScorer(load_loan_model(key), name=key)
+
+
+def _diabetes_loader():
+    if hosting_enabled():
+        scorer = DiabetesScorer(hosted_mlp(), None)
+    else:
+        scorer = DiabetesScorer(*load_diabetes_model())
+    files = [MLP_MODEL_FILE, SCALER_FILE] if scorer.scaler is not None else [MLP_NUMPY_FILE]
+    scorer.artifact_paths = [model_path(filename) for filename in files]
+    return scorer
+
+
+def _quantized_loader(precision):
+    return lambda: DiabetesScorer(load_quantized_mlp(precision), None, name=f'mlp_{precision}')
+
+
+def build_default_registry(memory_budget_mb=MEMORY_BUDGET_MB):
+    registry = ModelRegistry(memory_budget_mb, PredictionCache(), DRIFT_MONITORING)
+    for key, filename in LOAN_MODEL_FILES.items():
+        registry.register(key, _loan_loader(key), [model_path(filename)])
+    registry.register('mlp', _diabetes_loader,
+                      [model_path(MLP_MODEL_FILE), model_path(MLP_NUMPY_FILE), model_path(SCALER_FILE)])
+    for precision, filename in MLP_QUANT_FILES.items():
+        registry.register(f'mlp_{precision}', _quantized_loader(precision),
+                          [model_path(filename), model_path(MLP_NUMPY_FILE)])
+    return registry
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+# registry กลางของ process ใช้ร่วมกันทุกหน้าและทุก session
+def get_registry():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = build_default_registry()
+        return _default
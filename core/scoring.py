@@ -0,0 +1,263 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from core import ROOT_DIR, array_input, diabetes
+from core.batching import MAX_BATCH_SIZE, MAX_WAIT_MS, MicroBatcher
+from core.loan import CHUNK_SIZE, LoanEncoder, frame_result, get_feature_names, risk_levels, score_matrix
+from core.metrics import get_metrics
+from core.mlp_numpy import NumpyMLP
+from core.mlp_quant import QuantizedMLP
+from core.trees import COMPILED_MAX_ROWS, compile_ensemble
+
+MODELS_DIR = os.path.join(ROOT_DIR, 'models')
+
+LOAN_MODEL_FILES = {
+    'rf': 'rf_model.pkl',
+    'xgb': 'xgb_model.pkl',
+}
+MLP_MODEL_FILE = 'mlp_model.h5'
+MLP_NUMPY_FILE = 'mlp_model.npz'
+SCALER_FILE = 'scaler.pkl'
+# MLP แบบลดความละเอียด สร้างด้วย python -m tools.quantize_mlp
+MLP_QUANT_FILES = {
+    'int8': 'mlp_model_int8.npz',
+    'float16': 'mlp_model_float16.npz',
+}
+
+
+metrics = get_metrics()
+
+
+# จับเวลาขั้นตอนของการทำนาย (encode / scale / inference / total) แยกตามโมเดล
+def stage_span(model, stage):
+    return metrics.span('prediction_stage_seconds', "เวลาที่ใช้ในแต่ละขั้นตอนของการทำนาย (วินาที)",
+                        model=model, stage=stage)
+
+
+def count_rows(model, n_rows):
+    metrics.counter('prediction_rows_total', "จำนวนแถวที่ทำนายแล้ว", model=model).inc(n_rows)
+
+
+def cache_key(scorer, row):
+    return (scorer.name, scorer.version, row.tobytes())
+
+
+# ใช้ผลเดิมจาก cache ถ้าแถวที่ encode แล้วเหมือนเดิมและโมเดลยังเป็นเวอร์ชันเดิม
+def cached_prediction(scorer, row, compute):
+    if scorer.cache is None:
+        return compute()
+    key = cache_key(scorer, row)
+    value = scorer.cache.get(key)
+    if value is None:
+        value = compute()
+        scorer.cache.put(key, value)
+    return value
+
+
+def model_path(filename):
+    return os.path.join(MODELS_DIR, filename)
+
+
+def load_loan_model(key):
+    return joblib.load(model_path(LOAN_MODEL_FILES[key]))
+
+
+# ใช้ NumPy engine (scaler รวมอยู่ใน layer แรกแล้ว) ถ้ามี .npz ที่ตรงกับ .h5 และ scaler ปัจจุบัน
+# ไม่อย่างนั้นค่อย import TensorFlow มาโหลด .h5
+def load_diabetes_model(prefer_numpy=True):
+    npz_path = model_path(MLP_NUMPY_FILE)
+    if prefer_numpy and os.path.exists(npz_path):
+        model = NumpyMLP.load(npz_path)
+        if model.matches(model_path(MLP_MODEL_FILE), model_path(SCALER_FILE)):
+            return model, None
+
+    from tensorflow.keras.models import load_model
+    model = load_model(model_path(MLP_MODEL_FILE))
+    scaler = joblib.load(model_path(SCALER_FILE))
+    return model, scaler
+
+
+# โหลด MLP แบบ int8/float16 ต้องสร้างจาก mlp_model.npz ปัจจุบัน ไม่อย่างนั้นถือว่าไฟล์เก่า
+def load_quantized_mlp(precision):
+    model = QuantizedMLP.load(model_path(MLP_QUANT_FILES[precision]))
+    if not model.matches(model_path(MLP_NUMPY_FILE)):
+        raise ValueError(f"{MLP_QUANT_FILES[precision]} ไม่ตรงกับ {MLP_NUMPY_FILE} ให้รัน python -m tools.quantize_mlp ใหม่")
+    return model
+
+
+# ตัวทำนายการผิดนัดชำระหนี้ ใช้ร่วมกันระหว่างหน้าเว็บและ service
+class LoanScorer:
+    domain = 'loan'
+
+    # native_loader: โหลดโมเดลต้นฉบับเมื่อจำเป็น (กรณี model เป็นตาราง node แบบ memory-mapped)
+    def __init__(self, model, feature_names=None, name=None, native_loader=None):
+        feature_names = feature_names or get_feature_names(model)
+        if feature_names is None:
+            raise ValueError("ไม่สามารถดึง feature names จากโมเดลได้")
+        self.model = model
+        self.native_loader = native_loader
+        self._native = None if native_loader else model
+        self.name = name or type(model).__name__
+        self.cache = None
+        self.version = None
+        self.monitor = None
+        self.encoder = LoanEncoder(feature_names)
+        try:
+            self.compiled = compile_ensemble(model)
+            # สร้างตาราง bitmask ตอนโหลด ไม่ให้คำขอแรกต้องรอ
+            self.compiled.leaf_tables()
+        except ValueError:
+            self.compiled = None
+
+    # registry เรียกพร้อมเวอร์ชันของ artifact ทุกครั้งที่โหลดโมเดลใหม่
+    def enable_cache(self, cache, version=None):
+        self.cache = cache
+        self.version = version
+        cache.set_version(self.name, version)
+
+    # ส่งข้อมูลที่เข้ามาทำนายให้ตัวติดตาม drift (core.drift) นับหลังทำนายเสร็จ
+    def enable_monitoring(self, monitor):
+        self.monitor = monitor
+
+    # โมเดล XGBoost/sklearn ตัวจริง (ใช้กับงานที่ต้องการโครงสร้างเต็ม เช่น TreeSHAP)
+    def native_model(self):
+        if self._native is None:
+            self._native = self.native_loader()
+        return self._native
+
+    # batch เล็กใช้ต้นไม้ที่ compile แล้ว (ไม่มี overhead ต่อการเรียก) batch ใหญ่ใช้โมเดลเดิม
+    def predictor(self, n_rows):
+        if self.compiled is not None and n_rows <= COMPILED_MAX_ROWS:
+            return self.compiled
+        return self.model
+
+    def predict_one(self, record):
+        with stage_span(self.name, 'total'):
+            with stage_span(self.name, 'encode'):
+                row, unknown = self.encoder.encode_row(record)
+            with stage_span(self.name, 'inference'), array_input():
+                prob = cached_prediction(self, row, lambda: float(self.predictor(1).predict_proba(row)[0, 1]))
+            result = {
+                'prediction': int(prob > 0.5),
+                'probability': prob,
+                'risk_level': str(risk_levels(np.array([prob]))[0]),
+                'unknown': [{'field': field, 'value': value} for field, value in unknown],
+            }
+        count_rows(self.name, 1)
+        if self.monitor is not None:
+            with stage_span(self.name, 'monitor'):
+                self.monitor.observe_record(record)
+        return result
+
+    def predict_frame(self, df, chunk_size=CHUNK_SIZE):
+        with stage_span(self.name, 'total'):
+            with stage_span(self.name, 'encode'):
+                X, unknown = self.encoder.encode_frame(df)
+            with stage_span(self.name, 'inference'):
+                probs = score_matrix(self.predictor(min(len(df), chunk_size)), X, chunk_size)
+            result = frame_result(df, probs)
+        count_rows(self.name, len(df))
+        if self.monitor is not None:
+            with stage_span(self.name, 'monitor'):
+                self.monitor.observe_frame(df)
+        return result, unknown
+
+    def predict_records(self, records, chunk_size=CHUNK_SIZE):
+        result, unknown = self.predict_frame(pd.DataFrame.from_records(records), chunk_size)
+        rows = [
+            {'prediction': int(p), 'probability': float(prob), 'risk_level': level}
+            for p, prob, level in zip(result['prediction'], result['default_probability'], result['risk_level'])
+        ]
+        return rows, unknown
+
+
+# ตัวทำนายโรคเบาหวาน (scaler + MLP) ถ้า scaler เป็น None แปลว่าโมเดลรับข้อมูลดิบได้เอง
+class DiabetesScorer:
+    domain = 'diabetes'
+
+    def __init__(self, model, scaler, name='mlp'):
+        self.model = model
+        self.scaler = scaler
+        self.name = name
+        self.batcher = None
+        self.cache = None
+        self.version = None
+        self.monitor = None
+        # ไฟล์ artifact ที่โหลดจริง (registry ใช้ประมาณหน่วยความจำ) None = ทุกไฟล์ที่ลงทะเบียนไว้
+        self.artifact_paths = None
+
+    def enable_cache(self, cache, version=None):
+        self.cache = cache
+        self.version = version
+        cache.set_version(self.name, version)
+
+    def enable_monitoring(self, monitor):
+        self.monitor = monitor
+
+    # นับแถวที่ encode แล้ว (ตามลำดับ diabetes.FEATURES) เข้าตัวติดตาม drift
+    def observe(self, X):
+        if self.monitor is not None:
+            with stage_span(self.name, 'monitor'):
+                if len(X) == 1:
+                    self.monitor.observe_row(X[0])
+                else:
+                    self.monitor.observe_matrix(X)
+
+    # ให้คำขอทีละแถวที่มาพร้อมกันใช้ scaler.transform และ forward pass ร่วมกัน
+    def enable_batching(self, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        if self.batcher is None:
+            self.batcher = MicroBatcher(self.predict_proba, max_batch_size, max_wait_ms)
+        return self.batcher
+
+    # batcher ที่ปิดแล้วยังคงอยู่ คำขอที่ถือ scorer นี้ไว้จะถูกทำนายทันทีแทนการเข้าคิว
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+
+    def predict_proba(self, X):
+        if self.scaler is not None:
+            with stage_span(self.name, 'scale'), array_input():
+                X = self.scaler.transform(X)
+        with stage_span(self.name, 'inference'):
+            probs = np.asarray(self.model.predict(X, verbose=0)).reshape(-1)
+        count_rows(self.name, len(probs))
+        return probs
+
+    # ถ้าเปิด batching เวลา total จะรวมเวลารอในคิวของ micro-batcher ด้วย
+    def predict_one(self, record):
+        with stage_span(self.name, 'total'):
+            with stage_span(self.name, 'encode'):
+                row = diabetes.encode_record(record)
+            batcher = self.batcher
+            if batcher is not None:
+                prob = cached_prediction(self, row, lambda: float(batcher.predict(row)))
+            else:
+                prob = cached_prediction(self, row, lambda: float(self.predict_proba(row)[0]))
+            result = self.result(prob)
+        self.observe(row)
+        return result
+
+    def result(self, prob):
+        return {
+            'prediction': int(prob >= diabetes.THRESHOLD),
+            'probability': float(prob),
+            'message': diabetes.result_message(prob),
+        }
+
+    def predict_frame(self, df):
+        with stage_span(self.name, 'total'):
+            with stage_span(self.name, 'encode'):
+                X = diabetes.encode_frame(df)
+            probs = self.predict_proba(X)
+        self.observe(X)
+        return probs
+
+    def predict_records(self, records):
+        probs = self.predict_frame(pd.DataFrame.from_records(records))
+        return [
+            {'prediction': int(prob >= diabetes.THRESHOLD), 'probability': float(prob)}
+            for prob in probs
+        ]
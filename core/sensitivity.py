@@ -0,0 +1,72 @@
+import itertools
+
+import numpy as np
+
+from core import array_input
+from core.scoring import count_rows, stage_span
+
+# วิเคราะห์ความไว (what-if) ของผู้กู้หนึ่งราย: เปลี่ยนค่าบาง feature เป็นช่วงๆ แล้วดูความน่าจะเป็นที่เปลี่ยนไป
+# ทุกจุดของ grid ถูกสร้างเป็น matrix เดียวและทำนายด้วย predict_proba ครั้งเดียว
+
+# ช่วงค่าของแต่ละ feature ตาม input ในหน้า 01: (ต่ำสุด, สูงสุด, เป็นจำนวนเต็มหรือไม่)
+SWEEP_RANGES = {
+    'creditscore': (300, 850, True),
+    'dtiratio': (0.0, 1.0, False),
+    'loanterm': (6, 60, True),
+    'income': (0, 200000, True),
+    'loanamount': (1000, 250000, True),
+    'age': (18, 80, True),
+}
+
+
+def sweep_values(feature, points):
+    low, high, integer = SWEEP_RANGES[feature]
+    values = np.linspace(low, high, points)
+    return np.unique(np.round(values)) if integer else values
+
+
+# ทำนาย grid ทุกจุดของ axes {feature: ค่าที่ต้องการ} โดยค่าอื่นเท่ากับ record เดิม
+# คืนค่า array ความน่าจะเป็นรูปร่างเดียวกับ grid (ตามลำดับ axes)
+def sweep_grid(scorer, record, axes):
+    base, _ = scorer.encoder.encode_row(record)
+    columns = [scorer.encoder.numeric[feature] for feature in axes]
+    mesh = np.meshgrid(*axes.values(), indexing='ij')
+
+    X = np.repeat(base, mesh[0].size, axis=0)
+    for j, values in zip(columns, mesh):
+        X[:, j] = values.ravel()
+    return _predict(scorer, X).reshape(mesh[0].shape)
+
+
+# เส้นตอบสนองของหลาย feature (เปลี่ยนทีละ feature) รวมเป็น matrix เดียว
+# คืนค่า {feature: (ค่า, ความน่าจะเป็น)}
+def response_curves(scorer, record, features, points=50):
+    base, _ = scorer.encoder.encode_row(record)
+    values = {feature: sweep_values(feature, points) for feature in features}
+
+    blocks = []
+    for feature, grid in values.items():
+        block = np.repeat(base, len(grid), axis=0)
+        block[:, scorer.encoder.numeric[feature]] = grid
+        blocks.append(block)
+    probs = _predict(scorer, np.concatenate(blocks))
+
+    offsets = itertools.accumulate([0] + [len(grid) for grid in values.values()])
+    return {
+        feature: (grid, probs[start:start + len(grid)])
+        for (feature, grid), start in zip(values.items(), offsets)
+    }
+
+
+def heatmap(scorer, record, x_feature, y_feature, points=40):
+    x_values = sweep_values(x_feature, points)
+    y_values = sweep_values(y_feature, points)
+    probs = sweep_grid(scorer, record, {y_feature: y_values, x_feature: x_values})
+    return x_values, y_values, probs
+
+
+def _predict(scorer, X):
+    with stage_span(scorer.name, 'sweep'), array_input():
+        probs = scorer.predictor(len(X)).predict_proba(X)[:, 1]
+    count_rows(scorer.name, len(X))
+    return probs
@@ -0,0 +1,184 @@
+import io
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import diabetes
+from core.loan import CHUNK_SIZE
+from core.scoring import DiabetesScorer, stage_span
+
+# ทำนายไฟล์ CSV ขนาดใหญ่กว่าหน่วยความจำทีละ chunk: อ่าน -> encode/scale -> ทำนาย -> เขียน
+# แต่ละขั้นเป็น generator ต่อกัน และการอ่าน/parse ทำใน thread แยกผ่านคิวที่จำกัดขนาด
+# หน่วยความจำจึงขึ้นกับ chunk_size * (PREFETCH + 1) ไม่ขึ้นกับขนาดไฟล์
+#
+# หลังเขียนแต่ละ chunk จะบันทึก checkpoint (byte offset ของไฟล์ต้นทางและไฟล์ผลลัพธ์)
+# ถ้างานหยุดกลางทาง เรียกใหม่ด้วย checkpoint เดิมจะทำต่อจาก chunk ที่เขียนเสร็จล่าสุด
+# ข้อจำกัด: แบ่ง chunk ตามบรรทัด จึงไม่รองรับค่าใน CSV ที่มีการขึ้นบรรทัดใหม่อยู่ในเครื่องหมายคำพูด
+
+PREFETCH = 2
+# เก็บค่าที่ไม่รู้จักไม่เกินจำนวนนี้ต่อคอลัมน์ (ให้หน่วยความจำคงที่)
+MAX_UNKNOWN_VALUES = 50
+
+_DONE = object()
+
+
+# อ่านไฟล์ทีละ chunk_size บรรทัด เริ่มจาก byte offset ที่กำหนด คืนค่า (DataFrame, offset หลัง chunk)
+def read_chunks(csv_path, chunk_size=CHUNK_SIZE, offset=0):
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        if offset:
+            f.seek(offset)
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                return
+            if not lines[-1].endswith(b'\n'):
+                lines[-1] += b'\n'
+            yield pd.read_csv(io.BytesIO(header + b''.join(lines))), f.tell()
+
+
+# ดึงค่าจาก generator ใน thread แยกล่วงหน้าไม่เกิน depth รายการ
+def prefetch(items, depth=PREFETCH):
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                buffer.put(item)
+            buffer.put(_DONE)
+        except BaseException as e:
+            buffer.put(e)
+        finally:
+            items.close()
+
+    thread = threading.Thread(target=produce, name='csv-reader', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # ผู้ใช้หยุดกลางทาง: ปลดคิวให้ thread อ่านจบได้
+        stop.set()
+        while thread.is_alive():
+            try:
+                buffer.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+# ทำนายหนึ่ง chunk คืนค่า (ตารางผลลัพธ์, {field: [ค่าที่ไม่รู้จัก]}) รูปแบบเดียวกับหน้า 01/03
+# scorer เป็น ParallelScorer ก็ได้ (ดูชนิดโมเดลจาก scorer ที่ห่อไว้)
+def score_chunk(scorer, df):
+    if isinstance(getattr(scorer, 'scorer', scorer), DiabetesScorer):
+        probs = scorer.predict_frame(df)
+        result = df.copy()
+        result['prediction'] = (probs >= diabetes.THRESHOLD).astype(np.int8)
+        result['probability'] = probs
+        return result, {}
+    return scorer.predict_frame(df, len(df))
+
+
+def score_chunks(scorer, chunks):
+    for df, offset in chunks:
+        result, unknown = score_chunk(scorer, df)
+        yield result, unknown, offset
+
+
+def input_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {'path': os.path.abspath(csv_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def load_checkpoint(checkpoint_path, signature, model):
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('input') != signature or checkpoint.get('model') != model:
+        raise ValueError(f"checkpoint {checkpoint_path} เป็นของไฟล์หรือโมเดลอื่น ให้ลบทิ้งก่อนเริ่มใหม่")
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_path, checkpoint):
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def _merge_unknown(total, unknown):
+    for field, values in unknown.items():
+        seen = total.setdefault(field, [])
+        for value in values:
+            if len(seen) >= MAX_UNKNOWN_VALUES:
+                break
+            value = str(value)
+            if value not in seen:
+                seen.append(value)
+
+
+# ทำนายทั้งไฟล์แล้วเขียนผลลงไฟล์ CSV ทีละ chunk
+# checkpoint_path=None ไม่บันทึก checkpoint; ถ้ามีไฟล์ checkpoint อยู่แล้วจะทำต่อจากจุดนั้น
+# progress(สรุปปัจจุบัน) ถูกเรียกหลังเขียนแต่ละ chunk
+def stream_score(scorer, input_path, output_path, chunk_size=CHUNK_SIZE, checkpoint_path=None,
+                 depth=PREFETCH, progress=None):
+    signature = input_signature(input_path)
+    checkpoint = load_checkpoint(checkpoint_path, signature, scorer.name)
+    # ไฟล์ผลลัพธ์ถูกลบ/ย้าย หรือสั้นกว่าที่ checkpoint บันทึกไว้ ต่อจากเดิมไม่ได้ เริ่มใหม่ตั้งแต่ต้น
+    if checkpoint is not None and checkpoint['output_offset'] and (
+            not os.path.exists(output_path) or os.path.getsize(output_path) < checkpoint['output_offset']):
+        checkpoint = None
+    if checkpoint is None:
+        checkpoint = {'input': signature, 'model': scorer.name, 'input_offset': 0, 'output_offset': 0,
+                      'rows': 0, 'positive': 0, 'chunks': 0, 'unknown': {}}
+    resumed_from_row = checkpoint['rows']
+
+    started = time.perf_counter()
+    chunks = prefetch(read_chunks(input_path, chunk_size, checkpoint['input_offset']), depth)
+    with open(output_path, 'r+b' if checkpoint['output_offset'] else 'wb') as out:
+        # ตัดส่วนที่เขียนหลัง checkpoint ล่าสุด (chunk ที่เขียนไม่เสร็จ) ทิ้ง
+        out.truncate(checkpoint['output_offset'])
+        out.seek(checkpoint['output_offset'])
+        for result, unknown, offset in score_chunks(scorer, chunks):
+            with stage_span(scorer.name, 'write'):
+                out.write(result.to_csv(index=False, header=checkpoint['output_offset'] == 0).encode('utf-8'))
+                out.flush()
+                os.fsync(out.fileno())
+
+            checkpoint['input_offset'] = offset
+            checkpoint['output_offset'] = out.tell()
+            checkpoint['rows'] += len(result)
+            checkpoint['chunks'] += 1
+            checkpoint['positive'] += int(result['prediction'].sum())
+            _merge_unknown(checkpoint['unknown'], unknown)
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, checkpoint)
+            if progress is not None:
+                progress(dict(checkpoint, resumed_from_row=resumed_from_row,
+                              elapsed_s=time.perf_counter() - started))
+
+    # ทำเสร็จทั้งไฟล์แล้ว checkpoint ไม่จำเป็นอีก
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return {
+        'rows': checkpoint['rows'],
+        'positive': checkpoint['positive'],
+        'chunks': checkpoint['chunks'],
+        'unknown': checkpoint['unknown'],
+        'resumed_from_row': resumed_from_row,
+        'elapsed_s': time.perf_counter() - started,
+    }
@@ -0,0 +1,376 @@
+import json
+import os
+import platform
+import shutil
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from core import diabetes
+from core.artifacts import fingerprint, get_artifact_cache
+from core.dataset import DIABETES_CSV, DIABETES_SCHEMA, file_sha256, load_frame
+from core.scoring import LOAN_MODEL_FILES, MLP_MODEL_FILE, MODELS_DIR, SCALER_FILE
+
+# ขั้นตอนเทรนโมเดลทั้งหมดตามที่แสดงในหน้า 02/04 (imputation, get_dummies, split, RF/XGBoost/MLP)
+# ผลลัพธ์ถูกเขียนเป็นเวอร์ชันใน models/versions/<version>/ พร้อม manifest.json
+
+VERSIONS_DIR = os.path.join(MODELS_DIR, 'versions')
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+# เปลี่ยนค่านี้เมื่อขั้นตอนเตรียมข้อมูลเปลี่ยน เพื่อไม่ให้ใช้ feature matrix เก่าใน cache
+FEATURE_PIPELINE_VERSION = 1
+
+RF_PARAMS = dict(n_estimators=30, random_state=RANDOM_STATE)
+XGB_PARAMS = dict(n_estimators=100, learning_rate=0.1, max_depth=6, random_state=RANDOM_STATE)
+MLP_PARAMS = dict(layers=[64, 32], epochs=20, batch_size=32, learning_rate=0.001)
+
+
+def split_data(X, y):
+    from sklearn.model_selection import train_test_split
+    return train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+
+
+def _metrics(y_true, prob):
+    from sklearn.metrics import accuracy_score, roc_auc_score
+    return {
+        'accuracy': float(accuracy_score(y_true, prob > 0.5)),
+        'roc_auc': float(roc_auc_score(y_true, prob)),
+    }
+
+
+# ---------- Loan default ----------
+
+def build_loan_features(csv_path):
+    from sklearn.impute import SimpleImputer
+
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.lower()
+    imputer = SimpleImputer(strategy='mean')
+    df[['loanamount', 'creditscore']] = imputer.fit_transform(df[['loanamount', 'creditscore']])
+
+    X = pd.get_dummies(df.drop(columns=['default', 'loanid'], errors='ignore'), drop_first=True)
+    y = df['default'].to_numpy()
+    return {
+        'X': X.to_numpy(dtype=np.float32),
+        'y': y,
+        'feature_names': [str(c) for c in X.columns],
+    }
+
+
+def loan_features(csv_path, sha256=None):
+    sha256 = sha256 or file_sha256(csv_path)
+    key = fingerprint(sha256, FEATURE_PIPELINE_VERSION)
+    return get_artifact_cache().get_or_build('loan_features', key, lambda: build_loan_features(csv_path))
+
+
+def train_loan_models(csv_path, n_jobs=-1, models=('rf', 'xgb')):
+    from sklearn.ensemble import RandomForestClassifier
+    import xgboost as xgb
+
+    sha256 = file_sha256(csv_path)
+    features = loan_features(csv_path, sha256)
+    X = pd.DataFrame(features['X'], columns=features['feature_names'])
+    X_train, X_test, y_train, y_test = split_data(X, features['y'])
+
+    factories = {
+        'rf': (RandomForestClassifier, dict(RF_PARAMS, n_jobs=n_jobs)),
+        'xgb': (xgb.XGBClassifier, dict(XGB_PARAMS, n_jobs=n_jobs)),
+    }
+    results = {}
+    for key in models:
+        factory, params = factories[key]
+        started = time.perf_counter()
+        model = factory(**params).fit(X_train, y_train)
+        train_time = time.perf_counter() - started
+        results[key] = {
+            'model': model,
+            'file': LOAN_MODEL_FILES[key],
+            'params': params,
+            'train_time_s': train_time,
+            'metrics': _metrics(y_test, model.predict_proba(X_test)[:, 1]),
+        }
+    data = {'path': csv_path, 'sha256': sha256, 'rows': int(len(X)), 'features': features['feature_names']}
+    return results, data
+
+
+# ---------- Diabetes (MLP) ----------
+
+def build_diabetes_features(csv_path):
+    df = load_frame(csv_path, DIABETES_SCHEMA, diabetes.FEATURES + ['diabetes'])
+    return {'X': diabetes.encode_frame(df).astype(np.float32), 'y': df['diabetes'].to_numpy(dtype=np.int8)}
+
+
+def diabetes_features(csv_path, sha256=None):
+    sha256 = sha256 or file_sha256(csv_path)
+    key = fingerprint(sha256, FEATURE_PIPELINE_VERSION)
+    return get_artifact_cache().get_or_build('diabetes_features', key, lambda: build_diabetes_features(csv_path))
+
+
+def build_mlp(n_features, layers, learning_rate):
+    from tensorflow import keras
+
+    model = keras.Sequential([keras.Input(shape=(n_features,))]
+                             + [keras.layers.Dense(units, activation='relu') for units in layers]
+                             + [keras.layers.Dense(1, activation='sigmoid')])
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+                  loss='binary_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def train_diabetes_model(csv_path=DIABETES_CSV, params=None):
+    from sklearn.preprocessing import StandardScaler
+
+    params = dict(MLP_PARAMS, **(params or {}))
+    sha256 = file_sha256(csv_path)
+    features = diabetes_features(csv_path, sha256)
+    X = pd.DataFrame(features['X'], columns=diabetes.FEATURES)
+    X_train, X_test, y_train, y_test = split_data(X, features['y'])
+
+    started = time.perf_counter()
+    scaler = StandardScaler().fit(X_train)
+    model = build_mlp(X.shape[1], params['layers'], params['learning_rate'])
+    model.fit(scaler.transform(X_train), y_train, epochs=params['epochs'],
+              batch_size=params['batch_size'], verbose=0)
+    train_time = time.perf_counter() - started
+
+    prob = model.predict(scaler.transform(X_test), batch_size=8192, verbose=0)[:, 0]
+    results = {
+        'mlp': {
+            'model': model,
+            'file': MLP_MODEL_FILE,
+            'params': params,
+            'train_time_s': train_time,
+            'metrics': _metrics(y_test, prob),
+        },
+        'scaler': {'model': scaler, 'file': SCALER_FILE, 'params': {}},
+    }
+    data = {'path': csv_path, 'sha256': sha256, 'rows': int(len(X)), 'features': diabetes.FEATURES}
+    return results, data
+
+
+# ---------- Diabetes (MLP) แบบ streaming ----------
+# อ่าน CSV ทีละ chunk ทุก epoch แทนการโหลดทั้งไฟล์ หน่วยความจำขึ้นกับ chunk_size ไม่ขึ้นกับจำนวนแถว
+# แบ่ง train/validation/test ตามเลขแถว (hash) แถวเดิมอยู่ชุดเดิมเสมอไม่ว่า chunk_size เท่าไร
+# validation ใช้หยุดเทรนก่อนกำหนด (early stopping) ส่วน test ใช้วัดผลสุดท้ายเท่านั้น
+
+STREAM_PARAMS = dict(chunk_size=20000, patience=3, min_delta=1e-4, validation_size=0.1)
+# จำนวนช่องของ histogram ที่ใช้คำนวณ ROC AUC โดยไม่ต้องเก็บผลทำนายทุกแถว
+AUC_BINS = 4096
+
+SPLIT_TRAIN, SPLIT_VALIDATION, SPLIT_TEST = 0, 1, 2
+
+
+def row_split(start, n_rows, validation_size):
+    # multiplicative hash ของเลขแถว กระจายสม่ำเสมอในช่วง [0, 1)
+    index = np.arange(start, start + n_rows, dtype=np.uint64)
+    u = ((index + np.uint64(RANDOM_STATE)) * np.uint64(2654435761) % np.uint64(2 ** 32)) / 2 ** 32
+    return np.where(u < TEST_SIZE, SPLIT_TEST, np.where(u < TEST_SIZE + validation_size, SPLIT_VALIDATION, SPLIT_TRAIN))
+
+
+def _diabetes_chunk(df):
+    return diabetes.encode_frame(df).astype(np.float32), df['diabetes'].to_numpy(dtype=np.float32)
+
+
+# รอบแรก: หาตำแหน่งเริ่มของแต่ละ chunk (ไว้สลับลำดับทุก epoch) และ fit scaler เฉพาะแถว train
+def _scan_diabetes_csv(csv_path, chunk_size, validation_size):
+    from sklearn.preprocessing import StandardScaler
+    from core.streaming import read_chunks
+
+    scaler = StandardScaler()
+    chunks, counts = [], np.zeros(3, dtype=np.int64)
+    offset, start = 0, 0
+    for df, next_offset in read_chunks(csv_path, chunk_size):
+        X, y = _diabetes_chunk(df)
+        split = row_split(start, len(df), validation_size)
+        scaler.partial_fit(X[split == SPLIT_TRAIN])
+        counts += np.bincount(split, minlength=3)
+        chunks.append((offset, start))
+        offset, start = next_offset, start + len(df)
+    return scaler, chunks, counts
+
+
+# อ่าน chunk ตามลำดับที่กำหนด คืนค่า (X ที่ scale แล้ว, y, ชุดของแต่ละแถว)
+def _stream_diabetes(csv_path, chunk_size, chunks, scaler, validation_size):
+    from core.streaming import read_chunks
+
+    for offset, start in chunks:
+        reader = read_chunks(csv_path, chunk_size, offset)
+        df, _ = next(reader)
+        reader.close()
+        X, y = _diabetes_chunk(df)
+        yield scaler.transform(X).astype(np.float32), y, row_split(start, len(df), validation_size)
+
+
+def _binned_auc(positive, negative):
+    # คู่ (บวก, ลบ) ที่บวกได้คะแนนสูงกว่า คู่ที่อยู่ช่องเดียวกันนับครึ่ง
+    negative_below = np.cumsum(negative) - negative
+    return float(positive @ (negative_below + negative / 2) / (positive.sum() * negative.sum()))
+
+
+# วัด log loss / accuracy / ROC AUC ของชุดที่เลือกโดยอ่านไฟล์อีกรอบ
+def _evaluate_stream(model, batches, which):
+    loss, correct, rows = 0.0, 0, 0
+    positive, negative = np.zeros(AUC_BINS), np.zeros(AUC_BINS)
+    for X, y, split in batches:
+        mask = split == which
+        if not mask.any():
+            continue
+        y = y[mask]
+        prob = model.predict(X[mask], batch_size=8192, verbose=0)[:, 0].astype(np.float64)
+        clipped = np.clip(prob, 1e-7, 1 - 1e-7)
+        loss -= float(np.sum(y * np.log(clipped) + (1 - y) * np.log(1 - clipped)))
+        correct += int(np.sum((prob > 0.5) == (y == 1)))
+        rows += len(y)
+        # ผลทำนายที่เป็น NaN (โมเดลลู่ออก) อยู่ช่องแรก loss ของ epoch นั้นเป็น NaN อยู่แล้ว
+        bins = np.clip((np.nan_to_num(prob) * AUC_BINS).astype(int), 0, AUC_BINS - 1)
+        positive += np.bincount(bins[y == 1], minlength=AUC_BINS)
+        negative += np.bincount(bins[y == 0], minlength=AUC_BINS)
+    return {'loss': loss / rows, 'accuracy': correct / rows, 'roc_auc': _binned_auc(positive, negative)}
+
+
+# เทรน MLP บนข้อมูลจริงทั้งไฟล์แบบ streaming ผลลัพธ์รูปแบบเดียวกับ train_diabetes_model
+# params['epochs'] คือจำนวน epoch สูงสุด; progress(ข้อมูลของ epoch) ถูกเรียกหลังจบแต่ละ epoch
+def train_diabetes_streaming(csv_path=DIABETES_CSV, params=None, progress=None):
+    from core.streaming import prefetch
+
+    params = {**MLP_PARAMS, **STREAM_PARAMS, **(params or {})}
+    if params['epochs'] < 1:
+        raise ValueError(f"epochs ต้องอย่างน้อย 1 (ได้ {params['epochs']})")
+    chunk_size, validation_size = params['chunk_size'], params['validation_size']
+    sha256 = file_sha256(csv_path)
+
+    started = time.perf_counter()
+    scaler, chunks, counts = _scan_diabetes_csv(csv_path, chunk_size, validation_size)
+    scan_time = time.perf_counter() - started
+
+    def batches(order):
+        return prefetch(_stream_diabetes(csv_path, chunk_size, order, scaler, validation_size))
+
+    model = build_mlp(len(diabetes.FEATURES), params['layers'], params['learning_rate'])
+    rng = np.random.default_rng(RANDOM_STATE)
+    history, best, best_weights, waited = [], None, None, 0
+    for epoch in range(1, params['epochs'] + 1):
+        epoch_started = time.perf_counter()
+        loss, rows = 0.0, 0
+        # สลับลำดับ chunk ทุก epoch และสลับแถวภายใน chunk ตอน fit
+        for X, y, split in batches([chunks[i] for i in rng.permutation(len(chunks))]):
+            mask = split == SPLIT_TRAIN
+            fitted = model.fit(X[mask], y[mask], batch_size=params['batch_size'], epochs=1, shuffle=True, verbose=0)
+            loss += fitted.history['loss'][-1] * int(mask.sum())
+            rows += int(mask.sum())
+        train_time = time.perf_counter() - epoch_started
+
+        validation = _evaluate_stream(model, batches(chunks), SPLIT_VALIDATION)
+        record = {
+            'epoch': epoch,
+            'loss': loss / rows,
+            'val_loss': validation['loss'],
+            'val_accuracy': validation['accuracy'],
+            'val_roc_auc': validation['roc_auc'],
+            'train_s': train_time,
+            'epoch_s': time.perf_counter() - epoch_started,
+        }
+        history.append(record)
+
+        # validation loss ที่เป็น NaN/inf ไม่นับเป็น epoch ที่ดีที่สุด
+        if np.isfinite(validation['loss']) and (best is None or validation['loss'] < best - params['min_delta']):
+            best, best_weights, waited = validation['loss'], model.get_weights(), 0
+        else:
+            waited += 1
+        record['best'] = waited == 0
+        if progress is not None:
+            progress(record)
+        if waited >= params['patience']:
+            break
+
+    # ใช้น้ำหนักของ epoch ที่ validation loss ต่ำสุด (ถ้าไม่มี epoch ไหนได้ loss ที่ใช้ได้ เก็บน้ำหนักล่าสุดไว้)
+    if best_weights is not None:
+        model.set_weights(best_weights)
+    train_time = time.perf_counter() - started
+    test = _evaluate_stream(model, batches(chunks), SPLIT_TEST)
+
+    results = {
+        'mlp': {
+            'model': model,
+            'file': MLP_MODEL_FILE,
+            'params': params,
+            'train_time_s': train_time,
+            'metrics': {'accuracy': test['accuracy'], 'roc_auc': test['roc_auc']},
+            'history': history,
+        },
+        'scaler': {'model': scaler, 'file': SCALER_FILE, 'params': {}},
+    }
+    data = {
+        'path': csv_path, 'sha256': sha256, 'rows': int(counts.sum()), 'features': diabetes.FEATURES,
+        'split': {'train': int(counts[SPLIT_TRAIN]), 'validation': int(counts[SPLIT_VALIDATION]),
+                  'test': int(counts[SPLIT_TEST])},
+        'scan_time_s': scan_time,
+    }
+    return results, data
+
+
+# ---------- Artifacts ----------
+
+def _library_versions():
+    versions = {'python': platform.python_version()}
+    for name in ('numpy', 'pandas', 'sklearn', 'xgboost', 'tensorflow'):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            pass
+    return versions
+
+
+def _save(obj, path):
+    if path.endswith('.h5'):
+        obj.save(path)
+    else:
+        joblib.dump(obj, path)
+
+
+# เขียนโมเดลทั้งหมดลงโฟลเดอร์เวอร์ชันใหม่ พร้อม manifest.json คืนค่า path ของโฟลเดอร์
+def write_version(results, datasets, version=None):
+    version = version or datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+    directory = os.path.join(VERSIONS_DIR, version)
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'libraries': _library_versions(),
+        'datasets': datasets,
+        'artifacts': {},
+    }
+    for name, result in results.items():
+        path = os.path.join(directory, result['file'])
+        _save(result['model'], path)
+        manifest['artifacts'][name] = {
+            'file': result['file'],
+            'sha256': file_sha256(path),
+            'params': result['params'],
+            'train_time_s': result.get('train_time_s'),
+            'metrics': result.get('metrics'),
+            'history': result.get('history'),
+        }
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, default=str)
+    return directory
+
+
+# คัดลอก artifact ของเวอร์ชันที่เลือกไปไว้ที่ models/ (ที่หน้าเว็บและ service ใช้อยู่)
+# registry จะเห็นว่าไฟล์เปลี่ยนแล้วโหลดใหม่เอง
+def promote_version(directory):
+    with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    for artifact in manifest['artifacts'].values():
+        target = os.path.join(MODELS_DIR, artifact['file'])
+        tmp = f'{target}.tmp'
+        shutil.copyfile(os.path.join(directory, artifact['file']), tmp)
+        os.replace(tmp, target)
+    with open(os.path.join(MODELS_DIR, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
@@ -0,0 +1,313 @@
+import json
+
+import numpy as np
+
+# ตัวประเมิน tree ensemble แบบ compile แล้ว: ต้นไม้ทุกต้นถูกแปลงเป็นตาราง node ต่อเนื่องกัน
+# (feature, threshold, ลูกซ้าย/ขวา, ค่าที่ใบ) แล้วเดินทุกต้นพร้อมกันทั้ง batch ด้วย NumPy
+# ใบของต้นไม้ชี้กลับมาที่ตัวเอง จึงวนได้ครบตามความลึกสูงสุดโดยไม่ต้องเช็กว่าถึงใบหรือยัง
+
+# จำนวน (แถว x node) สูงสุดที่จะประเมินเงื่อนไขของทุก node ล่วงหน้า
+NODE_EVAL_LIMIT = 1 << 15
+
+# batch เล็กของต้นไม้ที่มีใบไม่เกิน 64 ใบ (เช่น XGBoost ความลึก 6) ใช้ตาราง bitmask ของใบ (แนวคิดของ QuickScorer)
+# ใบของแต่ละต้นเรียงตามลำดับ DFS เป็นบิตของ uint64 ทุก node ที่แถวไปทางขวาจะลบบิตของใบในลูกซ้าย
+# ใบที่แถวตกลงไปคือบิตต่ำสุดที่เหลือ node ที่ไปทางขวาของแต่ละ feature คือ node ที่ threshold น้อยกว่าค่า x
+# (prefix เมื่อเรียง threshold) จึงเก็บ AND ของ mask ทุก prefix ไว้ล่วงหน้า ตอนทำนายแค่นับ threshold ที่ผ่าน
+# ต่อ feature แล้ว AND แถวของตาราง feature ละแถว (ค่าหายใช้แถวพิเศษของ node ที่ค่าหายไปทางขวา)
+MASK_LEAVES = 64
+TABLE_MAX_ROWS = 64
+# ขนาดตารางสูงสุด (ไบต์) ถ้าเกินใช้การเดินทีละชั้นแทน
+TABLE_MAX_BYTES = 64 << 20
+
+# batch ที่ใหญ่กว่านี้ให้ใช้ predict_proba ของ XGBoost/sklearn (C++ หลาย thread)
+# วัดกับ xgb_model.pkl (ตาราง bitmask): แถวเดียวเร็วกว่าประมาณ 10 เท่า (0.025 vs 0.27 ms)
+# 4 แถว 8 เท่า 16 แถว 3.6 เท่า และช้ากว่าเมื่อเกิน 64 แถว (ดู compiled_speedup ใน tools/bench_predict.py)
+COMPILED_MAX_ROWS = 16
+
+
+class TreeEnsemble:
+    # kind = 'xgb' (รวม margin แล้วผ่าน sigmoid) หรือ 'rf' (เฉลี่ยความน่าจะเป็นจากทุกต้น)
+    def __init__(self, kind, feature, threshold, left, right, default_left, value, roots, depth,
+                 base_margin=0.0, feature_names=None, input_dtype=np.float32, children=None):
+        self.kind = kind
+        self.input_dtype = input_dtype
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.children = np.column_stack([left, right]).ravel() if children is None else children
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.base_margin = base_margin
+        self.feature_names_in_ = np.asarray(feature_names) if feature_names is not None else None
+        self.n_trees = len(roots)
+        self.classes_ = np.array([0, 1])
+        self._tables = None
+
+    # ตาราง prefix mask ของ QuickScorer สร้างครั้งแรกที่ใช้ คืนค่า False ถ้ามีต้นที่ใบเกิน MASK_LEAVES หรือตารางใหญ่เกิน
+    def leaf_tables(self):
+        if self._tables is None:
+            self._tables = _build_leaf_tables(self) or False
+        return self._tables
+
+    def _go_right(self, x, threshold, default_left, has_missing):
+        go_right = (x >= threshold) if self.kind == 'xgb' else (x > threshold)
+        if has_missing:
+            go_right = np.where(np.isnan(x), ~default_left, go_right)
+        return go_right
+
+    # หา index ของใบที่แต่ละแถวตกลงไปในแต่ละต้น คืนค่า shape (n, n_trees)
+    def apply(self, X):
+        X = np.asarray(X, dtype=self.input_dtype)
+        if X.ndim == 1:
+            X = X[None, :]
+        n, n_features = X.shape
+        n_nodes = len(self.feature)
+        has_missing = np.isnan(X).any()
+
+        tables = self.leaf_tables() if n <= TABLE_MAX_ROWS else None
+        if tables and n_features == len(tables['counts']):
+            return self._apply_tables(X, tables, has_missing)
+
+        idx = np.broadcast_to(self.roots, (n, self.n_trees))
+
+        # batch เล็ก: เทียบเงื่อนไขของทุก node ครั้งเดียว แล้วแต่ละชั้นเหลือแค่การกระโดดไปหาลูก
+        if n * n_nodes <= NODE_EVAL_LIMIT:
+            go_right = self._go_right(X[:, self.feature], self.threshold, self.default_left, has_missing)
+            go_right = go_right.ravel()
+            offsets = (np.arange(n) * n_nodes)[:, None]
+            for _ in range(self.depth):
+                idx = self.children.take(2 * idx + go_right.take(offsets + idx))
+            return idx
+
+        # batch ใหญ่: ดึงเฉพาะ feature ของ node ที่แต่ละแถวอยู่ในแต่ละชั้น
+        # children[2 * node] = ลูกซ้าย, children[2 * node + 1] = ลูกขวา
+        flat_X = X.ravel()
+        offsets = (np.arange(n) * n_features)[:, None]
+        for _ in range(self.depth):
+            x = flat_X.take(offsets + self.feature.take(idx))
+            go_right = self._go_right(x, self.threshold.take(idx), self.default_left.take(idx), has_missing)
+            idx = self.children.take(2 * idx + go_right)
+        return idx
+
+    # threshold ท้ายของแต่ละ feature เป็น NaN (เทียบแล้วเป็น False เสมอ) reduceat จึงไม่มีช่วงว่าง
+    # บิตต่ำสุดที่เหลือ (mask & -mask) เป็นกำลังของ 2 พอดี log2 จึงให้ตำแหน่งใบแบบไม่ปัดเศษ
+    def _apply_tables(self, X, tables, has_missing):
+        passed = self._go_right(np.repeat(X, tables['counts'], axis=1), tables['threshold'], None, False)
+        rows = tables['row_offsets'] + np.add.reduceat(passed, tables['starts'], axis=1)
+        if has_missing:
+            rows = np.where(np.isnan(X), tables['missing_rows'], rows)
+        mask = np.bitwise_and.reduce(tables['table'].take(rows, axis=0), axis=1)
+        lowest = mask & -mask
+        position = np.log2(lowest.astype(np.float64)).astype(np.intp)
+        return tables['leaf_nodes'].take(tables['tree_offsets'] + position)
+
+    def predict_proba(self, X):
+        leaves = self.value.take(self.apply(X))
+        if self.kind == 'xgb':
+            margin = self.base_margin + leaves.sum(axis=1, dtype=np.float64)
+            prob = 1.0 / (1.0 + np.exp(-margin))
+        else:
+            prob = leaves.mean(axis=1, dtype=np.float64)
+        proba = np.empty((len(prob), 2))
+        proba[:, 1] = prob
+        proba[:, 0] = 1.0 - prob
+        return proba
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(np.int64)
+
+
+# ตำแหน่งใบแบบ DFS (ซ้ายก่อน) ของแต่ละต้น และ mask ของแต่ละ node ภายในเมื่อไปทางขวา (ลบใบของลูกซ้าย)
+# คืนค่า None ถ้ามีต้นที่ใบเกิน MASK_LEAVES
+def _leaf_masks(left, right, roots):
+    n_nodes = len(left)
+    lo = np.zeros(n_nodes, dtype=np.int64)
+    hi = np.zeros(n_nodes, dtype=np.int64)
+    tree = np.zeros(n_nodes, dtype=np.intp)
+    leaf_nodes = np.empty((len(roots), MASK_LEAVES), dtype=np.intp)
+    for t, root in enumerate(roots):
+        leaf_nodes[t] = root
+        count, stack = 0, [(int(root), False)]
+        while stack:
+            node, done = stack.pop()
+            tree[node] = t
+            l, r = int(left[node]), int(right[node])
+            if done:
+                lo[node], hi[node] = lo[l], hi[r]
+            elif l == node:
+                if count == MASK_LEAVES:
+                    return None
+                leaf_nodes[t, count] = node
+                lo[node], hi[node] = count, count + 1
+                count += 1
+            else:
+                stack += [(node, True), (r, False), (l, False)]
+
+    internal = np.flatnonzero(left != np.arange(n_nodes))
+    all_bits = (1 << MASK_LEAVES) - 1
+    right_masks = np.array([all_bits ^ (((1 << int(hi[l])) - 1) ^ ((1 << int(lo[l])) - 1))
+                            for l in left[internal]], dtype=np.uint64)
+    return internal, tree[internal], right_masks, leaf_nodes.ravel()
+
+
+def _build_leaf_tables(ensemble):
+    masks = _leaf_masks(ensemble.left, ensemble.right, ensemble.roots)
+    if masks is None:
+        return None
+    internal, tree, right_masks, leaf_nodes = masks
+    feature = ensemble.feature.take(internal)
+    threshold = ensemble.threshold.take(internal)
+    missing_right = ~ensemble.default_left.take(internal)
+    n_features = int(feature.max()) + 1 if len(feature) else 1
+    if ensemble.feature_names_in_ is not None:
+        n_features = max(n_features, len(ensemble.feature_names_in_))
+
+    everything = np.full(ensemble.n_trees, np.iinfo(np.uint64).max, dtype=np.uint64)
+    thresholds, counts, row_offsets, missing_rows, blocks = [], [], [], [], []
+    n_rows = 0
+    for f in range(n_features):
+        nodes = np.flatnonzero(feature == f)
+        nodes = nodes[np.argsort(threshold[nodes], kind='stable')]
+        values, first = np.unique(threshold[nodes], return_index=True)
+        if (n_rows + len(values) + 2) * ensemble.n_trees * 8 > TABLE_MAX_BYTES:
+            return None
+        # แถว k = AND ของ mask ของ node ที่ threshold อยู่ใน k ค่าแรก, แถวสุดท้าย = node ที่ค่าหายไปทางขวา
+        block = np.empty((len(values) + 2, ensemble.n_trees), dtype=np.uint64)
+        block[0] = everything
+        for k, (start, stop) in enumerate(zip(first, list(first[1:]) + [len(nodes)]), start=1):
+            block[k] = block[k - 1]
+            np.bitwise_and.at(block[k], tree[nodes[start:stop]], right_masks[nodes[start:stop]])
+        block[-1] = everything
+        missing = nodes[missing_right[nodes]]
+        np.bitwise_and.at(block[-1], tree[missing], right_masks[missing])
+
+        thresholds += [values, np.array([np.nan], dtype=threshold.dtype)]
+        counts.append(len(values) + 1)
+        row_offsets.append(n_rows)
+        missing_rows.append(n_rows + len(values) + 1)
+        blocks.append(block)
+        n_rows += len(block)
+
+    counts = np.array(counts, dtype=np.intp)
+    return {
+        'threshold': np.concatenate(thresholds),
+        'counts': counts,
+        'starts': np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.intp),
+        'row_offsets': np.array(row_offsets, dtype=np.intp),
+        'missing_rows': np.array(missing_rows, dtype=np.intp),
+        'table': np.concatenate(blocks),
+        'leaf_nodes': leaf_nodes,
+        'tree_offsets': np.arange(ensemble.n_trees, dtype=np.intp) * MASK_LEAVES,
+    }
+
+
+def _node_depths(left, right, root=0):
+    depth, stack = 0, [(root, 0)]
+    while stack:
+        node, d = stack.pop()
+        if left[node] < 0:
+            depth = max(depth, d)
+        else:
+            stack.append((left[node], d + 1))
+            stack.append((right[node], d + 1))
+    return depth
+
+
+# ต่อตารางของแต่ละต้นเข้าด้วยกัน เลื่อน index ของลูกตาม offset และให้ใบชี้กลับมาที่ตัวเอง
+def _concat_trees(trees, threshold_dtype):
+    feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    depth, offset = 0, 0
+    for f, t, l, r, d, v in trees:
+        n = len(f)
+        nodes = np.arange(n) + offset
+        is_leaf = l < 0
+        feature.append(np.where(is_leaf, 0, f))
+        threshold.append(t)
+        left.append(np.where(is_leaf, nodes, l + offset))
+        right.append(np.where(is_leaf, nodes, r + offset))
+        default_left.append(d)
+        value.append(np.where(is_leaf, v, 0.0))
+        roots.append(offset)
+        depth = max(depth, _node_depths(l, r))
+        offset += n
+    return (
+        np.concatenate(feature).astype(np.intp),
+        np.concatenate(threshold).astype(threshold_dtype),
+        np.concatenate(left).astype(np.intp),
+        np.concatenate(right).astype(np.intp),
+        np.concatenate(default_left).astype(bool),
+        np.concatenate(value),
+        np.array(roots, dtype=np.intp),
+        depth,
+    )
+
+
+def from_xgb(model):
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw('json'))['learner']
+    if learner['objective']['name'] != 'binary:logistic':
+        raise ValueError(f"ไม่รองรับ objective {learner['objective']['name']}")
+    gbm = learner['gradient_booster']
+    if gbm['name'] != 'gbtree':
+        raise ValueError(f"ไม่รองรับ booster {gbm['name']}")
+
+    trees = []
+    for tree in gbm['model']['trees']:
+        if any(tree['split_type']):
+            raise ValueError("ไม่รองรับ categorical split")
+        trees.append((
+            np.array(tree['split_indices']),
+            np.array(tree['split_conditions'], dtype=np.float32),
+            np.array(tree['left_children']),
+            np.array(tree['right_children']),
+            np.array(tree['default_left'], dtype=bool),
+            np.array(tree['split_conditions'], dtype=np.float32),
+        ))
+
+    # base_score เก็บเป็นความน่าจะเป็น เช่น "[1.7727986E-1]" ต้องแปลงกลับเป็น margin
+    base_score = float(str(learner['learner_model_param']['base_score']).strip('[]'))
+    base_margin = float(np.log(base_score / (1.0 - base_score)))
+
+    tables = _concat_trees(trees, np.float32)
+    return TreeEnsemble('xgb', *tables, base_margin=base_margin,
+                        feature_names=getattr(model, 'feature_names_in_', None))
+
+
+def from_random_forest(model):
+    if len(model.classes_) != 2:
+        raise ValueError("รองรับเฉพาะการจำแนก 2 คลาส")
+
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        counts = tree.value[:, 0, :]
+        prob = counts[:, 1] / np.maximum(counts.sum(axis=1), np.finfo(np.float64).tiny)
+        missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=bool))
+        trees.append((
+            tree.feature,
+            tree.threshold,
+            tree.children_left,
+            tree.children_right,
+            np.asarray(missing_left, dtype=bool),
+            prob,
+        ))
+
+    # sklearn เทียบ X ที่แปลงเป็น float32 กับ threshold แบบ float64
+    tables = _concat_trees(trees, np.float64)
+    return TreeEnsemble('rf', *tables, feature_names=getattr(model, 'feature_names_in_', None),
+                        input_dtype=np.float32)
+
+
+# แปลงโมเดลที่รองรับเป็น TreeEnsemble ถ้าไม่รองรับจะ raise ValueError
+def compile_ensemble(model):
+    if isinstance(model, TreeEnsemble):
+        return model
+    name = type(model).__name__
+    if name == 'XGBClassifier':
+        return from_xgb(model)
+    if name == 'RandomForestClassifier':
+        return from_random_forest(model)
+    raise ValueError(f"ไม่รองรับโมเดลชนิด {name}")
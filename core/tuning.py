@@ -0,0 +1,263 @@
+import json
+import math
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from itertools import product
+
+import numpy as np
+
+from core import ROOT_DIR, file_sha256
+from core.artifacts import fingerprint
+from core.dataset import DIABETES_CSV, LOAN_CSV
+from core.hosting import read_bundle, write_bundle
+from core.training import (FEATURE_PIPELINE_VERSION, RANDOM_STATE, RF_PARAMS, XGB_PARAMS, _metrics, diabetes_features,
+                           loan_features, split_data)
+
+# ค้นหา hyperparameter ของ RF/XGBoost (Loan) และ MLP (Diabetes) ด้วย successive halving
+# สุ่ม candidate จาก SEARCH_SPACES แล้วเทรนทุกตัวด้วยข้อมูลส่วนน้อยก่อน เก็บเฉพาะ 1/eta ที่ดีที่สุดไปรอบถัดไป
+# โดยเพิ่มข้อมูลขึ้น eta เท่า จนรอบสุดท้ายเทรนด้วยชุด train ทั้งหมด
+#
+# feature matrix (แบ่ง train/validation แล้ว) เขียนเป็น .npy ครั้งเดียวต่อชุดข้อมูล ทุก worker เปิดแบบ memory-mapped ร่วมกัน
+# ผลของแต่ละ trial ต่อท้ายไฟล์ JSONL ทันทีที่เสร็จ รันคำสั่งเดิมซ้ำหลังถูกขัดจังหวะจะข้าม trial ที่มีผลแล้ว
+# ผลของ trial ไม่ขึ้นกับ objective จึงเปลี่ยน SLA/น้ำหนัก latency แล้วรันต่อจากผลเดิมได้
+
+TUNING_DIR = os.path.join(ROOT_DIR, '.cache', 'tuning')
+
+SEARCH_SPACES = {
+    'rf': {
+        'n_estimators': [30, 60, 100, 200],
+        'max_depth': [None, 8, 12, 16],
+        'min_samples_leaf': [1, 5, 20],
+        'max_features': ['sqrt', 0.5],
+    },
+    'xgb': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [3, 4, 6, 8],
+        'learning_rate': [0.03, 0.1, 0.3],
+        'subsample': [0.7, 1.0],
+        'colsample_bytree': [0.7, 1.0],
+    },
+    'mlp': {
+        'hidden_layer_sizes': [[32], [64], [100], [64, 32], [128, 64]],
+        'alpha': [1e-4, 1e-3, 1e-2],
+        'learning_rate_init': [1e-3, 3e-3],
+    },
+}
+# ค่าคงที่ของ MLP ตามหน้า 04 (เพิ่ม early_stopping ให้เวลาต่อ trial มีขอบเขต)
+MLP_BASE_PARAMS = dict(hidden_layer_sizes=(100,), activation='relu', solver='adam', max_iter=500,
+                       early_stopping=True, random_state=RANDOM_STATE)
+DATASETS = {'rf': 'loan', 'xgb': 'loan', 'mlp': 'diabetes'}
+
+N_CANDIDATES = 27
+ETA = 3
+# รอบแรกใช้ข้อมูลอย่างน้อยเท่านี้ (ข้อมูลน้อยกว่านี้ผลวัดแกว่งเกินไป)
+MIN_ROWS = 1000
+# latency ของการทำนายทีละแถว (แบบหน้า 01/03) วัดซ้ำเท่านี้ครั้งแล้วใช้ p50/p95
+LATENCY_REPEATS = 200
+BATCH_ROWS = 1000
+
+
+# ---------- ข้อมูล ----------
+
+# เขียน train/validation ของชุดข้อมูลเป็น bundle (.npy) แถวของ train สลับลำดับไว้แล้ว
+# ข้อมูล n แถวแรกจึงเป็นตัวอย่างสุ่มของ train และรอบที่ใหญ่กว่าครอบคลุมแถวของรอบก่อนเสมอ
+def prepare_data(dataset, csv_path):
+    sha256 = file_sha256(csv_path)
+    directory = os.path.join(TUNING_DIR, f'{dataset}-{fingerprint(sha256, FEATURE_PIPELINE_VERSION)[:16]}')
+    if os.path.exists(os.path.join(directory, 'meta.json')):
+        return directory
+
+    if dataset == 'loan':
+        features = loan_features(csv_path, sha256)
+    else:
+        features = diabetes_features(csv_path, sha256)
+    X_train, X_valid, y_train, y_valid = split_data(features['X'], features['y'])
+    if dataset == 'diabetes':
+        # MLP ต้องการข้อมูลที่ scale แล้ว (fit เฉพาะ train เหมือน train_diabetes_model)
+        from sklearn.preprocessing import StandardScaler
+        scaler = StandardScaler().fit(X_train)
+        X_train, X_valid = scaler.transform(X_train), scaler.transform(X_valid)
+
+    order = np.random.default_rng(RANDOM_STATE).permutation(len(X_train))
+    arrays = {
+        'X_train': np.asarray(X_train, dtype=np.float32)[order], 'y_train': np.asarray(y_train)[order],
+        'X_valid': np.asarray(X_valid, dtype=np.float32), 'y_valid': np.asarray(y_valid),
+    }
+    write_bundle(directory, arrays, {'dataset': dataset, 'path': csv_path, 'sha256': sha256})
+    return directory
+
+
+_data = {}
+
+
+def _load_data(directory):
+    if directory not in _data:
+        _data[directory] = read_bundle(directory)[0]
+    return _data[directory]
+
+
+# ---------- Trial ----------
+
+def make_model(family, params):
+    if family == 'rf':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(**dict(RF_PARAMS, **params, n_jobs=1))
+    if family == 'xgb':
+        import xgboost as xgb
+        return xgb.XGBClassifier(**dict(XGB_PARAMS, **params, n_jobs=1))
+    from sklearn.neural_network import MLPClassifier
+    return MLPClassifier(**dict(MLP_BASE_PARAMS, **params))
+
+
+# latency ทีละแถวใช้ต้นไม้ที่ compile แล้ว (แบบเดียวกับ LoanScorer.predictor) ส่วน batch ใช้โมเดลเดิม
+def measure_latency(model, X):
+    from core.trees import compile_ensemble
+
+    try:
+        single = compile_ensemble(model)
+    except ValueError:
+        single = model
+    row = np.ascontiguousarray(X[:1])
+    single.predict_proba(row)
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        started = time.perf_counter()
+        single.predict_proba(row)
+        timings.append(time.perf_counter() - started)
+
+    batch = np.ascontiguousarray(X[:BATCH_ROWS])
+    batch_timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        model.predict_proba(batch)
+        batch_timings.append(time.perf_counter() - started)
+    return {
+        'latency_p50_ms': float(np.percentile(timings, 50) * 1000),
+        'latency_p95_ms': float(np.percentile(timings, 95) * 1000),
+        'batch_ms': float(min(batch_timings) * 1000),
+    }
+
+
+def run_trial(task):
+    family, candidate, params, rows, directory = task
+    data = _load_data(directory)
+    X, y = np.asarray(data['X_train'][:rows]), np.asarray(data['y_train'][:rows])
+
+    started = time.perf_counter()
+    model = make_model(family, params).fit(X, y)
+    fit_time = time.perf_counter() - started
+    prob = model.predict_proba(data['X_valid'])[:, 1]
+    return dict(
+        {'candidate': candidate, 'rows': rows, 'params': params, 'fit_s': fit_time},
+        **_metrics(data['y_valid'], prob),
+        **measure_latency(model, data['X_valid']),
+        finished_at=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+def _init_worker():
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+
+
+# ---------- Successive halving ----------
+
+def sample_candidates(space, n_candidates, seed=RANDOM_STATE):
+    names = sorted(space)
+    grid = list(product(*(space[name] for name in names)))
+    picks = np.random.default_rng(seed).permutation(len(grid))[:n_candidates]
+    return [dict(zip(names, grid[i])) for i in picks]
+
+
+# [(จำนวน candidate, จำนวนแถว)] ของแต่ละรอบ รอบสุดท้ายใช้ train ทั้งหมด
+def rung_schedule(n_candidates, n_rows, eta=ETA, min_rows=MIN_ROWS):
+    n_rungs = 1
+    while eta ** n_rungs <= n_candidates and n_rows / eta ** n_rungs >= min_rows:
+        n_rungs += 1
+    return [(math.ceil(n_candidates / eta ** i), int(n_rows / eta ** (n_rungs - 1 - i))) for i in range(n_rungs)]
+
+
+# ยิ่งสูงยิ่งดี: ROC AUC หักด้วย latency (ms) คูณน้ำหนัก; trial ที่ latency p95 เกิน SLA อยู่ท้ายตารางเสมอ
+def objective(trial, latency_sla_ms=None, latency_weight=0.0):
+    score = trial['roc_auc'] - latency_weight * trial['latency_p95_ms']
+    if latency_sla_ms is not None and trial['latency_p95_ms'] > latency_sla_ms:
+        score -= 1.0
+    return score
+
+
+def load_store(store_path):
+    trials = {}
+    if os.path.exists(store_path):
+        with open(store_path) as f:
+            for line in f:
+                try:
+                    trial = json.loads(line)
+                except ValueError:
+                    continue  # บรรทัดที่เขียนไม่เสร็จตอนถูกขัดจังหวะ
+                trials[(trial['candidate'], trial['rows'])] = trial
+    return trials
+
+
+def append_store(store_path, trial):
+    with open(store_path, 'a') as f:
+        f.write(json.dumps(trial) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def default_store(family, directory, candidates, eta):
+    key = fingerprint(os.path.basename(directory), family, candidates, eta, MLP_BASE_PARAMS, RF_PARAMS, XGB_PARAMS)
+    return os.path.join(TUNING_DIR, f'{family}-{key[:16]}.jsonl')
+
+
+# รัน successive halving ของโมเดลหนึ่งตระกูล คืนค่าผลทุกรอบ (เรียงตาม objective) และ trial ที่ดีที่สุด
+# progress(trial) ถูกเรียกทุกครั้งที่ trial เสร็จ (รวม trial ที่อ่านจาก store)
+def run_search(family, csv_path=None, n_candidates=N_CANDIDATES, eta=ETA, workers=None, store_path=None,
+               latency_sla_ms=None, latency_weight=0.0, seed=RANDOM_STATE, progress=None):
+    dataset = DATASETS[family]
+    directory = prepare_data(dataset, csv_path or (LOAN_CSV if dataset == 'loan' else DIABETES_CSV))
+    n_rows = len(_load_data(directory)['y_train'])
+    candidates = sample_candidates(SEARCH_SPACES[family], n_candidates, seed)
+    store_path = store_path or default_store(family, directory, candidates, eta)
+    os.makedirs(os.path.dirname(os.path.abspath(store_path)), exist_ok=True)
+    done = load_store(store_path)
+    workers = workers or os.cpu_count() or 1
+
+    pool = None
+    if workers > 1:
+        # spawn: ไม่ fork process ที่มี thread อื่นทำงานอยู่
+        pool = ProcessPoolExecutor(workers, mp_context=mp.get_context('spawn'), initializer=_init_worker)
+    rungs, alive = [], list(range(len(candidates)))
+    try:
+        for size, rows in rung_schedule(len(candidates), n_rows, eta):
+            alive = alive[:size]
+            tasks = [(family, i, candidates[i], rows, directory) for i in alive if (i, rows) not in done]
+            for i in alive:
+                if (i, rows) in done and progress is not None:
+                    progress(done[(i, rows)])
+            if pool is not None:
+                results = (future.result() for future in as_completed([pool.submit(run_trial, t) for t in tasks]))
+            else:
+                results = map(run_trial, tasks)
+            for trial in results:
+                append_store(store_path, trial)
+                done[(trial['candidate'], trial['rows'])] = trial
+                if progress is not None:
+                    progress(trial)
+
+            ranked = sorted((dict(done[(i, rows)], score=objective(done[(i, rows)], latency_sla_ms, latency_weight))
+                             for i in alive), key=lambda t: (-t['score'], t['candidate']))
+            rungs.append({'rows': rows, 'trials': ranked})
+            alive = [t['candidate'] for t in ranked]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    best = rungs[-1]['trials'][0]
+    return {
+        'family': family, 'dataset': dataset, 'store': store_path, 'rungs': rungs, 'best': best,
+        'meets_sla': latency_sla_ms is None or best['latency_p95_ms'] <= latency_sla_ms,
+    }
@@ -1,114 +1,49 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 import pickle
+import plotly.express as px
+
+from core.explain import explain_frame, explain_one
+from core.loan import CHUNK_SIZE
+from core.parallel import MIN_PARALLEL_ROWS, WORKERS, get_parallel_scorer
+from core.prewarm import prewarm
+from core.registry import get_registry
+from core.sensitivity import SWEEP_RANGES, heatmap, response_curves
 
 # ตั้งค่าหน้าเว็บ
 st.set_page_config(page_title="แอปทำนายการผิดนัดชำระเงินกู้", layout="wide")
 
-# โหลดโมเดลที่เทรนไว้แล้ว
-@st.cache_resource
-def load_models():
-    try:
-        rf_model = joblib.load('models/rf_model.pkl')
-        xgb_model = joblib.load('models/xgb_model.pkl')
-        return rf_model, xgb_model
-    except Exception as e:
-        st.error(f"ไม่สามารถโหลดโมเดลได้: {e}")
-        return None, None
+MODEL_KEYS = {"Random Forest": 'rf', "XGBoost": 'xgb'}
+
+# โหลดเฉพาะโมเดลที่เลือกเมื่อใช้ครั้งแรก (เก็บไว้ใน registry กลางของ process)
+# ถ้าโมเดลหนึ่งโหลดไม่ได้ อีกโมเดลยังใช้งานได้ตามปกติ
+registry = get_registry()
 
-rf_model, xgb_model = load_models()
+def get_scorer(model_choice):
+    return registry.try_get(MODEL_KEYS[model_choice])
+
+def model_error(model_choice):
+    return registry.stats()[MODEL_KEYS[model_choice]]['error']
 
 # ฟังก์ชันสำหรับการทำนาย
 def predict(input_data, model_choice):
-    # แปลงข้อมูลเป็น DataFrame
-    input_df = pd.DataFrame([input_data])
-    
-    # ดึงรายชื่อคอลัมน์จากโมเดล
-    if model_choice == "Random Forest":
-        if hasattr(rf_model, 'feature_names_in_'):
-            feature_names = rf_model.feature_names_in_
-        else:
-            # ถ้าไม่มี feature_names_in_ ให้ดูจากโมเดล XGBoost แทน
-            if hasattr(xgb_model, 'feature_names_in_'):
-                feature_names = xgb_model.feature_names_in_
-            else:
-                # ถ้าไม่มีทั้งคู่ ให้แสดงข้อผิดพลาด
-                st.error("ไม่สามารถดึง feature names จากโมเดลได้")
-                return None, None
-    else:  # XGBoost
-        if hasattr(xgb_model, 'feature_names_in_'):
-            feature_names = xgb_model.feature_names_in_
-        else:
-            if hasattr(rf_model, 'feature_names_in_'):
-                feature_names = rf_model.feature_names_in_
-            else:
-                st.error("ไม่สามารถดึง feature names จากโมเดลได้")
-                return None, None
-    
-    # --- สร้างข้อมูลให้ตรงกับที่โมเดลถูกเทรนมา ---
-    
-    # 1. เริ่มด้วยการสร้าง DataFrame ที่มีคอลัมน์ครบตามโมเดล โดยใส่ค่า 0 ทั้งหมด
-    processed_data = pd.DataFrame(0, index=[0], columns=feature_names)
-    
-    # 2. ใส่ค่าตัวเลขลงไปโดยตรง
-    numeric_cols = ['age', 'income', 'loanamount', 'loanterm', 'creditscore', 'dtiratio']
-    for col in numeric_cols:
-        if col in input_data and col in processed_data.columns:
-            processed_data[col] = input_data[col]
-    
-    # 3. จัดการกับข้อมูล categorical โดยใช้ชื่อคอลัมน์ตรงตามที่โมเดลเรียนรู้
-    
-    # Education
-    if 'education' in input_data:
-        education = input_data['education']
-        if education == 'highschool' and 'education_High School' in processed_data.columns:
-            processed_data['education_High School'] = 1
-        elif education == 'graduate' and 'education_Bachelor\'s' in processed_data.columns:
-            processed_data['education_Bachelor\'s'] = 1
-        elif education == 'postgraduate':
-            if 'education_Master\'s' in processed_data.columns:
-                processed_data['education_Master\'s'] = 1
-            elif 'education_PhD' in processed_data.columns:
-                processed_data['education_PhD'] = 1
-    
-    # Employment Status
-    if 'employmentstatus' in input_data:
-        emp_status = input_data['employmentstatus']
-        if emp_status == 'fulltime' and 'employmenttype_Full-time' in processed_data.columns:
-            processed_data['employmenttype_Full-time'] = 1
-        elif emp_status == 'parttime' and 'employmenttype_Part-time' in processed_data.columns:
-            processed_data['employmenttype_Part-time'] = 1
-        elif emp_status == 'selfemployed' and 'employmenttype_Self-employed' in processed_data.columns:
-            processed_data['employmenttype_Self-employed'] = 1
-        elif emp_status == 'unemployed' and 'employmenttype_Unemployed' in processed_data.columns:
-            processed_data['employmenttype_Unemployed'] = 1
-    
-    # Marital Status
-    if 'maritalstatus' in input_data:
-        marital = input_data['maritalstatus']
-        if marital == 'single' and 'maritalstatus_Single' in processed_data.columns:
-            processed_data['maritalstatus_Single'] = 1
-        elif marital == 'married' and 'maritalstatus_Married' in processed_data.columns:
-            processed_data['maritalstatus_Married'] = 1
-        elif marital == 'divorced' and 'maritalstatus_Divorced' in processed_data.columns:
-            processed_data['maritalstatus_Divorced'] = 1
-    
+    scorer = get_scorer(model_choice)
+    if scorer is None:
+        st.error(f"ไม่สามารถโหลดโมเดลได้: {model_error(model_choice)}")
+        return None, None
+
     # ทำนายโดยใช้โมเดลที่เลือก
     try:
-        if model_choice == "Random Forest":
-            prediction = rf_model.predict(processed_data)
-            prob = rf_model.predict_proba(processed_data)[0][1]
-        else:  # XGBoost
-            prediction = xgb_model.predict(processed_data)
-            prob = xgb_model.predict_proba(processed_data)[0][1]
-        
-        return prediction[0], prob
+        result = scorer.predict_one(input_data)
     except Exception as e:
         st.error(f"เกิดข้อผิดพลาดในการทำนาย: {e}")
         return None, None
 
+    for item in result['unknown']:
+        st.warning(f"ไม่พบค่า '{item['value']}' ของ {item['field']} ในข้อมูลที่โมเดลเรียนรู้ จึงไม่ได้นำมาใช้ในการทำนาย")
+    return result['prediction'], result['probability']
+
 # UI
 st.title("ระบบทำนายการผิดนัดชำระเงินกู้")
 st.write("กรอกข้อมูลผู้กู้เพื่อประเมินความเสี่ยงในการผิดนัดชำระหนี้")
@@ -123,6 +58,7 @@ with col1:
     employment_status = st.selectbox("สถานะการทำงาน", 
                                      ["fulltime", "parttime", "selfemployed", "unemployed"])
     marital_status = st.selectbox("สถานภาพ", ["single", "married", "divorced"])
+    months_employed = st.slider("ระยะเวลาทำงาน (เดือน)", 0, 120, 24)
 
 with col2:
     st.subheader("ข้อมูลการเงิน")
@@ -130,6 +66,8 @@ with col2:
     loan_amount = st.number_input("จำนวนเงินกู้", min_value=1000, value=10000)
     loan_term = st.slider("ระยะเวลากู้ (เดือน)", 6, 60, 36)
     credit_score = st.slider("คะแนนเครดิต", 300, 850, 650)
+    num_credit_lines = st.slider("จำนวนวงเงินสินเชื่อที่มีอยู่", 1, 4, 2)
+    interest_rate = st.slider("อัตราดอกเบี้ย (%)", 2.0, 25.0, 12.0, step=0.01)
     
     # เพิ่ม DTI Ratio (Debt-to-Income)
     dti_ratio = st.slider("อัตราส่วนหนี้ต่อรายได้ (DTI)", 0.0, 1.0, 0.36, step=0.01)
@@ -147,6 +85,9 @@ input_data = {
     'loanamount': loan_amount,
     'loanterm': loan_term,
     'creditscore': credit_score,
+    'monthsemployed': months_employed,
+    'numcreditlines': num_credit_lines,
+    'interestrate': interest_rate,
     'dtiratio': dti_ratio
 }
 
@@ -155,7 +96,7 @@ input_data = {
 
 # ปุ่มทำนาย
 if st.button("ทำนายผล"):
-    if rf_model is not None and xgb_model is not None:
+    if get_scorer(model_choice) is not None:
         prediction, probability = predict(input_data, model_choice)
         
         if prediction is not None and probability is not None:
@@ -192,8 +133,118 @@ if st.button("ทำนายผล"):
                     st.info("คำแนะนำ: ควรตรวจสอบประวัติเพิ่มเติม")
                 else:
                     st.success("คำแนะนำ: สามารถพิจารณาอนุมัติได้")
+
+            # ปัจจัยที่ทำให้ผู้กู้รายนี้มีความเสี่ยงสูงขึ้น/ต่ำลง เทียบกับค่าเฉลี่ยของโมเดล
+            st.subheader("ปัจจัยที่มีผลต่อผลการทำนายนี้")
+            try:
+                contributions, expected = explain_one(get_scorer(model_choice), input_data)
+                top = contributions.head(8)[::-1]
+                fig = px.bar(x=top.values, y=top.index, orientation='h',
+                             color=np.where(top.values > 0, "เพิ่มความเสี่ยง", "ลดความเสี่ยง"),
+                             color_discrete_map={"เพิ่มความเสี่ยง": 'indianred', "ลดความเสี่ยง": 'seagreen'},
+                             labels={'x': "ผลต่อการทำนาย", 'y': "ปัจจัย", 'color': ""})
+                st.plotly_chart(fig, use_container_width=True)
+                units = "log-odds" if model_choice == "XGBoost" else "ความน่าจะเป็น"
+                st.caption(f"ค่าเริ่มต้นของโมเดล {expected:.3f} ({units}) + ผลรวมของทุกปัจจัย = ผลการทำนาย")
+            except ValueError as e:
+                st.info(f"ไม่สามารถอธิบายผลของโมเดลนี้ได้: {e}")
+    else:
+        st.error(f"ไม่สามารถทำนายได้เนื่องจากไม่พบโมเดล: {model_error(model_choice)}")
+
+# วิเคราะห์ What-if: ดูว่าความน่าจะเป็นเปลี่ยนอย่างไรถ้าค่าบางตัวเปลี่ยน (ทำนายทุกจุดในครั้งเดียว)
+SWEEP_LABELS = {
+    'creditscore': "คะแนนเครดิต",
+    'dtiratio': "อัตราส่วนหนี้ต่อรายได้ (DTI)",
+    'loanterm': "ระยะเวลากู้ (เดือน)",
+    'income': "รายได้ต่อปี",
+    'loanamount': "จำนวนเงินกู้",
+    'age': "อายุ",
+}
+
+st.header("วิเคราะห์ความไว (What-if)")
+if st.checkbox("แสดงผลเมื่อปรับค่าคะแนนเครดิต, DTI หรือระยะเวลากู้ ของผู้กู้รายนี้"):
+    scorer = get_scorer(model_choice)
+    if scorer is None:
+        st.error(f"ไม่สามารถโหลดโมเดลได้: {model_error(model_choice)}")
     else:
-        st.error("ไม่สามารถทำนายได้เนื่องจากไม่พบโมเดล")
+        sweep_features = st.multiselect("ค่าที่ต้องการปรับ", list(SWEEP_RANGES),
+                                        default=['creditscore', 'dtiratio', 'loanterm'],
+                                        format_func=SWEEP_LABELS.get)
+        points = st.slider("จำนวนจุดต่อแกน", 10, 200, 50)
+
+        if sweep_features:
+            curves = response_curves(scorer, input_data, sweep_features, points)
+            for column, (feature, (values, probs)) in zip(st.columns(len(curves)), curves.items()):
+                fig = px.line(x=values, y=probs, title=SWEEP_LABELS[feature],
+                              labels={'x': SWEEP_LABELS[feature], 'y': "โอกาสผิดนัด"})
+                fig.add_vline(x=input_data[feature], line_dash='dash', line_color='grey')
+                fig.update_layout(yaxis=dict(tickformat=".0%", range=[0, 1]))
+                column.plotly_chart(fig, use_container_width=True)
+
+        st.subheader("Heatmap สองตัวแปร")
+        hcol1, hcol2 = st.columns(2)
+        x_feature = hcol1.selectbox("แกน X", list(SWEEP_RANGES), index=0, format_func=SWEEP_LABELS.get)
+        y_feature = hcol2.selectbox("แกน Y", list(SWEEP_RANGES), index=1, format_func=SWEEP_LABELS.get)
+        if x_feature == y_feature:
+            st.warning("เลือกตัวแปรแกน X และ Y ที่ต่างกัน")
+        else:
+            x_values, y_values, grid = heatmap(scorer, input_data, x_feature, y_feature, points)
+            fig = px.imshow(grid, x=x_values, y=y_values, origin='lower', aspect='auto',
+                            color_continuous_scale='RdYlGn_r', zmin=0, zmax=1,
+                            labels={'x': SWEEP_LABELS[x_feature], 'y': SWEEP_LABELS[y_feature], 'color': "โอกาสผิดนัด"})
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"ทำนาย {grid.size:,} จุดด้วยการเรียกโมเดลครั้งเดียว")
+
+# ทำนายแบบไฟล์ CSV (Batch)
+st.header("ทำนายจากไฟล์ CSV")
+st.write("อัปโหลดไฟล์ข้อมูลผู้กู้หลายรายการ (ชื่อคอลัมน์เดียวกับข้อมูลด้านบนหรือชุดข้อมูล Loan Default) เพื่อทำนายพร้อมกันทั้งไฟล์")
+
+uploaded_file = st.file_uploader("เลือกไฟล์ CSV", type="csv")
+batch_chunk_size = st.number_input("จำนวนแถวต่อรอบการทำนาย", min_value=1000, max_value=200000,
+                                   value=CHUNK_SIZE, step=1000)
+explain_batch = st.checkbox("เพิ่มคอลัมน์ผลของแต่ละปัจจัย (contribution) ในไฟล์ผลลัพธ์")
+# ไฟล์ใหญ่แบ่งแถวให้หลาย process ทำนายพร้อมกัน (worker โหลดโมเดลครั้งเดียวแล้วใช้ต่อ)
+parallel_batch = WORKERS > 1 and st.checkbox(
+    f"ทำนายด้วย {WORKERS} process (สำหรับไฟล์ตั้งแต่ {MIN_PARALLEL_ROWS:,} แถว)", value=True)
+
+if uploaded_file is not None and st.button("ทำนายทั้งไฟล์"):
+    scorer = get_scorer(model_choice)
+
+    if scorer is None:
+        st.error(f"ไม่สามารถทำนายได้เนื่องจากไม่พบโมเดล: {model_error(model_choice)}")
+    else:
+        try:
+            batch_df = pd.read_csv(uploaded_file)
+            with st.spinner(f"กำลังทำนาย {len(batch_df):,} แถว..."):
+                batch_scorer = get_parallel_scorer(MODEL_KEYS[model_choice]) if parallel_batch else scorer
+                result_df, unknown = batch_scorer.predict_frame(batch_df, int(batch_chunk_size))
+            if explain_batch:
+                with st.spinner("กำลังคำนวณผลของแต่ละปัจจัย..."):
+                    contributions = explain_frame(scorer, batch_df, int(batch_chunk_size))
+                result_df = result_df.join(contributions.add_prefix('contrib_'))
+
+            for field, values in unknown.items():
+                st.warning(f"คอลัมน์ {field} มีค่าที่โมเดลไม่รู้จัก: {', '.join(map(str, values))}")
+
+            b_col1, b_col2, b_col3 = st.columns(3)
+            b_col1.metric("จำนวนผู้กู้", f"{len(result_df):,}")
+            b_col2.metric("คาดว่าผิดนัดชำระ", f"{int(result_df['prediction'].sum()):,}")
+            b_col3.metric("ความน่าจะเป็นเฉลี่ย", f"{result_df['default_probability'].mean()*100:.2f}%")
+
+            st.dataframe(result_df.head(100))
+            st.download_button("ดาวน์โหลดผลการทำนาย",
+                               data=result_df.to_csv(index=False).encode('utf-8'),
+                               file_name="loan_predictions.csv",
+                               mime="text/csv")
+        except Exception as e:
+            st.error(f"เกิดข้อผิดพลาดในการทำนาย: {e}")
+
+# สถานะการโหลดโมเดล (เวลาโหลด ขนาด และข้อผิดพลาดของแต่ละโมเดล)
+with st.expander("สถานะการโหลดโมเดล"):
+    st.json(registry.stats())
+    # ผู้กู้ที่ส่งข้อมูลเดิมซ้ำจะได้ผลจาก cache (ล้างอัตโนมัติเมื่อไฟล์โมเดลเปลี่ยน)
+    st.write("Cache ผลการทำนาย")
+    st.json(registry.prediction_cache.stats())
 
 # คำอธิบายเพิ่มเติม
 with st.expander("คำอธิบายเกี่ยวกับโมเดล"):
@@ -202,4 +253,7 @@ with st.expander("คำอธิบายเกี่ยวกับโมเ
     - **XGBoost**: เป็นอัลกอริทึมแบบ gradient boosting ที่มีประสิทธิภาพสูง เหมาะกับข้อมูลที่ซับซ้อน
     
     ข้อมูลที่ใช้ในการทำนาย ได้แก่ อายุ การศึกษา สถานะการทำงาน สถานภาพ รายได้ จำนวนเงินกู้ ระยะเวลากู้ คะแนนเครดิต และอัตราส่วนหนี้ต่อรายได้
-    """)
\ No newline at end of file
+    """)
+
+# เตรียม module และโมเดลของหน้าอื่นไว้เบื้องหลัง หลังจากแสดงผลหน้านี้แล้ว
+prewarm()
@@ -1,14 +1,18 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.impute import SimpleImputer
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-import xgboost as xgb
-from sklearn.metrics import accuracy_score, classification_report
 import plotly.express as px
 import plotly.graph_objects as go
 
+from core.crossval import CV_FOLDS, cached_cross_validation, cross_validate
+from core.dataset import LOAN_CSV
+from core.evaluation import (
+    contribution_importance, evaluate_loan_model, feature_importance, loan_data_available, loan_summary,
+)
+from core.explain import summary_label
+from core.prewarm import prewarm
+from core.registry import get_registry
+
 # ตั้งค่าหน้าเว็บ
 st.set_page_config(
     page_title="วิเคราะห์และพยากรณ์การผิดนัดชำระหนี้",
@@ -20,6 +24,12 @@ st.set_page_config(
 st.title("⭐️ วิเคราะห์และพยากรณ์การผิดนัดชำระหนี้ (Loan Default Prediction)")
 st.markdown("การวิเคราะห์ข้อมูลสินเชื่อและใช้ Machine Learning มาช่วยคาดการณ์ว่าผู้ขอสินเชื่อจะ \"ผิดนัดชำระหนี้\"หรือไม่")
 
+MODEL_KEYS = {"Random Forest": 'rf', "XGBoost": 'xgb'}
+
+# โมเดลจริงจาก registry กลาง และข้อมูลจริงถ้ามีไฟล์ (ผลการคำนวณถูก cache ตาม sha256 ของข้อมูลและโมเดล)
+registry = get_registry()
+data_ready = loan_data_available()
+
 tab0, tab1, tab2, tab3, tab4 = st.tabs(["📚 ทฤษฎี", "📊 ข้อมูล", "🔄 เตรียมข้อมูล", "🤖 โมเดล", "📈 ผลลัพธ์"])
 
 with tab0:
@@ -111,7 +121,18 @@ df = pd.read_csv('/content/Loan_default.csv')
         
         return pd.DataFrame(data)
     
-    df = generate_sample_data()
+    if data_ready:
+        summary = loan_summary()
+        df = summary['head']
+    else:
+        st.info(f"ไม่พบไฟล์ข้อมูล {LOAN_CSV} จึงแสดงข้อมูลตัวอย่างแทน (ดาวน์โหลดได้จาก Kaggle ตามลิงก์ด้านล่าง)")
+        df = generate_sample_data()
+        summary = {
+            'rows': len(df),
+            'columns': len(df.columns),
+            'describe': df.describe().round(2),
+            'default_rate': df['default'].mean(),
+        }
     
     # แสดงข้อมูล
     st.subheader("🔍 สำรวจข้อมูล")
@@ -120,13 +141,16 @@ df = pd.read_csv('/content/Loan_default.csv')
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("📊 สถิติข้อมูล")
-        st.dataframe(df.describe().round(2))
+        st.dataframe(summary['describe'])
     
     with col2:
         st.subheader("ℹ️ ข้อมูลทั่วไป")
-        st.write(f"จำนวนข้อมูล: {len(df)} แถว")
-        st.write(f"จำนวนคอลัมน์: {len(df.columns)} คอลัมน์")
-        st.write(f"อัตราการผิดนัดชำระหนี้: {df['default'].mean()*100:.2f}%")
+        st.write(f"จำนวนข้อมูล: {summary['rows']:,} แถว")
+        st.write(f"จำนวนคอลัมน์: {summary['columns']} คอลัมน์")
+        st.write(f"อัตราการผิดนัดชำระหนี้: {summary['default_rate']*100:.2f}%")
+        if data_ready:
+            missing = summary['missing'][summary['missing'] > 0]
+            st.write(f"คอลัมน์ที่มีค่าหายไป: {', '.join(f'{c} ({n:,})' for c, n in missing.items()) or 'ไม่มี'}")
 
      # แสดงที่มาของข้อมูล
     st.subheader("📚 ที่มาของข้อมูล")
@@ -168,9 +192,10 @@ df[['loanamount', 'creditscore']] = imputer.fit_transform(df[['loanamount', 'cre
     
     with col2:
         st.subheader("หลังการจัดการค่าหายไป")
-        imputer = SimpleImputer(strategy='mean')
+        # ผลเท่ากับ SimpleImputer(strategy='mean') โดยไม่ต้อง import sklearn/scipy ทั้งชุดเพื่อข้อมูล 10 แถว
         fixed_df = missing_df.copy()
-        fixed_df[['loanamount', 'creditscore']] = imputer.fit_transform(missing_df[['loanamount', 'creditscore']])
+        fixed_df[['loanamount', 'creditscore']] = missing_df[['loanamount', 'creditscore']].fillna(
+            missing_df[['loanamount', 'creditscore']].mean())
         st.dataframe(fixed_df[['loanamount', 'creditscore']])
         
         # แสดงจำนวนค่าหายไป
@@ -328,82 +353,157 @@ xgb_model.fit(X_train, y_train)
 with tab4:
     st.header("📈 ผลลัพธ์")
     
-    # สร้างผลลัพธ์สมมติ
-    rf_accuracy = 0.82
-    xgb_accuracy = 0.87
+    # โมเดลที่โหลดได้ (ถ้าไฟล์โมเดลใดหายไป ยังแสดงผลของโมเดลที่เหลือ)
+    scorers = {}
+    for name, key in MODEL_KEYS.items():
+        scorer = registry.try_get(key)
+        if scorer is None:
+            st.warning(f"ไม่สามารถโหลดโมเดล {name} ได้: {registry.stats()[key]['error']}")
+        else:
+            scorers[name] = scorer
     
     # แสดงผลลัพธ์
     st.subheader("🎯 สรุปผลลัพธ์")
     
-    # สร้างกราฟเปรียบเทียบ
-    models = ['Random Forest', 'XGBoost']
-    accuracy = [rf_accuracy, xgb_accuracy]
-    
-    fig = px.bar(
-        x=models, 
-        y=accuracy,
-        text=[f"{acc:.2%}" for acc in accuracy],
-        color=accuracy,
-        color_continuous_scale='Blues',
-        title="เปรียบเทียบความแม่นยำของโมเดล"
-    )
-    fig.update_layout(
-        xaxis_title="โมเดล",
-        yaxis_title="ความแม่นยำ (Accuracy)",
-        yaxis=dict(tickformat=".0%", range=[0, 1])
-    )
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # แสดงผลลัพธ์การทำนาย
-    st.subheader("ตัวอย่างผลการทำนาย")
-    
-    # สร้างข้อมูลตัวอย่างการทำนาย
-    predictions = {
-        'ลูกค้า ID': [1001, 1002, 1003, 1004, 1005],
-        'อายุ': [35, 42, 28, 55, 33],
-        'รายได้': [50000, 80000, 35000, 120000, 65000],
-        'ยอดสินเชื่อ': [25000, 65000, 15000, 85000, 35000],
-        'ทำนาย (Random Forest)': ['ไม่ผิดนัด', 'ไม่ผิดนัด', 'ผิดนัด', 'ไม่ผิดนัด', 'ผิดนัด'],
-        'ทำนาย (XGBoost)': ['ไม่ผิดนัด', 'ไม่ผิดนัด', 'ผิดนัด', 'ไม่ผิดนัด', 'ไม่ผิดนัด'],
-        'ค่าจริง': ['ไม่ผิดนัด', 'ไม่ผิดนัด', 'ผิดนัด', 'ไม่ผิดนัด', 'ผิดนัด']
-    }
-    predictions_df = pd.DataFrame(predictions)
-    st.dataframe(predictions_df)
+    evaluations = {}
+    if not data_ready:
+        st.info("ต้องมีไฟล์ข้อมูลจริงจึงจะคำนวณความแม่นยำและ confusion matrix บนชุดทดสอบได้")
+    elif scorers:
+        with st.spinner("กำลังประเมินโมเดลบนชุดทดสอบ (ครั้งแรกเท่านั้น)..."):
+            evaluations = {name: evaluate_loan_model(MODEL_KEYS[name], scorer) for name, scorer in scorers.items()}
+        
+        # สร้างกราฟเปรียบเทียบ
+        models = list(evaluations)
+        accuracy = [evaluations[name]['accuracy'] for name in models]
+        
+        fig = px.bar(
+            x=models, 
+            y=accuracy,
+            text=[f"{acc:.2%}" for acc in accuracy],
+            color=accuracy,
+            color_continuous_scale='Blues',
+            title=f"เปรียบเทียบความแม่นยำของโมเดล (ชุดทดสอบ {evaluations[models[0]]['test_rows']:,} แถว)"
+        )
+        fig.update_layout(
+            xaxis_title="โมเดล",
+            yaxis_title="ความแม่นยำ (Accuracy)",
+            yaxis=dict(tickformat=".0%", range=[0, 1])
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Confusion matrix
+        st.subheader("Confusion Matrix")
+        labels = ['ไม่ผิดนัด', 'ผิดนัด']
+        for column, name in zip(st.columns(len(models)), models):
+            fig = px.imshow(
+                evaluations[name]['confusion_matrix'],
+                x=labels,
+                y=labels,
+                text_auto=True,
+                color_continuous_scale='Blues',
+                labels=dict(x="ทำนาย", y="ค่าจริง", color="จำนวน"),
+                title=name
+            )
+            column.plotly_chart(fig, use_container_width=True)
+        
+        # Classification report
+        st.subheader("Classification Report")
+        for name in models:
+            report = pd.DataFrame(evaluations[name]['report']).T
+            st.write(name)
+            st.dataframe(report.round(3))
+        
+        # แสดงผลลัพธ์การทำนาย
+        st.subheader("ตัวอย่างผลการทำนาย")
+        first = evaluations[models[0]]['sample']
+        predictions_df = first[['age', 'income', 'loanamount']].rename(
+            columns={'age': 'อายุ', 'income': 'รายได้', 'loanamount': 'ยอดสินเชื่อ'})
+        for name in models:
+            predictions_df[f'ทำนาย ({name})'] = np.where(evaluations[name]['sample']['prediction'] == 1, 'ผิดนัด', 'ไม่ผิดนัด')
+        predictions_df['ค่าจริง'] = np.where(first['actual'] == 1, 'ผิดนัด', 'ไม่ผิดนัด')
+        st.dataframe(predictions_df)
+
+    # Cross-validation: เทรน RF/XGBoost ใหม่ทีละ fold ด้วยพารามิเตอร์เดียวกับ training pipeline
+    # ผลถูก cache ตาม sha256 ของข้อมูล คำนวณครั้งเดียวเมื่อกดปุ่ม
+    st.subheader(f"🔁 Cross-validation (Stratified {CV_FOLDS}-fold)")
+    if not data_ready:
+        st.info("ต้องมีไฟล์ข้อมูลจริงจึงจะทำ cross-validation ได้")
+    else:
+        cv_results = {name: cached_cross_validation(key) for name, key in MODEL_KEYS.items()}
+        cv_button = st.empty()
+        if None in cv_results.values() and cv_button.button("รัน cross-validation"):
+            cv_button.empty()
+            with st.spinner("กำลังเทรนแต่ละ fold พร้อมกัน (ครั้งแรกเท่านั้น)..."):
+                cv_results = {name: cross_validate(key) for name, key in MODEL_KEYS.items()}
+        cv_results = {name: result for name, result in cv_results.items() if result is not None}
+        if cv_results:
+            cv_df = pd.DataFrame([{
+                'โมเดล': name,
+                'Accuracy': f"{r['summary']['accuracy']['mean']:.4f} ± {r['summary']['accuracy']['std']:.4f}",
+                'ROC AUC': f"{r['summary']['roc_auc']['mean']:.4f} ± {r['summary']['roc_auc']['std']:.4f}",
+                'เวลาเทรนรวม (s)': round(r['fit_s'], 1),
+                'เวลาจริง (s)': round(r['wall_s'], 1),
+            } for name, r in cv_results.items()])
+            st.dataframe(cv_df, hide_index=True)
+
+            folds_df = pd.concat([pd.DataFrame(r['folds']).assign(model=name) for name, r in cv_results.items()])
+            fig = px.bar(folds_df, x='fold', y='roc_auc', color='model', barmode='group',
+                         title="ROC AUC ของแต่ละ fold")
+            fig.update_layout(xaxis_title="Fold", yaxis_title="ROC AUC")
+            st.plotly_chart(fig, use_container_width=True)
+            with st.expander("ผลของแต่ละ fold"):
+                st.dataframe(folds_df.round(4), hide_index=True)
     
     # แสดงข้อมูลปัจจัยที่สำคัญ
-    st.subheader("ปัจจัยสำคัญในการทำนาย")
-    
-    # สร้างข้อมูลสำหรับแสดงความสำคัญของปัจจัย
-    feature_importance = {
-        'ปัจจัย': ['คะแนนเครดิต', 'รายได้', 'อายุ', 'อัตราดอกเบี้ย', 'จำนวนเดือนที่ทำงาน'],
-        'ความสำคัญ': [0.35, 0.25, 0.15, 0.12, 0.08]
-    }
-    feature_df = pd.DataFrame(feature_importance)
-    
-    # สร้างกราฟแสดงความสำคัญของปัจจัย
-    fig = px.bar(
-        feature_df,
-        x='ความสำคัญ',
-        y='ปัจจัย',
-        orientation='h',
-        color='ความสำคัญ',
-        color_continuous_scale='Blues',
-        title="ความสำคัญของปัจจัยในการทำนาย"
-    )
-    fig.update_layout(
-        xaxis_title="ความสำคัญ",
-        yaxis_title="ปัจจัย",
-        xaxis=dict(tickformat=".0%"),
-        yaxis=dict(categoryorder='total ascending')
-    )
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # สรุปความแม่นยำ
-    st.subheader("สรุปความแม่นยำของโมเดล")
-    st.markdown(f"""
-    - Random Forest ได้ความแม่นยำประมาณ {rf_accuracy:.2%}
-    - XGBoost ได้ความแม่นยำสูงขึ้น {xgb_accuracy:.2%}
-    """)
+    if scorers:
+        st.subheader("ปัจจัยสำคัญในการทำนาย")
+        
+        importance_model = st.selectbox("โมเดล", list(scorers))
+        importance = feature_importance(MODEL_KEYS[importance_model], scorers[importance_model])
+        feature_df = importance.head(10).rename_axis('ปัจจัย').reset_index(name='ความสำคัญ')
+        
+        # สร้างกราฟแสดงความสำคัญของปัจจัย
+        fig = px.bar(
+            feature_df,
+            x='ความสำคัญ',
+            y='ปัจจัย',
+            orientation='h',
+            color='ความสำคัญ',
+            color_continuous_scale='Blues',
+            title=f"ความสำคัญของปัจจัยในการทำนาย ({importance_model}, 10 อันดับแรก)"
+        )
+        fig.update_layout(
+            xaxis_title="ความสำคัญ",
+            yaxis_title="ปัจจัย",
+            xaxis=dict(tickformat=".0%"),
+            yaxis=dict(categoryorder='total ascending')
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # ความสำคัญจากผลของแต่ละปัจจัยต่อการทำนายรายคน (เฉลี่ยค่าสัมบูรณ์บนข้อมูลอ้างอิง)
+        try:
+            contribution_df = contribution_importance(MODEL_KEYS[importance_model], scorers[importance_model])
+        except ValueError:
+            contribution_df = None
+        if contribution_df is not None:
+            fig = px.bar(
+                contribution_df.head(10).rename_axis('ปัจจัย').reset_index(name='ผลเฉลี่ย'),
+                x='ผลเฉลี่ย',
+                y='ปัจจัย',
+                orientation='h',
+                color='ผลเฉลี่ย',
+                color_continuous_scale='Blues',
+                title=f"ผลเฉลี่ยของแต่ละปัจจัยต่อการทำนายรายคน ({importance_model}, {summary_label(scorers[importance_model])})"
+            )
+            fig.update_layout(yaxis=dict(categoryorder='total ascending'))
+            st.plotly_chart(fig, use_container_width=True)
+    
+    # สรุปความแม่นยำ (จากผลประเมินบนชุดทดสอบด้านบน)
+    if evaluations:
+        st.subheader("สรุปความแม่นยำของโมเดล")
+        st.markdown("\n".join(
+            f"- {name} ได้ความแม่นยำประมาณ {evaluation['accuracy']:.2%}" for name, evaluation in evaluations.items()
+        ))
     
     # แสดงแนวทางการพัฒนาต่อ
     st.subheader("แนวทางการพัฒนาต่อ")
@@ -412,4 +512,7 @@ with tab4:
     2. ทดลองใช้โมเดล Machine Learning อื่นๆ เช่น Neural Network
     3. เพิ่มข้อมูลเพื่อให้โมเดลเรียนรู้ได้ดีขึ้น
     4. ทำ Feature Engineering เพื่อสร้างปัจจัยใหม่ที่มีความสัมพันธ์สูงกับการผิดนัดชำระ
-    """)
\ No newline at end of file
+    """)
+
+# เตรียม module และโมเดลของหน้าอื่นไว้เบื้องหลัง หลังจากแสดงผลหน้านี้แล้ว
+prewarm()
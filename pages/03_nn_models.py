@@ -1,32 +1,33 @@
 import streamlit as st
 import numpy as np
-from tensorflow.keras.models import load_model
-import joblib  # ใช้โหลดตัว scaler ที่เทรนไว้
-
-# โหลดโมเดลที่เทรนไว้
-@st.cache_resource
-def load_trained_model():
-    try:
-        model = load_model('models/mlp_model.h5')  # ตรวจสอบว่าไฟล์โมเดลอยู่ใน path นี้จริง
-        scaler = joblib.load('models/scaler.pkl')  # โหลดตัวปรับสเกลที่ใช้ตอนเทรนโมเดล
-        return model, scaler
-    except Exception as e:
-        st.error(f"ไม่สามารถโหลดโมเดลหรือ scaler ได้: {e}")
-        return None, None
-
-model, scaler = load_trained_model()
+
+from core.prewarm import prewarm
+from core.registry import get_registry
+
+# โหลดโมเดลจาก registry กลางของ process (ใช้ models/mlp_model.npz ที่ไม่ต้อง import TensorFlow ถ้ามี)
+registry = get_registry()
+scorer = registry.try_get('mlp')
 
 # หากโหลดโมเดลไม่สำเร็จ ให้หยุดการทำงาน
-if model is None or scaler is None:
+if scorer is None:
+    st.error(f"ไม่สามารถโหลดโมเดลหรือ scaler ได้: {registry.stats()['mlp']['error']}")
     st.stop()
 
+# รวมคำขอจากหลาย session ที่เข้ามาพร้อมกันให้เรียกโมเดลครั้งเดียว
+scorer.enable_batching(max_batch_size=64, max_wait_ms=5)
+
 # ฟังก์ชันทำนายผลเบาหวาน
 def predict_diabetes(gender, age, hypertension, heart_disease, bmi, hbA1c, blood_glucose):
-    input_data = np.array([[gender, age, hypertension, heart_disease, bmi, hbA1c, blood_glucose]])
-    input_data_scaled = scaler.transform(input_data)  # ใช้ scaler ที่โหลดมา
-    prediction = model.predict(input_data_scaled)[0, 0]  # ดึงค่าเดียวจาก array
-    
-    return "ท่านมีโอกาสเป็นโรคเบาหวาน" if prediction >= 0.5 else "ท่านไม่มีโอกาสเป็นโรคเบาหวาน"
+    result = scorer.predict_one({
+        'gender': gender,
+        'age': age,
+        'hypertension': hypertension,
+        'heart_disease': heart_disease,
+        'bmi': bmi,
+        'HbA1c_level': hbA1c,
+        'blood_glucose_level': blood_glucose,
+    })
+    return result['message']
 
 # ส่วนของ UI
 st.title("ทำนายการเกิดโรคเบาหวาน")
@@ -41,12 +42,18 @@ bmi = st.number_input("ดัชนีมวลกาย (BMI)", min_value=10.0,
 hbA1c = st.number_input("ระดับ HbA1c (%)", min_value=4.0, max_value=15.0, value=6.0, step=0.1)
 blood_glucose = st.number_input("ระดับน้ำตาลในเลือด (mg/dL)", min_value=50, max_value=500, value=120, step=1)
 
-# แปลงค่าที่เป็นข้อความให้เป็นตัวเลข
-gender = 1 if gender == "หญิง" else 0
-hypertension = 1 if hypertension == "ใช่" else 0
-heart_disease = 1 if heart_disease == "ใช่" else 0
+# ค่าที่เป็นข้อความ (เพศ, ใช่/ไม่ใช่) จะถูกแปลงเป็นตัวเลขใน core.diabetes ให้ตรงกับตอนเทรน
 
 # ปุ่มทำนาย
 if st.button("ทำนาย"):
     result = predict_diabetes(gender, age, hypertension, heart_disease, bmi, hbA1c, blood_glucose)
-    st.success(result)
\ No newline at end of file
+    st.success(result)
+
+# สถิติการรวมคำขอเป็น batch และ cache ผลการทำนาย
+with st.expander("สถิติการรวมคำขอ (micro-batching)"):
+    st.json(scorer.batcher.stats())
+    st.write("Cache ผลการทำนาย")
+    st.json(registry.prediction_cache.stats())
+
+# เตรียม module และโมเดลของหน้าอื่นไว้เบื้องหลัง หลังจากแสดงผลหน้านี้แล้ว
+prewarm()
@@ -1,14 +1,14 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.impute import SimpleImputer
-from sklearn.model_selection import train_test_split
 import plotly.express as px
 import plotly.graph_objects as go
-from sklearn.neural_network import MLPClassifier
-import seaborn as sns
-import matplotlib.pyplot as plt
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, classification_report
+from importlib.metadata import version
+
+from core.artifacts import cached_sha256, fingerprint, get_artifact_cache
+from core.crossval import CV_FOLDS, cached_cross_validation, cross_validate
+from core.dataset import DIABETES_CSV, load_diabetes
+from core.prewarm import prewarm
 
 
 # ตั้งค่าหน้าเว็บ
@@ -67,7 +67,7 @@ with tab1:
     with st.expander("แสดงโค้ด"):
         st.code("""
 import pandas as pd
-df = pd.read_csv('diabetes.csv')
+df = pd.read_csv('data/diabetes_dataset.csv')
         """)
     
     # สร้างข้อมูลตัวอย่าง
@@ -87,22 +87,26 @@ df = pd.read_csv('diabetes.csv')
         }
         return pd.DataFrame(data)
     
+    # ตัวอย่างข้อมูลสำหรับสาธิตการเตรียมข้อมูลในแท็บถัดไป
     df = generate_sample_data()
+
+    # ข้อมูลจริงทั้งชุด อ่านจากไฟล์ sidecar แบบคอลัมน์ (แปลงจาก CSV ครั้งเดียว)
+    data_df = load_diabetes()
     
     # แสดงข้อมูล
     st.subheader("🔍 สำรวจข้อมูล")
-    st.dataframe(df.head())
+    st.dataframe(data_df.head())
     
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("📊 สถิติข้อมูล")
-        st.dataframe(df.describe().round(2))
+        st.dataframe(data_df.describe().round(2))
     
     with col2:
         st.subheader("ℹ️ ข้อมูลทั่วไป")
-        st.write(f"จำนวนข้อมูล: {len(df)} แถว")
-        st.write(f"จำนวนคอลัมน์: {len(df.columns)} คอลัมน์")
-        st.write(f"อัตราการเป็นเบาหวาน: {df['Outcome'].mean()*100:.2f}%")
+        st.write(f"จำนวนข้อมูล: {len(data_df):,} แถว")
+        st.write(f"จำนวนคอลัมน์: {len(data_df.columns)} คอลัมน์")
+        st.write(f"อัตราการเป็นเบาหวาน: {data_df['diabetes'].mean()*100:.2f}%")
 
     st.subheader("📚 ที่มาของข้อมูล")
     st.markdown("""
@@ -136,6 +140,7 @@ df[['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']] = imputer.fi
     
     with col2:
         st.subheader("หลังการจัดการค่าหายไป")
+        from sklearn.impute import SimpleImputer
         imputer = SimpleImputer(strategy='mean')
         fixed_df = missing_df.copy()
         fixed_df[['Glucose', 'BMI']] = imputer.fit_transform(missing_df[['Glucose', 'BMI']])
@@ -197,6 +202,7 @@ with tab3:
     # เตรียมข้อมูล
     X = fixed_df.drop(columns=['Outcome'])
     y = fixed_df['Outcome']
+    from sklearn.model_selection import train_test_split
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
     # โมเดล MLP
@@ -211,16 +217,28 @@ mlp_model.fit(X_train, y_train)
 y_pred_mlp = mlp_model.predict(X_test)
         """)
 
-    # ฝึกโมเดล MLP
-    mlp_model = MLPClassifier(hidden_layer_sizes=(100,), activation='relu', solver='adam', max_iter=500, random_state=42)
-    mlp_model.fit(X_train, y_train)
+    # ฝึกโมเดล MLP ครั้งเดียวต่อชุดข้อมูล + พารามิเตอร์ แล้วเก็บผลไว้บนดิสก์ (rerun ไม่ต้องเทรนใหม่)
+    mlp_params = dict(hidden_layer_sizes=(100,), activation='relu', solver='adam', max_iter=500, random_state=42)
+
+    def train_mlp():
+        from sklearn.metrics import classification_report
+        from sklearn.neural_network import MLPClassifier
+
+        model = MLPClassifier(**mlp_params)
+        model.fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+        return {'model': model, 'y_pred': y_pred, 'report': classification_report(y_test, y_pred)}
+
+    mlp_key = fingerprint(X_train, y_train, X_test, y_test, mlp_params, version('scikit-learn'))
+    trained = get_artifact_cache().get_or_build('mlp_classifier', mlp_key, train_mlp)
+    mlp_model = trained['model']
     
     # ทำนายด้วย MLP
-    y_pred_mlp = mlp_model.predict(X_test)
+    y_pred_mlp = trained['y_pred']
 
     # แสดงผลลัพธ์การประเมินผล
     st.subheader("ผลลัพธ์การประเมินผล MLP")
-    st.write(classification_report(y_test, y_pred_mlp))
+    st.write(trained['report'])
 
     # แสดงโครงสร้างของ MLP
     st.subheader("โครงสร้าง MLP (Neural Network)")
@@ -238,15 +256,64 @@ y_pred_mlp = mlp_model.predict(X_test)
 
     st.success("✅ เทรนโมเดล MLP เสร็จสิ้น")
 
+    # MLP แบบเดียวกับที่หน้า 03 ใช้ เทรนบน data/diabetes_dataset.csv ทั้งไฟล์โดยอ่านทีละ chunk
+    # encode gender ด้วยรหัสเดียวกับหน้า 03 และหยุดเมื่อ validation loss ไม่ดีขึ้น
+    st.subheader("🧪 เทรนบนข้อมูลจริงทั้งชุด (streaming + early stopping)")
+    with st.expander("แสดงโค้ด"):
+        st.code("""
+from core.training import train_diabetes_streaming
+
+results, data = train_diabetes_streaming('data/diabetes_dataset.csv',
+                                         dict(epochs=10, batch_size=256, patience=2),
+                                         progress=print)
+# หรือจาก command line: python train.py --models mlp --stream --epochs 50 --patience 3
+        """)
+    stream_params = dict(epochs=10, batch_size=256, patience=2)
+    stream_key = fingerprint(cached_sha256(DIABETES_CSV), stream_params)
+    cache = get_artifact_cache()
+    epoch_table = st.empty()
+
+    def show_epochs(history):
+        epoch_table.dataframe(pd.DataFrame(history).set_index('epoch'), use_container_width=True)
+
+    def train_streaming():
+        from core.training import train_diabetes_streaming
+
+        history = []
+
+        def progress(record):
+            history.append(record)
+            show_epochs(history)
+
+        results, data = train_diabetes_streaming(DIABETES_CSV, stream_params, progress)
+        return {'history': history, 'metrics': results['mlp']['metrics'], 'split': data['split'],
+                'train_time_s': results['mlp']['train_time_s']}
+
+    if cache.contains('mlp_streaming', stream_key) or st.button("เริ่มเทรนบนข้อมูลจริง"):
+        with st.spinner("กำลังเทรน (อ่านไฟล์ทีละ chunk)..."):
+            streamed = cache.get_or_build('mlp_streaming', stream_key, train_streaming)
+        show_epochs(streamed['history'])
+        history_df = pd.DataFrame(streamed['history'])
+        fig_loss = px.line(history_df, x='epoch', y=['loss', 'val_loss'], markers=True, title="Loss ต่อ epoch")
+        st.plotly_chart(fig_loss, use_container_width=True)
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Accuracy (test)", f"{streamed['metrics']['accuracy']:.2%}")
+        col2.metric("ROC AUC (test)", f"{streamed['metrics']['roc_auc']:.4f}")
+        col3.metric("เวลาเทรนรวม", f"{streamed['train_time_s']:.1f} s")
+        split = streamed['split']
+        st.caption(f"train {split['train']:,} / validation {split['validation']:,} / test {split['test']:,} แถว  "
+                   f"เวลาเฉลี่ยต่อ epoch {history_df['epoch_s'].mean():.1f} s")
+
 
 
 with tab4:
     st.header("📈 ผลลัพธ์ของโมเดล")
 
-    # ประเมินผล
-    y_pred = mlp_model.predict(X_test)
+    # ประเมินผล (ใช้ผลทำนายที่เก็บไว้ตอนเทรน)
+    y_pred = y_pred_mlp
 
-    acc = accuracy_score(y_test, y_pred)
+    acc = np.mean(np.asarray(y_test) == y_pred)
 
     # สรุปผลความแม่นยำ
     result_df = pd.DataFrame({
@@ -292,6 +359,29 @@ with tab4:
     else:
         st.warning("⚠️ ไม่สามารถดึงค่าความสำคัญของคุณสมบัติจากโมเดลนี้ได้")
 
+    # Cross-validation ของ MLP บนข้อมูลจริงทั้งชุด (scaler fit ใหม่ในแต่ละ fold) ผลถูก cache ตาม sha256 ของข้อมูล
+    st.subheader(f"🔁 Cross-validation บนข้อมูลจริง (Stratified {CV_FOLDS}-fold)")
+    cv_result = cached_cross_validation('mlp')
+    cv_button = st.empty()
+    if cv_result is None and cv_button.button("รัน cross-validation"):
+        cv_button.empty()
+        with st.spinner("กำลังเทรนแต่ละ fold พร้อมกัน (ครั้งแรกเท่านั้น)..."):
+            cv_result = cross_validate('mlp')
+    if cv_result is not None:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Accuracy", f"{cv_result['summary']['accuracy']['mean']:.2%}",
+                    f"± {cv_result['summary']['accuracy']['std']:.2%}", delta_color="off")
+        col2.metric("ROC AUC", f"{cv_result['summary']['roc_auc']['mean']:.4f}",
+                    f"± {cv_result['summary']['roc_auc']['std']:.4f}", delta_color="off")
+        col3.metric("เวลาจริง", f"{cv_result['wall_s']:.1f} s", f"เวลาเทรนรวม {cv_result['fit_s']:.1f} s",
+                    delta_color="off")
+        folds_df = pd.DataFrame(cv_result['folds'])
+        fig_folds = px.bar(folds_df, x='fold', y='roc_auc', text_auto='.4f', title="ROC AUC ของแต่ละ fold")
+        fig_folds.update_layout(yaxis=dict(range=[folds_df['roc_auc'].min() - 0.01, 1]))
+        st.plotly_chart(fig_folds, use_container_width=True)
+        with st.expander("ผลของแต่ละ fold"):
+            st.dataframe(folds_df.round(4), hide_index=True)
+
     # แนวทางการพัฒนาต่อ
     st.subheader("🚀 แนวทางการพัฒนาต่อ")
     st.markdown("""
@@ -300,4 +390,7 @@ with tab4:
 - ✅ ใช้เทคนิค Feature Selection เพื่อลดคุณสมบัติที่ไม่สำคัญ
 - ✅ ทดลองใช้โมเดลอื่น เช่น Random Forest, XGBoost เพื่อเปรียบเทียบผลลัพธ์
 - ✅ ใช้เทคนิค Cross Validation เพื่อประเมินผลอย่างแม่นยำ
-""")
\ No newline at end of file
+""")
+
+# เตรียม module และโมเดลของหน้าอื่นไว้เบื้องหลัง หลังจากแสดงผลหน้านี้แล้ว
+prewarm()
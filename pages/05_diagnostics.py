@@ -0,0 +1,115 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+from core.drift import DOMAINS, MIN_OBSERVATIONS, PSI_ALERT, PSI_WARNING, get_drift_monitor
+from core.metrics import get_metrics
+from core.prewarm import prewarm, status as prewarm_status
+from core.registry import get_registry
+
+# ตั้งค่าหน้าเว็บ
+st.set_page_config(page_title="Diagnostics", page_icon="⏱️", layout="wide")
+
+# metrics เก็บอยู่ในหน่วยความจำของ process นี้ (รวมทุก session ที่เปิดหน้า 01 และ 03)
+metrics = get_metrics()
+registry = get_registry()
+
+st.title("⏱️ ประสิทธิภาพการทำนาย (Diagnostics)")
+st.write("เวลาที่ใช้ในแต่ละขั้นตอนของการทำนาย แยกตามโมเดล คำนวณจากคำขอล่าสุดของ process นี้")
+
+col1, col2 = st.columns([1, 3])
+with col1:
+    window = st.selectbox("ช่วงเวลา", ["ทั้งหมดที่เก็บไว้", "5 นาทีล่าสุด", "1 นาทีล่าสุด"])
+    window_s = {"5 นาทีล่าสุด": 300, "1 นาทีล่าสุด": 60}.get(window)
+    if st.button("รีเฟรช"):
+        st.rerun()
+
+# ---------- latency ต่อโมเดล ----------
+stages = pd.DataFrame(metrics.summary('prediction_stage_seconds', window_s=window_s))
+with col2:
+    if stages.empty:
+        st.info("ยังไม่มีการทำนาย ลองใช้หน้า ML Model หรือ NN Models ก่อน")
+    else:
+        totals = stages[stages['stage'] == 'total']
+        for column, (_, row) in zip(st.columns(max(len(totals), 1)), totals.iterrows()):
+            column.metric(f"{row['model']} p50 / p99", f"{row['p50_ms']:.2f} / {row['p99_ms']:.2f} ms",
+                          f"{int(row['count'])} คำขอ", delta_color="off")
+
+if not stages.empty:
+    st.subheader("Latency แยกตามขั้นตอน (ms)")
+    st.dataframe(stages.drop(columns=['metric']).round(3), use_container_width=True, hide_index=True)
+
+    fig = px.bar(stages[stages['stage'] != 'total'], x='model', y='p50_ms', color='stage', barmode='group',
+                 title="p50 ของแต่ละขั้นตอน", labels={'p50_ms': 'ms'})
+    st.plotly_chart(fig, use_container_width=True)
+
+# ---------- การโหลดโมเดล ----------
+st.subheader("การโหลดโมเดล")
+loads = pd.DataFrame(metrics.summary('model_load_seconds'))
+status = pd.DataFrame.from_dict(registry.stats(), orient='index')
+st.dataframe(status, use_container_width=True)
+if not loads.empty:
+    st.dataframe(loads.drop(columns=['metric']).round(3), use_container_width=True, hide_index=True)
+
+# ---------- prewarm ----------
+with st.expander("การเตรียม module/โมเดลล่วงหน้า (prewarm)"):
+    warm = prewarm_status()
+    st.write("สถานะ:", "ปิด" if not warm['enabled'] else ("กำลังทำงาน" if warm['running'] else "เสร็จแล้ว"))
+    st.dataframe(pd.DataFrame({
+        'seconds': {**{f"import {k}": v for k, v in warm['modules'].items()},
+                    **{f"load {k}": v for k, v in warm['models'].items()}},
+    }), use_container_width=True)
+
+# ---------- cache ผลการทำนาย ----------
+st.subheader("Cache ผลการทำนาย")
+cache_stats = registry.prediction_cache.stats()
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Hit rate", f"{cache_stats['hit_rate']:.1%}")
+c2.metric("Hits / Misses", f"{cache_stats['hits']} / {cache_stats['misses']}")
+c3.metric("รายการ", f"{cache_stats['entries']} / {cache_stats['max_entries']}")
+c4.metric("ล้างเพราะโมเดลเปลี่ยน", cache_stats['invalidations'])
+
+counters = pd.DataFrame(metrics.counters())
+if not counters.empty:
+    st.subheader("ตัวนับ")
+    st.dataframe(counters, use_container_width=True, hide_index=True)
+
+# ---------- drift ของข้อมูลที่เข้ามาทำนาย ----------
+st.subheader("Drift ของข้อมูลที่เข้ามาทำนาย")
+st.caption(f"เทียบกับข้อมูลที่ใช้เทรนด้วย PSI (< {PSI_WARNING} คงที่, > {PSI_ALERT} เปลี่ยนมาก) และ KS "
+           f"ต้องมีอย่างน้อย {MIN_OBSERVATIONS} คำขอจึงจะประเมิน")
+for domain, tab in zip(DOMAINS, st.tabs([{'loan': "ผู้ขอสินเชื่อ (หน้า 01)", 'diabetes': "ผู้ป่วย (หน้า 03)"}[d] for d in DOMAINS])):
+    with tab:
+        # baseline สร้างอยู่เบื้องหลัง ไม่รอให้เสร็จ (หน้าแสดงผลได้ทันที กดรีเฟรชเมื่อต้องการดูใหม่)
+        monitor = get_drift_monitor(domain)
+        report = monitor.report()
+        if report['error']:
+            st.info(f"ไม่มี baseline: {report['error']}")
+            continue
+        if not report['ready']:
+            st.info("กำลังสร้าง baseline จากข้อมูลที่ใช้เทรน...")
+            if st.button("รีเฟรช", key=f'drift_refresh_{domain}'):
+                st.rerun()
+            continue
+        drift_df = pd.DataFrame(report['features'])
+        if drift_df['n'].max() == 0:
+            st.info("ยังไม่มีข้อมูลที่เข้ามาทำนาย")
+            continue
+        st.dataframe(drift_df.round(4), use_container_width=True, hide_index=True)
+        feature = st.selectbox("feature", drift_df['feature'], key=f'drift_feature_{domain}')
+        dist = monitor.distribution(feature).melt(id_vars='bucket', var_name='ชุดข้อมูล', value_name='สัดส่วน')
+        fig = px.bar(dist, x='bucket', y='สัดส่วน', color='ชุดข้อมูล', barmode='group',
+                     title=f"{feature}: ข้อมูลที่ใช้เทรน ({report['baseline_rows']:,} แถว) เทียบกับข้อมูลที่เข้ามาทำนาย")
+        st.plotly_chart(fig, use_container_width=True)
+        if st.button("เริ่มนับใหม่", key=f'drift_reset_{domain}'):
+            monitor.reset()
+            st.rerun()
+
+# ---------- export ----------
+with st.expander("Prometheus text export"):
+    text = metrics.export_prometheus()
+    st.code(text, language='text')
+    st.download_button("ดาวน์โหลด metrics.txt", text, file_name="metrics.txt", mime='text/plain')
+
+# เตรียม module และโมเดลของหน้าอื่นไว้เบื้องหลัง หลังจากแสดงผลหน้านี้แล้ว
+prewarm()
@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import Body, FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from core import diabetes
+from core.batching import MAX_BATCH_SIZE, MAX_WAIT_MS
+from core.drift import DOMAINS, get_drift_monitor
+from core.metrics import get_metrics
+from core.registry import ModelLoadError, get_registry
+from core.scoring import cache_key, stage_span
+
+# บริการทำนายผลผ่าน HTTP (JSON) สำหรับระบบอื่นเรียกใช้โดยไม่ต้องผ่านหน้า Streamlit
+#   python serve.py --port 8000 --workers 4 --threads 8
+
+# จำนวน thread ต่อ process ที่ใช้รันโมเดล (ตั้งผ่าน environment เพราะ uvicorn workers import โมดูลใหม่)
+THREADS = int(os.environ.get('SCORING_THREADS', os.cpu_count() or 1))
+# หน้าต่างเวลาและขนาดสูงสุดของการรวมคำขอ MLP ทีละแถวเป็น batch
+BATCH_WINDOW_MS = float(os.environ.get('SCORING_BATCH_WINDOW_MS', MAX_WAIT_MS))
+BATCH_MAX_SIZE = int(os.environ.get('SCORING_BATCH_MAX_SIZE', MAX_BATCH_SIZE))
+
+registry = get_registry()
+executor = None
+
+
+# โหลดทุกโมเดลล่วงหน้าครั้งเดียวต่อ process ถ้าโมเดลไหนโหลดไม่ได้ยังให้บริการโมเดลที่เหลือต่อ
+def load_scorers():
+    for name in registry.names():
+        registry.try_get(name)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global executor
+    executor = ThreadPoolExecutor(max_workers=THREADS)
+    load_scorers()
+    yield
+    executor.shutdown()
+
+
+app = FastAPI(title="Intel Project Scoring Service", lifespan=lifespan)
+
+
+def get_scorer(key):
+    if key not in registry.names():
+        raise HTTPException(status_code=404, detail=f"ไม่พบโมเดล {key}")
+    try:
+        scorer = registry.get(key)
+    except ModelLoadError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if key == 'mlp':
+        scorer.enable_batching(BATCH_MAX_SIZE, BATCH_WINDOW_MS)
+    return scorer
+
+
+# รันงานที่ใช้ CPU ใน thread pool เพื่อไม่ให้ event loop ถูกบล็อก
+# ข้อมูลที่แปลงไม่ได้ (ค่าผิดชนิด ค่าที่ hash ไม่ได้ ฯลฯ) เป็นความผิดของคำขอ ตอบ 422 ไม่ใช่ 500
+async def run_scoring(func, *args):
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+# อ่านเฉพาะสถานะของโมเดลที่โหลดไว้แล้ว ไม่โหลดโมเดลบน event loop
+@app.get("/health")
+async def health():
+    health = {'models': registry.stats(), 'threads': THREADS}
+    mlp = registry.loaded('mlp')
+    if mlp is not None and mlp.batcher is not None:
+        health['mlp_batching'] = mlp.batcher.stats()
+    return health
+
+
+# metrics ของ process นี้ในรูปแบบ Prometheus (แต่ละ uvicorn worker มีค่าของตัวเอง)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return get_metrics().export_prometheus()
+
+
+# เทียบการกระจายของข้อมูลที่เข้ามาทำนายใน process นี้กับข้อมูลที่ใช้เทรน (PSI/KS ต่อ feature)
+@app.get("/drift")
+async def drift():
+    return {domain: get_drift_monitor(domain).report() for domain in DOMAINS}
+
+
+@app.post("/loan/{model_key}/predict")
+async def predict_loan(model_key: str, record: dict = Body(...)):
+    return await run_scoring(get_scorer(model_key).predict_one, record)
+
+
+@app.post("/loan/{model_key}/predict/batch")
+async def predict_loan_batch(model_key: str, records: list[dict] = Body(...)):
+    rows, unknown = await run_scoring(get_scorer(model_key).predict_records, records)
+    unknown = {field: [str(v) for v in values] for field, values in unknown.items()}
+    return {'results': rows, 'unknown': unknown}
+
+
+# คำขอทีละแถวรอผลจาก micro-batcher โดยตรง ไม่ต้องกิน thread ใน pool ระหว่างรอ
+# ใช้ prediction cache เดียวกับ DiabetesScorer.predict_one (แถวที่เคยทำนายแล้วไม่ต้องเข้าคิว)
+@app.post("/diabetes/predict")
+async def predict_diabetes(record: dict = Body(...)):
+    scorer = get_scorer('mlp')
+    with stage_span(scorer.name, 'total'):
+        try:
+            with stage_span(scorer.name, 'encode'):
+                row = diabetes.encode_record(record)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        cache = scorer.cache
+        key = cache_key(scorer, row)
+        prob = cache.get(key) if cache is not None else None
+        if prob is None:
+            prob = float(await asyncio.wrap_future(scorer.batcher.submit(row)))
+            if cache is not None:
+                cache.put(key, prob)
+        result = scorer.result(prob)
+    scorer.observe(row)
+    return result
+
+
+# precision=int8/float16 ใช้ MLP แบบลดความละเอียดสำหรับ batch ขนาดใหญ่ (ดู tools.quantize_mlp)
+@app.post("/diabetes/predict/batch")
+async def predict_diabetes_batch(records: list[dict] = Body(...), precision: str = 'float32'):
+    key = 'mlp' if precision == 'float32' else f'mlp_{precision}'
+    return {'results': await run_scoring(get_scorer(key).predict_records, records)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scoring service สำหรับโมเดล loan และ diabetes")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1, help="จำนวน process ของ uvicorn")
+    parser.add_argument('--threads', type=int, default=THREADS, help="จำนวน thread ต่อ process สำหรับรันโมเดล")
+    parser.add_argument('--batch-window-ms', type=float, default=BATCH_WINDOW_MS,
+                        help="เวลาที่รอรวมคำขอ MLP ก่อนเรียกโมเดล")
+    parser.add_argument('--batch-max-size', type=int, default=BATCH_MAX_SIZE,
+                        help="จำนวนคำขอ MLP สูงสุดต่อ batch")
+    args = parser.parse_args()
+
+    import uvicorn
+    os.environ['SCORING_THREADS'] = str(args.threads)
+    os.environ['SCORING_BATCH_WINDOW_MS'] = str(args.batch_window_ms)
+    os.environ['SCORING_BATCH_MAX_SIZE'] = str(args.batch_max_size)
+    uvicorn.run('serve:app', host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
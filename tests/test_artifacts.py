@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.artifacts import ArtifactCache, cached_sha256, fingerprint
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArtifactCache(str(tmp_path / 'artifacts'), max_entries=2)
+
+
+def counting_build(value):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return value
+    return build, calls
+
+
+def test_memory_then_disk_hit(tmp_path, cache):
+    build, calls = counting_build({'a': 1})
+    assert cache.get_or_build('x', 'k', build) == {'a': 1}
+    assert cache.get_or_build('x', 'k', build) == {'a': 1}
+    assert cache.stats()['memory_hits'] == 1
+
+    # process ใหม่ อ่านจากดิสก์โดยไม่สร้างใหม่
+    fresh = ArtifactCache(cache.directory)
+    assert not fresh.contains('x', 'other')
+    assert fresh.contains('x', 'k')
+    assert fresh.get_or_build('x', 'k', build) == {'a': 1}
+    assert fresh.stats()['disk_hits'] == 1
+    assert len(calls) == 1
+
+
+def test_memory_tier_is_bounded(cache):
+    for key in 'abc':
+        cache.get_or_build('x', key, lambda key=key: key)
+    stats = cache.stats()
+    assert stats['memory_entries'] == 2 and stats['evictions'] == 1
+
+    # รายการที่ถูกคืนจากหน่วยความจำยังอ่านจากดิสก์ได้
+    build, calls = counting_build('rebuilt')
+    assert cache.get_or_build('x', 'a', build) == 'a'
+    assert calls == [] and cache.stats()['disk_hits'] == 1
+
+
+def test_corrupt_file_is_rebuilt(cache):
+    path = cache.path('x', 'k')
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.write(b'not a pickle')
+    build, calls = counting_build(42)
+    assert cache.get_or_build('x', 'k', build) == 42
+    assert len(calls) == 1
+
+
+def test_build_errors_propagate(cache):
+    def build():
+        raise RuntimeError('boom')
+    with pytest.raises(RuntimeError):
+        cache.get_or_build('x', 'k', build)
+    assert not cache.contains('x', 'k')
+
+
+def test_fingerprint_tracks_data_and_params():
+    df = pd.DataFrame({'a': [1, 2, 3]})
+    base = fingerprint(df, {'n': 1})
+    assert fingerprint(df.copy(), {'n': 1}) == base
+    assert fingerprint(df.assign(a=[1, 2, 4]), {'n': 1}) != base
+    assert fingerprint(df, {'n': 2}) != base
+    assert fingerprint(np.arange(3), 'x') != fingerprint(np.arange(3).astype(np.int8), 'x')
+
+
+def test_cached_sha256_follows_file_changes(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('a\n1\n')
+    first = cached_sha256(str(path))
+    path.write_text('a\n2\n')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cached_sha256(str(path)) != first
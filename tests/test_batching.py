@@ -0,0 +1,81 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from core.batching import MicroBatcher
+
+
+class Recorder:
+    def __init__(self):
+        self.sizes = []
+        self.times = []
+
+    def __call__(self, X):
+        self.sizes.append(len(X))
+        self.times.append(time.perf_counter())
+        return X[:, 0] * 2
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+def test_full_batches_flush_without_waiting(recorder):
+    batcher = MicroBatcher(recorder, max_batch_size=4, max_wait_ms=500)
+    started = time.perf_counter()
+    futures = [batcher.submit(np.array([i, 0])) for i in range(10)]
+    assert [f.result(5) for f in futures] == [2.0 * i for i in range(10)]
+    batcher.close()
+
+    assert recorder.sizes == [4, 4, 2]
+    # batch ที่เต็มแล้วส่งทันที ส่วน batch สุดท้ายที่ไม่เต็มรอจนครบ max_wait
+    assert recorder.times[1] - started < 0.25
+    assert recorder.times[2] - started >= 0.45
+    assert batcher.stats()['batch_sizes'] == {2: 1, 4: 2}
+
+
+def test_lone_request_flushes_after_max_wait(recorder):
+    batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_ms=30)
+    assert batcher.predict(np.array([3.0]), timeout=5) == 6.0
+    batcher.close()
+
+    stats = batcher.stats()
+    assert recorder.sizes == [1]
+    assert stats['requests'] == stats['batches'] == 1
+    assert 25 <= stats['queue_delay_ms']['max'] < 1000
+
+
+def test_concurrent_requests_share_a_batch(recorder):
+    batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_ms=200)
+    barrier = threading.Barrier(16)
+    results = {}
+
+    def request(i):
+        barrier.wait()
+        results[i] = batcher.predict(np.array([float(i)]), timeout=5)
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    batcher.close()
+
+    assert results == {i: 2.0 * i for i in range(16)}
+    assert len(recorder.sizes) < 16
+    assert sum(recorder.sizes) == 16
+
+
+def test_model_error_reaches_every_request_in_the_batch():
+    def broken(X):
+        raise RuntimeError('boom')
+
+    batcher = MicroBatcher(broken, max_batch_size=3, max_wait_ms=200)
+    futures = [batcher.submit(np.array([i])) for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match='boom'):
+            future.result(5)
+    batcher.close()
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from core import cache as cache_module
+from core.cache import PredictionCache
+from core.registry import ModelRegistry
+from core.scoring import DiabetesScorer
+
+RECORD = {'gender': 'Female', 'age': 54, 'hypertension': 0, 'heart_disease': 0, 'smoking_history': 'never',
+          'bmi': 27.3, 'HbA1c_level': 6.6, 'blood_glucose_level': 140}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    return clock
+
+
+class CountingModel:
+    def __init__(self, prob=0.25):
+        self.prob = prob
+        self.calls = 0
+
+    def predict(self, X, verbose=0):
+        self.calls += 1
+        return np.full((len(X), 1), self.prob)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PredictionCache(max_entries=10, ttl_s=60)
+    cache.put(('m', 1, b'x'), 0.5)
+    clock.now += 59
+    assert cache.get(('m', 1, b'x')) == 0.5
+    clock.now += 2
+    assert cache.get(('m', 1, b'x')) is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['entries'] == 0
+
+
+def test_zero_ttl_never_expires_and_zero_size_disables(clock):
+    cache = PredictionCache(max_entries=10, ttl_s=0)
+    cache.put('k', 1.0)
+    clock.now += 1e9
+    assert cache.get('k') == 1.0
+
+    disabled = PredictionCache(max_entries=0)
+    disabled.put('k', 1.0)
+    assert disabled.get('k') is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2, ttl_s=0)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_version_change_drops_only_that_models_entries():
+    cache = PredictionCache(max_entries=10, ttl_s=0)
+    cache.set_version('m', 'v1')
+    cache.set_version('other', 'v1')
+    cache.put(('m', 'v1', b'x'), 0.1)
+    cache.put(('other', 'v1', b'x'), 0.2)
+
+    cache.set_version('m', 'v1')
+    assert cache.stats()['invalidations'] == 0
+    cache.set_version('m', 'v2')
+    assert cache.get(('m', 'v1', b'x')) is None
+    assert cache.get(('other', 'v1', b'x')) == 0.2
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_scorer_reuses_result_until_model_version_changes(tmp_path):
+    artifact = tmp_path / 'model.bin'
+    artifact.write_bytes(b'v1')
+    models = []
+
+    def load():
+        models.append(CountingModel(0.25 if len(models) == 0 else 0.75))
+        return DiabetesScorer(models[-1], None)
+
+    registry = ModelRegistry(prediction_cache=PredictionCache(max_entries=10, ttl_s=0))
+    registry.register('mlp', load, [str(artifact)])
+
+    first = registry.get('mlp').predict_one(RECORD)
+    # ค่าที่เขียนต่างกันแต่ encode แล้วเหมือนกันใช้ผลเดิม
+    again = registry.get('mlp').predict_one(dict(RECORD, age='54', smoking_history='never'))
+    assert first == again
+    assert first['probability'] == 0.25
+    assert models[0].calls == 1
+
+    artifact.write_bytes(b'v2-new')
+    reloaded = registry.get('mlp').predict_one(RECORD)
+    assert reloaded['probability'] == 0.75
+    assert models[1].calls == 1
+    assert registry.prediction_cache.stats()['invalidations'] == 1
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from core import crossval
+from core.artifacts import ArtifactCache
+from core.crossval import fold_assignments
+
+K = 5
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ArtifactCache(str(tmp_path / 'artifacts'))
+    monkeypatch.setattr(crossval, 'get_artifact_cache', lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def labels():
+    # ข้อมูลไม่สมดุลแบบชุด Diabetes (positive ราว 9%)
+    return (np.random.default_rng(0).random(10000) < 0.09).astype(int)
+
+
+def test_folds_are_stratified(cache, labels):
+    folds = fold_assignments(labels, 'data', K)
+    assert folds.dtype == np.int8
+    sizes = np.bincount(folds, minlength=K)
+    positives = np.bincount(folds, weights=labels, minlength=K)
+    assert sizes.max() - sizes.min() <= 1
+    # แต่ละ fold มี positive ต่างกันไม่เกิน 1 แถว
+    assert positives.max() - positives.min() <= 1
+
+
+def test_folds_are_deterministic_and_shared_through_cache(tmp_path, cache, labels, monkeypatch):
+    folds = fold_assignments(labels, 'data', K)
+    assert cache.stats()['builds'] == 1
+
+    # process ใหม่อ่านจากดิสก์ได้ fold เดิม
+    fresh = ArtifactCache(cache.directory)
+    monkeypatch.setattr(crossval, 'get_artifact_cache', lambda: fresh)
+    np.testing.assert_array_equal(fold_assignments(labels, 'data', K), folds)
+    assert fresh.stats()['disk_hits'] == 1
+
+    # cache ว่าง ข้อมูลและ seed เดิม: สร้างใหม่ได้ fold เดิม
+    empty = ArtifactCache(str(tmp_path / 'other'))
+    monkeypatch.setattr(crossval, 'get_artifact_cache', lambda: empty)
+    np.testing.assert_array_equal(fold_assignments(labels, 'data', K), folds)
+    assert empty.stats()['builds'] == 1
+
+    # seed อื่นได้ fold ต่างกัน (key ของ cache ต่างกันด้วย)
+    monkeypatch.setattr(crossval, 'RANDOM_STATE', crossval.RANDOM_STATE + 1)
+    other_seed = fold_assignments(labels, 'data', K)
+    assert not np.array_equal(other_seed, folds)
+    assert empty.stats()['builds'] == 2
@@ -0,0 +1,47 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+from core import dataset
+
+SCHEMA = {'group': 'category', 'value': 'float32'}
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset, 'CACHE_DIR', str(tmp_path / '.cache'))
+    path = tmp_path / 'sample.csv'
+    pd.DataFrame({'group': list('abcab'), 'value': [1.5, 2.0, 3.25, 4.0, 5.0]}).to_csv(path, index=False)
+    return str(path)
+
+
+def _build(cache_dir, csv_path):
+    dataset.CACHE_DIR = cache_dir
+    return dataset.ensure_sidecar(csv_path, SCHEMA)['dir']
+
+
+def test_roundtrip_and_rebuild_on_change(csv_path):
+    frame = dataset.load_frame(csv_path, SCHEMA)
+    assert list(frame['group']) == list('abcab')
+    assert frame['value'].tolist() == [1.5, 2.0, 3.25, 4.0, 5.0]
+    first = dataset.ensure_sidecar(csv_path, SCHEMA)['dir']
+
+    # แตะแค่ mtime ใช้ sidecar เดิม
+    os.utime(csv_path)
+    assert dataset.ensure_sidecar(csv_path, SCHEMA)['dir'] == first
+
+    pd.DataFrame({'group': ['z'], 'value': [9.0]}).to_csv(csv_path, index=False)
+    assert dataset.ensure_sidecar(csv_path, SCHEMA)['dir'] != first
+    assert list(dataset.load_frame(csv_path, SCHEMA)['group']) == ['z']
+    # sidecar เก่ายังอยู่ให้ผู้อ่านที่ memory-map ค้างไว้
+    assert os.path.exists(os.path.join(dataset.CACHE_DIR, first, 'value.npy'))
+
+
+def test_concurrent_builds_from_several_processes(csv_path):
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        dirs = set(pool.map(_build, [dataset.CACHE_DIR] * 8, [csv_path] * 8))
+    assert len(dirs) == 1
+    assert not [name for name in os.listdir(dataset.CACHE_DIR) if name.startswith('.tmp-')]
+    assert dataset.load_frame(csv_path, SCHEMA)['value'].tolist() == [1.5, 2.0, 3.25, 4.0, 5.0]
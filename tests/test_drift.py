@@ -0,0 +1,105 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core import diabetes, drift
+from core.drift import (MAX_CATEGORIES, OTHER, PSI_ALERT, PSI_WARNING, CategoricalSketch, DriftMonitor,
+                        NumericSketch, drift_status, ks_binned, psi)
+
+
+def test_shifted_distribution_crosses_thresholds():
+    rng = np.random.default_rng(0)
+    baseline = drift._numeric_baseline(rng.normal(0, 1, 20000))
+
+    same = NumericSketch(baseline['edges'])
+    same.add_many(rng.normal(0, 1, 5000))
+    shifted = NumericSketch(baseline['edges'])
+    shifted.add_many(rng.normal(1, 1, 5000))
+
+    assert psi(baseline['counts'], same.counts) < PSI_WARNING
+    assert ks_binned(baseline['counts'], same.counts) < 0.05
+    shifted_psi = psi(baseline['counts'], shifted.counts)
+    assert shifted_psi > PSI_ALERT
+    # ระยะห่างของ CDF ของ N(0,1) กับ N(1,1) สูงสุดราว 0.38
+    assert ks_binned(baseline['counts'], shifted.counts) > 0.3
+    assert drift_status(shifted.n, shifted_psi) == 'drift'
+    assert drift_status(50, shifted_psi) == 'insufficient'
+
+
+def test_categorical_shift_and_overflow():
+    base = {'a': 800, 'b': 200}
+    sketch = CategoricalSketch(str)
+    sketch.add_many(['a'] * 200 + ['b'] * 800)
+    assert psi([base[k] for k in base], [sketch.counts[k] for k in base]) > PSI_ALERT
+
+    sketch = CategoricalSketch(str)
+    for i in range(MAX_CATEGORIES + 10):
+        sketch.add(f'v{i}')
+    assert len(sketch.counts) == MAX_CATEGORIES + 1
+    assert sketch.counts[OTHER] == 10
+    assert sketch.n == MAX_CATEGORIES + 10
+
+
+def test_numeric_sketch_single_and_batch_agree():
+    edges = [1.0, 2.0, 3.0]
+    values = [0.5, 1.0, 2.5, 3.0, 7.0, float('nan'), 'x']
+    one, many = NumericSketch(edges), NumericSketch(edges)
+    for value in values:
+        one.add(value)
+    many.add_many(values)
+    assert one.counts == many.counts == [1, 1, 1, 2]
+    assert one.n == many.n == 5
+
+
+def test_pending_observations_are_counted_once_baseline_is_ready(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'diabetes.csv'
+    csv_path.write_text('placeholder\n')
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({
+        'gender': rng.choice(['Male', 'Female'], 500),
+        'age': rng.uniform(20, 80, 500),
+        'hypertension': rng.integers(0, 2, 500),
+        'heart_disease': rng.integers(0, 2, 500),
+        'smoking_history': rng.choice(['never', 'current'], 500),
+        'bmi': rng.uniform(18, 40, 500),
+        'HbA1c_level': rng.uniform(4, 9, 500),
+        'blood_glucose_level': rng.uniform(80, 250, 500),
+    })
+    X = diabetes.encode_frame(frame)
+
+    release = threading.Event()
+
+    def slow_baseline(domain, path):
+        release.wait(5)
+        spec = drift.DOMAINS[domain]
+        columns = {field: X[:, diabetes.FEATURES.index(field)] for field in spec['numeric'] + spec['categorical']}
+        return {
+            'rows': len(X),
+            'numeric': {field: drift._numeric_baseline(columns[field]) for field in spec['numeric']},
+            'categorical': {field: drift._categorical_baseline([drift._diabetes_key(v) for v in columns[field]])
+                            for field in spec['categorical']},
+        }
+
+    monkeypatch.setattr(drift, 'load_baseline', slow_baseline)
+    monitor = DriftMonitor('diabetes', str(csv_path))
+    for row in X[:30]:
+        monitor.observe_row(row)
+    # batch ที่มาก่อน baseline พร้อมไม่ถูกเก็บไว้
+    monitor.observe_matrix(X[30:60])
+    assert not monitor.report()['ready']
+
+    release.set()
+    assert monitor.wait_ready(timeout=5)
+    monitor.observe_matrix(X[60:100])
+    features = {row['feature']: row for row in monitor.report()['features']}
+    assert features['age']['n'] == 70
+    assert features['gender']['n'] == 70
+
+
+def test_missing_baseline_reports_error(tmp_path):
+    monitor = DriftMonitor('loan', str(tmp_path / 'missing.csv'))
+    monitor.observe_record({'age': 30})
+    assert not monitor.wait_ready(timeout=5)
+    report = monitor.report()
+    assert report['error'] and not report['ready']
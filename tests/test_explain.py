@@ -0,0 +1,48 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from core import explain
+from core.artifacts import ArtifactCache
+from core.explain import PathExplainer, XGBExplainer
+from core.loan import LoanEncoder, get_feature_names, synthetic_applicants
+from core.scoring import load_loan_model
+from core.trees import compile_ensemble
+
+
+@pytest.fixture(autouse=True)
+def artifact_cache(tmp_path, monkeypatch):
+    cache = ArtifactCache(str(tmp_path / 'artifacts'))
+    monkeypatch.setattr(explain, 'get_artifact_cache', lambda: cache)
+    return cache
+
+
+def test_xgb_shap_matches_pred_contribs():
+    import xgboost
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        model = load_loan_model('xgb')
+    X, _ = LoanEncoder(get_feature_names(model)).encode_frame(synthetic_applicants(300))
+    X = X.astype(np.float32)
+    X[::5, 0] = np.nan
+    X[::9, 2] = np.nan
+
+    booster = model.get_booster()
+    expected = booster.predict(xgboost.DMatrix(X, feature_names=booster.feature_names), pred_contribs=True)
+    got = XGBExplainer(model).contributions(X)
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-5)
+
+
+def test_random_forest_path_attribution_is_additive():
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1000, 5)).astype(np.float32)
+    y = (X[:, 0] - X[:, 3] + rng.normal(scale=0.5, size=len(X)) > 0).astype(int)
+    model = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0).fit(X, y)
+
+    contributions = PathExplainer(model, compile_ensemble(model)).contributions(X[:200])
+    # bias + ผลรวมของทุก feature = ความน่าจะเป็นที่โมเดลทำนาย
+    np.testing.assert_allclose(contributions.sum(axis=1), model.predict_proba(X[:200])[:, 1], rtol=0, atol=1e-9)
@@ -0,0 +1,32 @@
+import os
+import shutil
+
+import pytest
+
+from core import hosting
+from core.scoring import MLP_MODEL_FILE, MLP_NUMPY_FILE, SCALER_FILE, model_path
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    for name in (MLP_MODEL_FILE, MLP_NUMPY_FILE, SCALER_FILE):
+        shutil.copy(model_path(name), tmp_path / name)
+    monkeypatch.setattr(hosting, 'model_path', lambda name: str(tmp_path / name))
+    monkeypatch.setattr(hosting, 'HOSTED_DIR', str(tmp_path / 'hosted'))
+    return tmp_path
+
+
+def test_mlp_bundle_matches_npz(models_dir):
+    directory = hosting.ensure_mlp_bundle()
+    assert os.path.exists(os.path.join(directory, 'meta.json'))
+    # ครั้งที่สองใช้ bundle เดิม
+    assert hosting.ensure_mlp_bundle() == directory
+
+
+def test_existing_bundle_rejected_when_sources_change(models_dir):
+    hosting.ensure_mlp_bundle()
+    # scaler ถูกเปลี่ยนโดยไม่ได้ export .npz ใหม่ bundle เดิมต้องใช้ไม่ได้
+    with open(models_dir / SCALER_FILE, 'ab') as f:
+        f.write(b'\0')
+    with pytest.raises(ValueError):
+        hosting.ensure_mlp_bundle()
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.loan import LoanEncoder, risk_levels, score_frame, synthetic_applicants
+
+
+# feature ที่ได้จาก get_dummies(drop_first=True) แบบเดียวกับตอนเทรน (core.training.build_loan_features)
+def dummies(df):
+    return pd.get_dummies(df, drop_first=True)
+
+
+@pytest.fixture
+def applicants():
+    return synthetic_applicants(500, seed=7)
+
+
+@pytest.fixture
+def encoder(applicants):
+    return LoanEncoder(dummies(applicants).columns)
+
+
+def test_encode_frame_matches_get_dummies(applicants, encoder):
+    X, unknown = encoder.encode_frame(applicants)
+    np.testing.assert_array_equal(X, dummies(applicants).to_numpy(dtype=np.float64))
+    assert unknown == {}
+
+
+def test_encode_row_matches_get_dummies(applicants, encoder):
+    expected = dummies(applicants).to_numpy(dtype=np.float64)
+    for i, record in enumerate(applicants.head(50).to_dict('records')):
+        row, unknown = encoder.encode_row(record)
+        np.testing.assert_array_equal(row[0], expected[i])
+        assert unknown == []
+
+
+def test_form_values_map_to_dataset_categories(applicants, encoder):
+    record = applicants.iloc[0].to_dict()
+    record.update(education='postgraduate', employmentstatus='fulltime')
+    del record['employmenttype']
+    row, unknown = encoder.encode_row(record)
+
+    expected = dict(record, education="Master's", employmenttype='Full-time')
+    del expected['employmentstatus']
+    reference, _ = encoder.encode_row(expected)
+    np.testing.assert_array_equal(row, reference)
+    assert unknown == []
+
+
+def test_unknown_category_is_reported(applicants, encoder):
+    record = dict(applicants.iloc[0].to_dict(), loanpurpose='Vacation')
+    _, unknown = encoder.encode_row(record)
+    assert unknown == [('loanpurpose', 'Vacation')]
+
+    df = applicants.head(3).assign(loanpurpose=['Vacation', 'Auto', 'Vacation'])
+    _, unknown = encoder.encode_frame(df)
+    assert unknown == {'loanpurpose': ['Vacation']}
+
+
+@pytest.mark.parametrize('value', ['abc', None, float('nan'), ''])
+def test_invalid_numeric_row_raises(applicants, encoder, value):
+    record = dict(applicants.iloc[0].to_dict(), age=value)
+    with pytest.raises(ValueError, match='age'):
+        encoder.encode_row(record)
+
+
+def test_missing_numeric_raises(applicants, encoder):
+    record = applicants.iloc[0].to_dict()
+    del record['interestrate']
+    with pytest.raises(ValueError, match='interestrate'):
+        encoder.encode_row(record)
+    with pytest.raises(ValueError, match='interestrate'):
+        encoder.encode_frame(applicants.drop(columns=['interestrate']))
+
+
+def test_invalid_numeric_frame_raises(applicants, encoder):
+    df = applicants.head(5).astype({'age': object})
+    df.loc[2, 'age'] = 'abc'
+    with pytest.raises(ValueError, match="age.*'abc'"):
+        encoder.encode_frame(df)
+    df.loc[2, 'age'] = None
+    with pytest.raises(ValueError, match='age'):
+        encoder.encode_frame(df)
+
+
+@pytest.fixture
+def model(applicants):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    y = (applicants['creditscore'] + applicants['income'] / 500 < 700).to_numpy(dtype=int)
+    return make_pipeline(StandardScaler(), LogisticRegression()).fit(dummies(applicants).to_numpy(dtype=np.float64), y)
+
+
+def test_score_csv_matches_row_by_row(tmp_path, applicants, encoder, model):
+    path = tmp_path / 'applicants.csv'
+    applicants.to_csv(path, index=False)
+    df = pd.read_csv(path)
+
+    result, unknown = score_frame(model, df, encoder, chunk_size=64)
+    assert unknown == {}
+    assert list(result.columns) == list(df.columns) + ['prediction', 'default_probability', 'risk_level']
+    pd.testing.assert_frame_equal(result[df.columns], df)
+
+    expected = np.array([model.predict_proba(encoder.encode_row(record)[0])[0, 1]
+                         for record in df.to_dict('records')])
+    np.testing.assert_allclose(result['default_probability'], expected, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(result['prediction'], (expected > 0.5).astype(int))
+    # ขนาด chunk ไม่มีผลกับผลลัพธ์
+    whole, _ = score_frame(model, df, encoder, chunk_size=len(df))
+    pd.testing.assert_frame_equal(whole, result)
+
+
+def test_risk_level_thresholds():
+    levels = risk_levels(np.array([0.0, 0.3, 0.31, 0.7, 0.71, 1.0]))
+    assert list(levels) == ['ต่ำ', 'ต่ำ', 'ปานกลาง', 'ปานกลาง', 'สูง', 'สูง']
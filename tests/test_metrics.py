@@ -0,0 +1,50 @@
+import threading
+
+from core.metrics import MetricsRegistry
+
+
+def test_counters_and_summary():
+    metrics = MetricsRegistry()
+    metrics.counter('rows_total', "rows", model='a').inc(3)
+    metrics.counter('rows_total', model='a').inc(2)
+    for value in (0.001, 0.002, 0.003):
+        metrics.histogram('latency_seconds', model='a').observe(value)
+
+    assert metrics.counters() == [{'metric': 'rows_total', 'model': 'a', 'value': 5.0}]
+    [row] = metrics.summary('latency_seconds')
+    assert row['count'] == 3 and abs(row['p50_ms'] - 2.0) < 1e-9
+
+
+def test_prometheus_export():
+    metrics = MetricsRegistry()
+    metrics.counter('rows_total', "rows", model='a').inc(2)
+    metrics.histogram('latency_seconds', "latency", model='a').observe(0.0003)
+    text = metrics.export_prometheus()
+    assert '# TYPE rows_total counter' in text
+    assert 'rows_total{model="a"} 2' in text
+    assert 'latency_seconds_bucket{model="a",le="0.0005"} 1' in text
+    assert 'latency_seconds_count{model="a"} 1' in text
+
+
+def test_export_while_series_are_added():
+    metrics = MetricsRegistry()
+    stop = threading.Event()
+
+    # label ชุดเล็ก ๆ และจำกัดจำนวนรอบ ให้ test จบเร็วแต่ยังมี series ใหม่เกิดขึ้นระหว่าง export
+    def add_series():
+        for i in range(5_000):
+            if stop.is_set():
+                break
+            metrics.counter('rows_total', model=f'm{i % 50}').inc()
+            metrics.histogram('latency_seconds', model=f'm{i % 50}').observe(0.001)
+
+    thread = threading.Thread(target=add_series)
+    thread.start()
+    try:
+        for _ in range(20):
+            metrics.export_prometheus()
+            metrics.summary()
+            metrics.counters()
+    finally:
+        stop.set()
+        thread.join()
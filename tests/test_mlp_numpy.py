@@ -0,0 +1,71 @@
+import shutil
+
+import joblib
+import numpy as np
+import pytest
+
+from core import array_input, diabetes
+from core.dataset import load_diabetes
+from core.mlp_numpy import ACTIVATIONS, NumpyMLP, export_mlp, fold_scaler, read_dense_layers
+from core.scoring import MLP_MODEL_FILE, MLP_NUMPY_FILE, SCALER_FILE, model_path
+
+
+# forward pass แบบตรงไปตรงมา: scaler.transform แล้วคูณ layer ของไฟล์ .h5 (float64)
+def reference_predict(layers, X):
+    h = X
+    for kernel, bias, activation in layers:
+        h = ACTIVATIONS[activation](h @ kernel.astype(np.float64) + bias)
+    return h
+
+
+@pytest.fixture(scope='module')
+def X():
+    return diabetes.encode_frame(load_diabetes(diabetes.FEATURES))[:20000]
+
+
+@pytest.fixture
+def sources(tmp_path):
+    paths = {}
+    for key, filename in (('model', MLP_MODEL_FILE), ('scaler', SCALER_FILE)):
+        paths[key] = str(tmp_path / filename)
+        shutil.copy(model_path(filename), paths[key])
+    return paths
+
+
+def test_fold_scaler_matches_scaling_first():
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(5, 3, size=(200, 4))
+    layers = [(rng.normal(size=(4, 3)), rng.normal(size=3), 'relu'),
+              (rng.normal(size=(3, 1)), rng.normal(size=1), 'sigmoid')]
+    scaler = StandardScaler().fit(X)
+
+    expected = reference_predict(layers, scaler.transform(X))
+    np.testing.assert_allclose(reference_predict(fold_scaler(layers, scaler), X), expected, rtol=0, atol=1e-12)
+
+
+def test_exported_engine_matches_h5_with_scaler(X):
+    scaler = joblib.load(model_path(SCALER_FILE))
+    with array_input():
+        X_scaled = scaler.transform(X)
+    expected = reference_predict(read_dense_layers(model_path(MLP_MODEL_FILE)), X_scaled)
+
+    model = NumpyMLP.load(model_path(MLP_NUMPY_FILE))
+    got = model.predict(X)
+    assert got.shape == (len(X), 1)
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-5)
+
+
+def test_matches_tracks_source_files(tmp_path, sources, X):
+    npz_path = str(tmp_path / MLP_NUMPY_FILE)
+    export_mlp(sources['model'], sources['scaler'], npz_path)
+    model = NumpyMLP.load(npz_path)
+    assert model.matches(sources['model'], sources['scaler'])
+    np.testing.assert_allclose(model.predict(X), NumpyMLP.load(model_path(MLP_NUMPY_FILE)).predict(X), rtol=0, atol=1e-6)
+
+    # scaler ที่เปลี่ยนไปทำให้ .npz เดิมใช้ไม่ได้
+    scaler = joblib.load(sources['scaler'])
+    scaler.mean_ = scaler.mean_ + 1
+    joblib.dump(scaler, sources['scaler'])
+    assert not model.matches(sources['model'], sources['scaler'])
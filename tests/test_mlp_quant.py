@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from core import diabetes
+from core.dataset import load_diabetes
+from core.mlp_numpy import NumpyMLP
+from core.scoring import MLP_NUMPY_FILE, load_quantized_mlp, model_path
+
+# ขอบเขตจากผลของ tools.quantize_mlp บนข้อมูลทั้งไฟล์ (100,000 แถว)
+# int8: ต่างสูงสุด ~0.20 (แถวส่วนน้อยที่อยู่ใกล้ขอบของช่วง calibrate) เฉลี่ย ~0.0013 ตรงกัน 99.96%
+# float16: ต่างสูงสุด ~0.009 ตรงกัน 99.999%
+BOUNDS = {
+    'int8': {'max_abs_diff': 0.25, 'mean_abs_diff': 0.005, 'label_agreement': 0.999},
+    'float16': {'max_abs_diff': 0.02, 'mean_abs_diff': 1e-4, 'label_agreement': 0.9999},
+}
+
+
+@pytest.fixture(scope='module')
+def reference():
+    X = diabetes.encode_frame(load_diabetes(diabetes.FEATURES))
+    return X, NumpyMLP.load(model_path(MLP_NUMPY_FILE)).predict(X).reshape(-1)
+
+
+@pytest.mark.parametrize('precision', sorted(BOUNDS))
+def test_quantized_engine_close_to_float32(reference, precision):
+    X, baseline = reference
+    probs = load_quantized_mlp(precision).predict(X).reshape(-1)
+    diff = np.abs(probs - baseline)
+    agreement = np.mean((probs >= diabetes.THRESHOLD) == (baseline >= diabetes.THRESHOLD))
+
+    bounds = BOUNDS[precision]
+    assert diff.max() <= bounds['max_abs_diff']
+    assert diff.mean() <= bounds['mean_abs_diff']
+    assert agreement >= bounds['label_agreement']
@@ -0,0 +1,70 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import diabetes
+from core.dataset import load_diabetes
+from core.loan import synthetic_applicants
+from core.parallel import ParallelScorer, shard_bounds
+
+ROWS = 3000
+
+
+class Monitor:
+    def __init__(self):
+        self.rows = 0
+
+    def observe_frame(self, df):
+        self.rows += len(df)
+
+    def observe_matrix(self, X):
+        self.rows += len(X)
+
+    def observe_row(self, row):
+        self.rows += 1
+
+
+@pytest.fixture(scope='module')
+def parallel_scorers():
+    scorers = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        for name in ('xgb', 'mlp'):
+            # min_rows=0 ให้ batch เล็กก็กระจายไปยัง worker จริง
+            scorers[name] = ParallelScorer(name, workers=2, min_rows=0)
+    yield scorers
+    for scorer in scorers.values():
+        scorer.close()
+
+
+def test_shard_bounds_cover_every_row_once():
+    bounds = shard_bounds(10, 4)
+    assert bounds[0][0] == 0 and bounds[-1][1] == 10
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+    assert shard_bounds(2, 8) == [(0, 1), (1, 2)]
+
+
+def test_loan_matches_single_process_and_feeds_monitor(parallel_scorers, monkeypatch):
+    parallel = parallel_scorers['xgb']
+    monitor = Monitor()
+    monkeypatch.setattr(parallel.scorer, 'monitor', monitor)
+    df = synthetic_applicants(ROWS)
+
+    result, unknown = parallel.predict_frame(df)
+    assert monitor.rows == ROWS
+    expected, expected_unknown = parallel.scorer.predict_frame(df)
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=0, atol=1e-6)
+    assert unknown == expected_unknown
+
+
+def test_diabetes_matches_single_process_and_feeds_monitor(parallel_scorers, monkeypatch):
+    parallel = parallel_scorers['mlp']
+    monitor = Monitor()
+    monkeypatch.setattr(parallel.scorer, 'monitor', monitor)
+    df = load_diabetes(diabetes.FEATURES).head(ROWS)
+
+    probs = parallel.predict_frame(df)
+    assert monitor.rows == ROWS
+    np.testing.assert_allclose(probs, parallel.scorer.predict_frame(df), rtol=0, atol=1e-6)
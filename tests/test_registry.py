@@ -0,0 +1,132 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from core.batching import MicroBatcher
+from core.registry import ModelLoadError, ModelRegistry
+
+
+class Model:
+    def __init__(self, path, artifact_paths=None):
+        with open(path) as f:
+            self.content = f.read()
+        self.artifact_paths = artifact_paths
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def write(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+    # บางระบบไฟล์ mtime ละเอียดไม่พอ ให้ signature ต่างกันแน่นอน
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    path = str(tmp_path / 'model.txt')
+    write(path, 'v1')
+    return path
+
+
+def test_loads_once_and_reloads_when_artifact_changes(artifact):
+    registry = ModelRegistry()
+    registry.register('m', lambda: Model(artifact), [artifact])
+
+    first = registry.get('m')
+    assert registry.get('m') is first
+    assert registry.stats()['m']['loads'] == 1
+
+    write(artifact, 'v2')
+    second = registry.get('m')
+    assert second is not first and second.content == 'v2'
+    assert first.closed
+    assert registry.stats()['m']['loads'] == 2
+
+
+def test_failed_load_is_isolated_and_retried_after_fix(tmp_path, artifact):
+    missing = str(tmp_path / 'missing.txt')
+    registry = ModelRegistry()
+    registry.register('ok', lambda: Model(artifact), [artifact])
+    registry.register('broken', lambda: Model(missing), [missing])
+
+    assert registry.try_get('broken') is None
+    with pytest.raises(ModelLoadError):
+        registry.get('broken')
+    assert registry.get('ok').content == 'v1'
+
+    write(missing, 'fixed')
+    assert registry.get('broken').content == 'fixed'
+
+
+def test_evicts_least_recently_used(tmp_path):
+    paths = {}
+    for name in 'abc':
+        paths[name] = str(tmp_path / name)
+        write(paths[name], 'x' * 600_000)
+    registry = ModelRegistry(memory_budget_mb=1.5)
+    for name, path in paths.items():
+        registry.register(name, lambda path=path: Model(path), [path])
+
+    a = registry.get('a')
+    registry.get('b')
+    registry.get('a')
+    registry.get('c')
+    stats = registry.stats()
+    assert stats['a']['loaded'] and stats['c']['loaded']
+    assert not stats['b']['loaded']
+    assert not a.closed
+
+
+def test_memory_counts_only_loaded_artifacts(tmp_path):
+    used, unused = str(tmp_path / 'used'), str(tmp_path / 'unused')
+    write(used, 'x' * 1000)
+    write(unused, 'x' * 5000)
+    registry = ModelRegistry()
+    registry.register('m', lambda: Model(used, artifact_paths=[used]), [used, unused])
+
+    registry.get('m')
+    assert registry.memory_bytes() == 1000
+
+
+def test_get_tolerates_concurrent_eviction(artifact):
+    registry = ModelRegistry()
+    registry.register('m', lambda: Model(artifact), [artifact])
+    registry.get('m')
+    registry._lru.clear()
+    assert registry.get('m').content == 'v1'
+
+
+def test_batcher_close_drains_queue_and_serves_late_requests():
+    release = threading.Event()
+
+    def predict(X):
+        release.wait()
+        return X[:, 0] * 2
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=1)
+    pending = [batcher.submit(np.array([i])) for i in range(10)]
+    closer = threading.Thread(target=batcher.close)
+    closer.start()
+    release.set()
+    closer.join(5)
+
+    assert [f.result(1) for f in pending] == [2.0 * i for i in range(10)]
+    assert batcher.submit(np.array([21])).result(1) == 42.0
+
+
+def test_loaded_does_not_trigger_a_load(artifact):
+    calls = []
+    registry = ModelRegistry()
+    registry.register('m', lambda: calls.append(1) or Model(artifact), [artifact])
+
+    assert registry.loaded('m') is None
+    assert calls == []
+    model = registry.get('m')
+    assert registry.loaded('m') is model
+    assert len(calls) == 1
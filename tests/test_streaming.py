@@ -0,0 +1,80 @@
+import json
+import os
+import warnings
+
+import pytest
+
+from core.loan import synthetic_applicants
+from core.scoring import LoanScorer, load_loan_model
+from core.streaming import stream_score
+
+CHUNK = 100
+
+
+class Stop(Exception):
+    pass
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        return LoanScorer(load_loan_model('xgb'), name='xgb')
+
+
+@pytest.fixture
+def paths(tmp_path):
+    source = tmp_path / 'applicants.csv'
+    synthetic_applicants(550).to_csv(source, index=False)
+    return str(source), str(tmp_path / 'scored.csv'), str(tmp_path / 'scored.checkpoint.json')
+
+
+def stop_after(n_chunks):
+    def progress(state):
+        if state['chunks'] == n_chunks:
+            raise Stop
+    return progress
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def expected(scorer, paths, tmp_path):
+    source, _, _ = paths
+    output = str(tmp_path / 'uninterrupted.csv')
+    stream_score(scorer, source, output, chunk_size=CHUNK)
+    return read_bytes(output)
+
+
+def test_resume_after_interruption_matches_uninterrupted_run(scorer, paths, expected):
+    source, output, checkpoint = paths
+    with pytest.raises(Stop):
+        stream_score(scorer, source, output, chunk_size=CHUNK, checkpoint_path=checkpoint, progress=stop_after(2))
+    with open(checkpoint) as f:
+        assert json.load(f)['rows'] == 2 * CHUNK
+
+    summary = stream_score(scorer, source, output, chunk_size=CHUNK, checkpoint_path=checkpoint)
+    assert summary['resumed_from_row'] == 2 * CHUNK
+    assert summary['rows'] == 550
+    assert read_bytes(output) == expected
+    assert not os.path.exists(checkpoint)
+
+
+@pytest.mark.parametrize('damage', ['truncate', 'delete'])
+def test_restarts_from_zero_when_output_is_short_or_missing(scorer, paths, expected, damage):
+    source, output, checkpoint = paths
+    with pytest.raises(Stop):
+        stream_score(scorer, source, output, chunk_size=CHUNK, checkpoint_path=checkpoint, progress=stop_after(3))
+    if damage == 'truncate':
+        with open(output, 'r+b') as f:
+            f.truncate(os.path.getsize(output) // 2)
+    else:
+        os.remove(output)
+
+    summary = stream_score(scorer, source, output, chunk_size=CHUNK, checkpoint_path=checkpoint)
+    assert summary['resumed_from_row'] == 0
+    assert summary['rows'] == 550
+    assert read_bytes(output) == expected
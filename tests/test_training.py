@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import training
+from core.dataset import DIABETES_CSV
+from core.training import train_diabetes_streaming
+
+PARAMS = dict(chunk_size=1000, patience=3, epochs=10)
+
+
+class History:
+    def __init__(self, loss):
+        self.history = {'loss': [loss]}
+
+
+# โมเดลแทน Keras ที่กำหนดผลทำนายของแต่ละ epoch ไว้ล่วงหน้า (ค่าคงที่ทุกแถว)
+# น้ำหนักคือเลข epoch ที่เทรนล่าสุด จึงตรวจได้ว่าสุดท้ายใช้น้ำหนักของ epoch ไหน
+class ScriptedModel:
+    def __init__(self, script):
+        self.script = script
+        self.epoch = 0
+        self.fitting = None
+
+    def fit(self, X, y, **kwargs):
+        if self.fitting is None:
+            self.fitting = self.epoch + 1
+        return History(0.5)
+
+    def predict(self, X, **kwargs):
+        if self.fitting is not None:
+            self.epoch, self.fitting = self.fitting, None
+        return np.full((len(X), 1), self.script[self.epoch - 1], dtype=np.float32)
+
+    def get_weights(self):
+        return [np.array([self.epoch])]
+
+    def set_weights(self, weights):
+        self.epoch = int(weights[0][0])
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'diabetes.csv'
+    pd.read_csv(DIABETES_CSV, nrows=3000).to_csv(path, index=False)
+    return str(path)
+
+
+def train(monkeypatch, csv_path, script, **params):
+    model = ScriptedModel(script)
+    monkeypatch.setattr(training, 'build_mlp', lambda *args: model)
+    results, _ = train_diabetes_streaming(csv_path, dict(PARAMS, **params))
+    return model, results['mlp']['history']
+
+
+@pytest.mark.parametrize('epochs', [0, -1])
+def test_epochs_below_one_are_rejected(csv_path, epochs):
+    with pytest.raises(ValueError, match='epochs'):
+        train_diabetes_streaming(csv_path, dict(PARAMS, epochs=epochs))
+
+
+def test_restores_best_finite_epoch(monkeypatch, csv_path):
+    # epoch 3 ลู่ออก (NaN) ไม่นับเป็น epoch ที่ดีที่สุดและนับเป็น epoch ที่ไม่ดีขึ้น
+    model, history = train(monkeypatch, csv_path, [0.5, 0.1, np.nan, 0.3, 0.4, 0.05, 0.05])
+    assert [record['best'] for record in history] == [True, True, False, False, False]
+    assert np.isnan(history[2]['val_loss'])
+    assert model.epoch == 2
+
+
+def test_keeps_last_weights_when_no_epoch_is_finite(monkeypatch, csv_path):
+    model, history = train(monkeypatch, csv_path, [np.nan] * 10, patience=2)
+    assert len(history) == 2
+    assert not any(record['best'] for record in history)
+    assert model.epoch == 2
@@ -0,0 +1,48 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from core import array_input
+from core.loan import LoanEncoder, get_feature_names, synthetic_applicants
+from core.scoring import load_loan_model
+from core.trees import compile_ensemble
+
+ATOL = 1e-6
+# ตัวประเมินเลือกวิธีเดินต้นไม้ตามขนาด batch จึงตรวจหลายขนาด
+BATCH_SIZES = (1, 7, 64, 500)
+
+
+def assert_same_proba(model, compiled, X):
+    with array_input():
+        expected = model.predict_proba(X)[:, 1]
+    for size in BATCH_SIZES:
+        got = np.concatenate([compiled.predict_proba(X[i:i + size])[:, 1] for i in range(0, len(X), size)])
+        np.testing.assert_allclose(got, expected, rtol=0, atol=ATOL)
+
+
+@pytest.fixture(scope='module')
+def xgb_model():
+    with warnings.catch_warnings():
+        # โมเดลถูก pickle ด้วย XGBoost เวอร์ชันเก่า
+        warnings.simplefilter('ignore', UserWarning)
+        return load_loan_model('xgb')
+
+
+def test_xgb_matches_native_with_missing_values(xgb_model):
+    X, _ = LoanEncoder(get_feature_names(xgb_model)).encode_frame(synthetic_applicants(1000))
+    X[::7, 0] = np.nan
+    X[::11, 3] = np.nan
+    assert_same_proba(xgb_model, compile_ensemble(xgb_model), X)
+
+
+@pytest.mark.parametrize('max_leaf_nodes', [32, None])
+def test_random_forest_matches_native_with_missing_values(max_leaf_nodes):
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 6)).astype(np.float32)
+    y = (X[:, 0] + X[:, 1] * X[:, 2] + rng.normal(scale=0.5, size=len(X)) > 0).astype(int)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    model = RandomForestClassifier(n_estimators=20, max_leaf_nodes=max_leaf_nodes, random_state=0).fit(X[:1500], y[:1500])
+    assert_same_proba(model, compile_ensemble(model), X[1500:])
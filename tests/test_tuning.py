@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from core import training, tuning
+from core.artifacts import ArtifactCache
+from core.dataset import DIABETES_CSV
+from core.tuning import rung_schedule, run_search
+
+N_CANDIDATES = 4
+ETA = 2
+
+
+class Stop(Exception):
+    pass
+
+
+@pytest.mark.parametrize('n_candidates,n_rows,expected', [
+    (27, 100000, [(27, 3703), (9, 11111), (3, 33333), (1, 100000)]),
+    # ข้อมูลน้อย: รอบแรกต้องไม่ต่ำกว่า min_rows
+    (27, 5000, [(27, 1666), (9, 5000)]),
+    (1, 100000, [(1, 100000)]),
+])
+def test_rung_schedule(n_candidates, n_rows, expected):
+    schedule = rung_schedule(n_candidates, n_rows, eta=3, min_rows=1000)
+    assert schedule == expected
+    assert schedule[-1][1] == n_rows
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    cache = ArtifactCache(str(tmp_path / 'artifacts'))
+    monkeypatch.setattr(training, 'get_artifact_cache', lambda: cache)
+    monkeypatch.setattr(tuning, 'TUNING_DIR', str(tmp_path / 'tuning'))
+    path = tmp_path / 'diabetes.csv'
+    pd.read_csv(DIABETES_CSV, nrows=3000).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    runs = []
+    run_trial = tuning.run_trial
+
+    def counting(task):
+        runs.append((task[1], task[3]))
+        return run_trial(task)
+
+    monkeypatch.setattr(tuning, 'run_trial', counting)
+    return runs
+
+
+def test_resume_skips_finished_trials(csv_path, runs, tmp_path):
+    store = str(tmp_path / 'trials.jsonl')
+    finished = []
+
+    def stop_after_three(trial):
+        finished.append((trial['candidate'], trial['rows']))
+        if len(finished) == 3:
+            raise Stop
+
+    with pytest.raises(Stop):
+        run_search('mlp', csv_path, N_CANDIDATES, ETA, workers=1, store_path=store, progress=stop_after_three)
+    first = list(runs)
+    assert first == finished
+    assert set(tuning.load_store(store)) == set(first)
+
+    runs.clear()
+    result = run_search('mlp', csv_path, N_CANDIDATES, ETA, workers=1, store_path=store)
+    assert not set(runs) & set(first)
+    # 2400 แถวของ train: รอบ 1200 แถว 4 candidate แล้วรอบ 2400 แถว 2 candidate
+    assert len(runs) == 4 + 2 - len(first)
+    trials = tuning.load_store(store)
+    assert len(trials) == len(first) + len(runs)
+    assert {(t['candidate'], t['rows']) for rung in result['rungs'] for t in rung['trials']} == set(trials)
+
+    # รันซ้ำเมื่อทุก trial เสร็จแล้วไม่ต้องเทรนอะไรอีก
+    runs.clear()
+    again = run_search('mlp', csv_path, N_CANDIDATES, ETA, workers=1, store_path=store)
+    assert runs == []
+    assert again['best'] == result['best']
@@ -0,0 +1,74 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from core import array_input
+from core.explain import build_explainer
+from core.loan import synthetic_applicants
+from core.scoring import LOAN_MODEL_FILES, LoanScorer, load_loan_model, model_path
+
+# ตรวจว่าผลรวม contribution + expected value เท่ากับผลทำนายของโมเดล (และเท่ากับ pred_contribs ของ XGBoost)
+# แล้ววัดเวลาอธิบายทีละแถวและทั้ง batch
+#   python -m tools.bench_explain --rows 10000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify + benchmark per-prediction explanations")
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--atol', type=float, default=1e-4)
+    args = parser.parse_args()
+
+    applicants = synthetic_applicants(args.rows)
+    failed = False
+    for key, filename in LOAN_MODEL_FILES.items():
+        if not os.path.exists(model_path(filename)):
+            print(f"[{key}] ไม่พบ {filename} ข้ามไป")
+            continue
+
+        scorer = LoanScorer(load_loan_model(key), name=key)
+        started = time.perf_counter()
+        explainer = build_explainer(scorer)
+        print(f"[{key}] เตรียม explainer: {time.perf_counter() - started:.2f}s  หน่วย: {explainer.units}")
+
+        X, _ = scorer.encoder.encode_frame(applicants)
+        X[::97, 0] = np.nan
+
+        started = time.perf_counter()
+        contributions = explainer.contributions(X)
+        elapsed = time.perf_counter() - started
+
+        total = contributions.sum(axis=1)
+        with array_input():
+            prob = scorer.model.predict_proba(X)[:, 1]
+        expected = 1.0 / (1.0 + np.exp(-total)) if explainer.units == 'log-odds' else total
+        diff = np.abs(expected - prob).max()
+        print(f"[{key}] max |sum(contrib) - prob| over {len(X):,} rows: {diff:.3e}")
+        failed |= bool(diff > args.atol)
+
+        if key == 'xgb':
+            import xgboost as xgb
+            booster = scorer.model.get_booster()
+            sample = X[:1000].astype(np.float32)
+            native_started = time.perf_counter()
+            native = booster.predict(xgb.DMatrix(sample, feature_names=booster.feature_names), pred_contribs=True)
+            native_elapsed = (time.perf_counter() - native_started) * len(X) / len(sample)
+            diff = np.abs(native - contributions[:1000]).max()
+            print(f"[{key}] max |diff| vs pred_contribs: {diff:.3e}  pred_contribs (ประมาณ {len(X):,} แถว): "
+                  f"{native_elapsed:.2f}s")
+            failed |= bool(diff > args.atol)
+
+        single = []
+        for i in range(min(200, len(X))):
+            t0 = time.perf_counter()
+            explainer.contributions(X[i:i + 1])
+            single.append(time.perf_counter() - t0)
+        print(f"[{key}] batch {len(X):,} แถว: {elapsed:.2f}s  ทีละแถว p50: {np.median(single) * 1000:.2f} ms")
+
+    if failed:
+        raise SystemExit(f"ผลลัพธ์ต่างจากโมเดลเกิน {args.atol}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+# เปรียบเทียบ Keras กับ NumPy engine: เวลาเริ่มต้น (import + โหลด + ทำนายครั้งแรก), หน่วยความจำ, latency ต่อแถว
+#   python -m tools.bench_mlp
+# แต่ละ engine รันใน process แยกเพื่อให้วัด cold start และ RSS ได้ตรง
+
+ROW = {'gender': 'Female', 'age': 54.0, 'hypertension': 0, 'heart_disease': 0,
+       'bmi': 27.32, 'HbA1c_level': 6.6, 'blood_glucose_level': 80}
+
+
+def run_engine(engine, repeats):
+    started = time.perf_counter()
+    from core import diabetes
+    from core.scoring import DiabetesScorer, load_diabetes_model
+
+    scorer = DiabetesScorer(*load_diabetes_model(prefer_numpy=(engine == 'numpy')))
+    row = diabetes.encode_record(ROW)
+    scorer.predict_proba(row)
+    cold_start = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        scorer.predict_proba(row)
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+
+    return {
+        'engine': engine,
+        'model': type(scorer.model).__name__,
+        'cold_start_s': cold_start,
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'row_latency_ms_p50': latencies[len(latencies) // 2] * 1000,
+        'row_latency_ms_p99': latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Keras vs NumPy MLP")
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--engine', choices=['keras', 'numpy'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.engine:
+        print(json.dumps(run_engine(args.engine, args.repeats)))
+        return
+
+    results = []
+    for engine in ('keras', 'numpy'):
+        out = subprocess.run([sys.executable, '-m', 'tools.bench_mlp', '--engine', engine,
+                              '--repeats', str(args.repeats)],
+                             capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{'engine':<8}{'cold start (s)':>16}{'max RSS (MB)':>14}{'p50 (ms)':>11}{'p99 (ms)':>11}")
+    for r in results:
+        print(f"{r['engine']:<8}{r['cold_start_s']:>16.3f}{r['max_rss_mb']:>14.1f}"
+              f"{r['row_latency_ms_p50']:>11.3f}{r['row_latency_ms_p99']:>11.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from core.dataset import DIABETES_CSV
+from core.loan import synthetic_applicants
+from core.parallel import ParallelScorer
+from core.registry import get_registry
+
+# วัด throughput ของการทำนายแบบหลาย process เทียบกับ process เดียว ตามจำนวน worker
+#   python -m tools.bench_parallel --model xgb --rows 1000000 --workers 1,2,4,8,16,32
+# ผลลัพธ์ต้องเท่ากับการทำนายใน process เดียวทุกแถว (ตรวจทุกครั้ง)
+
+
+def load_rows(model, rows):
+    if model.startswith('mlp'):
+        df = pd.read_csv(DIABETES_CSV)
+        return pd.concat([df] * -(-rows // len(df)), ignore_index=True).head(rows)
+    return synthetic_applicants(rows)
+
+
+def probabilities(result):
+    return result[0]['default_probability'].to_numpy() if isinstance(result, tuple) else result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-process batch scoring")
+    parser.add_argument('--model', default='xgb')
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--workers', default=','.join(str(n) for n in sorted({1, 2, 4, os.cpu_count() or 1})))
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    df = load_rows(args.model, args.rows)
+    local = get_registry().get(args.model)
+    started = time.perf_counter()
+    expected = probabilities(local.predict_frame(df))
+    baseline = time.perf_counter() - started
+    print(f"{args.model}: {len(df):,} แถว, {os.cpu_count()} cores")
+    print(f"{'workers':>8}{'warm-up (s)':>13}{'best (s)':>10}{'rows/s':>14}{'speed-up':>10}")
+    print(f"{'local':>8}{'':>13}{baseline:>10.3f}{len(df) / baseline:>14,.0f}{1.0:>10.2f}")
+
+    for workers in [int(n) for n in args.workers.split(',')]:
+        scorer = ParallelScorer(args.model, workers, min_rows=0)
+        started = time.perf_counter()
+        scorer.warm_up()
+        warm_up = time.perf_counter() - started
+
+        timings = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            probs = probabilities(scorer.predict_frame(df))
+            timings.append(time.perf_counter() - started)
+        scorer.close()
+        if not (probs == expected).all():
+            raise SystemExit(f"ผลลัพธ์ของ {workers} workers ไม่ตรงกับการทำนายใน process เดียว")
+
+        best = min(timings)
+        print(f"{workers:>8}{warm_up:>13.2f}{best:>10.3f}{len(df) / best:>14,.0f}{baseline / best:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
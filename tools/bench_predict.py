@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from core import ROOT_DIR, diabetes
+from core.dataset import load_diabetes
+from core.loan import risk_levels, score_matrix, synthetic_applicants
+from core.scoring import (
+    LOAN_MODEL_FILES, DiabetesScorer, LoanScorer, load_diabetes_model, load_loan_model, model_path,
+)
+from core.trees import COMPILED_MAX_ROWS
+
+# วัด latency ของการทำนายแยกตามขั้นตอน (encode / scale / model / post) ของทุกโมเดล ตามขนาด batch
+#   python -m tools.bench_predict --output bench.json
+#   python -m tools.bench_predict --compare bench.json     (เทียบกับผลของ commit ก่อนหน้า)
+# ข้อมูลเบาหวานมาจาก data/diabetes_dataset.csv ส่วนผู้กู้เป็นข้อมูลสังเคราะห์ (synthetic_applicants)
+# batch ขนาด 1 ใช้เส้นทางเดียวกับ predict() ในหน้า 01 และ predict_diabetes() ในหน้า 03
+
+STAGES = ('encode', 'scale', 'model', 'post')
+DEFAULT_BATCH_SIZES = '1,10,100,1000,10000,100000'
+# ขนาด batch ที่ใช้เทียบต้นไม้ที่ compile แล้วกับ predict_proba ของโมเดลเดิม (รอบ ๆ COMPILED_MAX_ROWS)
+COMPILED_SPEEDUP_SIZES = (1, 4, 16, 64, 256)
+
+
+def percentiles(values):
+    values = np.asarray(values) * 1000
+    return {
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'mean_ms': float(values.mean()),
+    }
+
+
+# ---------- ขั้นตอนของแต่ละโมเดล: คืน dict {stage: callable(input) -> output} ----------
+
+def loan_pipeline(scorer, n_rows):
+    predictor = scorer.predictor(n_rows)
+    if n_rows == 1:
+        def encode(records):
+            return scorer.encoder.encode_row(records[0])[0]
+
+        def post(probs):
+            prob = float(probs[0])
+            return {'prediction': int(prob > 0.5), 'probability': prob,
+                    'risk_level': str(risk_levels(np.array([prob]))[0])}
+    else:
+        def encode(df):
+            return scorer.encoder.encode_frame(df)[0]
+
+        def post(probs):
+            return (probs > 0.5).astype(int), risk_levels(probs)
+
+    return {
+        'encode': encode,
+        'model': lambda X: score_matrix(predictor, X),
+        'post': post,
+    }
+
+
+def diabetes_pipeline(scorer, n_rows):
+    model = scorer.model
+    stages = {}
+    if n_rows == 1:
+        stages['encode'] = lambda records: diabetes.encode_record(records[0])
+        stages['post'] = lambda probs: scorer.result(float(probs[0]))
+    else:
+        stages['encode'] = diabetes.encode_frame
+        stages['post'] = lambda probs: (probs >= diabetes.THRESHOLD).astype(int)
+    if scorer.scaler is not None:
+        stages['scale'] = scorer.scaler.transform
+    stages['model'] = lambda X: np.asarray(model.predict(X, verbose=0)).reshape(-1)
+    return stages
+
+
+def run_stages(stages, data):
+    timings = {}
+    value = data
+    for name in STAGES:
+        if name in stages:
+            started = time.perf_counter()
+            value = stages[name](value)
+            timings[name] = time.perf_counter() - started
+    return timings
+
+
+# ---------- การวัด ----------
+
+def measure(pipeline, data, min_time, max_repeats):
+    run_stages(pipeline, data)  # warm-up
+
+    samples = {name: [] for name in STAGES if name in pipeline}
+    totals = []
+    started = time.perf_counter()
+    while len(totals) < max_repeats and (len(totals) < 3 or time.perf_counter() - started < min_time):
+        timings = run_stages(pipeline, data)
+        for name, elapsed in timings.items():
+            samples[name].append(elapsed)
+        totals.append(sum(timings.values()))
+
+    # วัด peak memory แยกรอบ เพราะ tracemalloc ทำให้ช้าลง
+    tracemalloc.start()
+    run_stages(pipeline, data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return totals, samples, peak
+
+
+def bench_model(name, make_pipeline, make_data, batch_sizes, args):
+    results = []
+    for size in batch_sizes:
+        data = make_data(size)
+        totals, samples, peak = measure(make_pipeline(size), data, args.min_time, args.max_repeats)
+        total = percentiles(totals)
+        result = {
+            'model': name,
+            'batch_size': size,
+            'repeats': len(totals),
+            'total': total,
+            'stages': {stage: percentiles(values) for stage, values in samples.items()},
+            'throughput_rows_s': size / (total['p50_ms'] / 1000),
+            'peak_memory_mb': peak / (1024 * 1024),
+        }
+        results.append(result)
+        stages = '  '.join(f"{s}: {v['p50_ms']:.3f}" for s, v in result['stages'].items())
+        print(f"[{name}] batch {size:>7,}  p50 {total['p50_ms']:9.3f} ms  p99 {total['p99_ms']:9.3f} ms  "
+              f"{result['throughput_rows_s']:>12,.0f} rows/s  peak {result['peak_memory_mb']:7.1f} MB  ({stages})")
+    return results
+
+
+# เวลาขั้น model ของต้นไม้ที่ compile แล้วเทียบกับโมเดลเดิม (ใช้เลือก COMPILED_MAX_ROWS)
+def compiled_speedup(name, scorer, applicants, args):
+    results = []
+    for size in COMPILED_SPEEDUP_SIZES:
+        X = scorer.encoder.encode_frame(applicants.head(size))[0]
+        p50 = {}
+        for engine, predictor in (('native', scorer.model), ('compiled', scorer.compiled)):
+            totals, _, _ = measure({'model': lambda X, p=predictor: score_matrix(p, X)}, X,
+                                   args.min_time, args.max_repeats)
+            p50[engine] = percentiles(totals)['p50_ms']
+        result = {'model': name, 'batch_size': size, 'native_p50_ms': p50['native'],
+                  'compiled_p50_ms': p50['compiled'], 'speedup': p50['native'] / p50['compiled'],
+                  'compiled_used': size <= COMPILED_MAX_ROWS}
+        results.append(result)
+        print(f"[{name}] compiled vs native batch {size:>4}  native {p50['native']:7.3f} ms  "
+              f"compiled {p50['compiled']:7.3f} ms  x{result['speedup']:.1f}"
+              f"{'' if result['compiled_used'] else '  (ใช้โมเดลเดิม)'}")
+    return results
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r['model'], r['batch_size']): r for r in baseline['results']}
+
+    print(f"\nเทียบกับ {baseline_path} (commit {baseline['meta'].get('commit')})")
+    print(f"{'model':<8}{'batch':>9}{'before p50':>14}{'after p50':>13}{'change':>10}")
+    for result in results:
+        before = previous.get((result['model'], result['batch_size']))
+        if before is None:
+            continue
+        old, new = before['total']['p50_ms'], result['total']['p50_ms']
+        print(f"{result['model']:<8}{result['batch_size']:>9,}{old:>14.3f}{new:>13.3f}{(new / old - 1) * 100:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage prediction latency benchmark")
+    parser.add_argument('--models', default='rf,xgb,mlp')
+    parser.add_argument('--batch-sizes', default=DEFAULT_BATCH_SIZES)
+    parser.add_argument('--mlp-engine', choices=['numpy', 'keras'], default='numpy')
+    parser.add_argument('--min-time', type=float, default=1.0, help="เวลาวัดขั้นต่ำต่อ batch size (วินาที)")
+    parser.add_argument('--max-repeats', type=int, default=1000)
+    parser.add_argument('--output', help="บันทึกผลเป็น JSON")
+    parser.add_argument('--compare', help="JSON ของรอบก่อนหน้าเพื่อเทียบ p50")
+    args = parser.parse_args()
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',')]
+    selected = [name.strip() for name in args.models.split(',') if name.strip()]
+    max_rows = max(batch_sizes)
+    results = []
+    speedups = []
+
+    loan_keys = [key for key in selected if key in LOAN_MODEL_FILES]
+    if loan_keys:
+        applicants = synthetic_applicants(max_rows)
+        records = applicants.head(1).to_dict('records')
+
+        def loan_data(size):
+            return records if size == 1 else applicants.head(size)
+
+        for key in loan_keys:
+            if not os.path.exists(model_path(LOAN_MODEL_FILES[key])):
+                print(f"[{key}] ไม่พบ {LOAN_MODEL_FILES[key]} ข้ามไป")
+                continue
+            scorer = LoanScorer(load_loan_model(key))
+            results += bench_model(key, lambda size: loan_pipeline(scorer, size), loan_data, batch_sizes, args)
+            if scorer.compiled is not None:
+                speedups += compiled_speedup(key, scorer, synthetic_applicants(max(COMPILED_SPEEDUP_SIZES)), args)
+
+    if 'mlp' in selected:
+        scorer = DiabetesScorer(*load_diabetes_model(prefer_numpy=(args.mlp_engine == 'numpy')))
+        frame = load_diabetes(diabetes.FEATURES)
+        repeats = -(-max_rows // len(frame))
+        if repeats > 1:
+            frame = frame.iloc[np.tile(np.arange(len(frame)), repeats)].reset_index(drop=True)
+        diabetes_records = frame.head(1).to_dict('records')
+
+        def diabetes_data(size):
+            return diabetes_records if size == 1 else frame.head(size)
+
+        results += bench_model('mlp', lambda size: diabetes_pipeline(scorer, size), diabetes_data,
+                               batch_sizes, args)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'mlp_engine': args.mlp_engine,
+            'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        'results': results,
+        'compiled_speedup': speedups,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"saved {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
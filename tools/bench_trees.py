@@ -0,0 +1,61 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from core import array_input
+from core.loan import LoanEncoder, get_feature_names, synthetic_applicants
+from core.scoring import LOAN_MODEL_FILES, load_loan_model, model_path
+from core.trees import compile_ensemble
+
+# ตรวจว่า TreeEnsemble ให้ความน่าจะเป็นเท่ากับโมเดลเดิม แล้วเทียบ latency ตามขนาด batch
+#   python -m tools.bench_trees --rows 20000
+
+
+def timeit(func, X, repeats):
+    func(X)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        func(X)
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify + benchmark compiled tree ensembles")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--atol', type=float, default=1e-6)
+    parser.add_argument('--batch-sizes', default='1,16,64,256,1024')
+    args = parser.parse_args()
+
+    applicants = synthetic_applicants(args.rows)
+    failed = False
+    for key, filename in LOAN_MODEL_FILES.items():
+        if not os.path.exists(model_path(filename)):
+            print(f"[{key}] ไม่พบ {filename} ข้ามไป")
+            continue
+
+        model = load_loan_model(key)
+        compiled = compile_ensemble(model)
+        X, _ = LoanEncoder(get_feature_names(model)).encode_frame(applicants)
+        X[::97, 0] = np.nan  # ตรวจการเลือกทางเมื่อมีค่าหายด้วย
+
+        with array_input():
+            diff = np.abs(model.predict_proba(X)[:, 1] - compiled.predict_proba(X)[:, 1])
+        print(f"[{key}] trees: {compiled.n_trees}  nodes: {len(compiled.feature):,}  depth: {compiled.depth}")
+        print(f"[{key}] max |diff| over {len(X):,} rows: {diff.max():.3e}")
+        failed |= bool(diff.max() > args.atol)
+
+        print(f"{'batch':>8}{'model (ms)':>14}{'compiled (ms)':>16}{'speedup':>10}")
+        for size in map(int, args.batch_sizes.split(',')):
+            repeats = max(3, 2000 // size)
+            native = timeit(model.predict_proba, X[:size], repeats)
+            fast = timeit(compiled.predict_proba, X[:size], repeats)
+            print(f"{size:>8}{native:>14.3f}{fast:>16.3f}{native / fast:>9.1f}x")
+
+    if failed:
+        raise SystemExit(f"ผลลัพธ์ต่างจากโมเดลเดิมเกิน {args.atol}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import argparse
+
+import numpy as np
+
+from core import array_input, diabetes
+from core.dataset import DIABETES_CSV, DIABETES_SCHEMA, load_frame
+from core.mlp_numpy import NumpyMLP, export_mlp
+from core.scoring import MLP_MODEL_FILE, MLP_NUMPY_FILE, SCALER_FILE, model_path
+
+# แปลง models/mlp_model.h5 + scaler.pkl เป็น models/mlp_model.npz แล้วตรวจผลเทียบกับ Keras
+#   python -m tools.export_mlp
+#   python -m tools.export_mlp --skip-verify
+
+
+def verify(npz_path, h5_path, scaler_path, data_path, atol):
+    import joblib
+    from tensorflow.keras.models import load_model
+
+    X = diabetes.encode_frame(load_frame(data_path, DIABETES_SCHEMA))
+    with array_input():
+        X_scaled = joblib.load(scaler_path).transform(X)
+    keras_probs = load_model(h5_path).predict(X_scaled, batch_size=8192, verbose=0)[:, 0]
+    numpy_probs = NumpyMLP.load(npz_path).predict(X)[:, 0]
+
+    diff = np.abs(keras_probs - numpy_probs)
+    same_label = np.mean((keras_probs >= diabetes.THRESHOLD) == (numpy_probs >= diabetes.THRESHOLD))
+    print(f"rows: {len(X):,}")
+    print(f"max |diff|: {diff.max():.3e}  mean |diff|: {diff.mean():.3e}")
+    print(f"label agreement: {same_label:.6f}")
+    return diff.max() <= atol
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export MLP weights เป็น .npz สำหรับ NumPy engine")
+    parser.add_argument('--model', default=model_path(MLP_MODEL_FILE))
+    parser.add_argument('--scaler', default=model_path(SCALER_FILE))
+    parser.add_argument('--output', default=model_path(MLP_NUMPY_FILE))
+    parser.add_argument('--data', default=DIABETES_CSV)
+    parser.add_argument('--atol', type=float, default=1e-5)
+    parser.add_argument('--skip-verify', action='store_true')
+    args = parser.parse_args()
+
+    meta = export_mlp(args.model, args.scaler, args.output)
+    print(f"saved {args.output} (activations: {', '.join(meta['activations'])})")
+
+    if not args.skip_verify:
+        if not verify(args.output, args.model, args.scaler, args.data, args.atol):
+            raise SystemExit(f"ผลลัพธ์ต่างจาก Keras เกิน {args.atol}")
+        print("ผลลัพธ์ตรงกับ Keras")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import os
+
+from core.hosting import HOSTED_DIR, ensure_loan_bundle, ensure_mlp_bundle, prune_bundles, read_bundle
+from core.scoring import LOAN_MODEL_FILES, model_path
+
+# สร้าง bundle แบบ memory-mapped ของทุกโมเดลใน models/ ล่วงหน้า (ขั้นตอน deploy)
+# แล้วลบ bundle ของเวอร์ชันเก่า จากนั้นรัน Streamlit/serve ด้วย MODEL_HOSTING=mmap
+#   python -m tools.host_models
+#   MODEL_HOSTING=mmap streamlit run app.py
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export memory-mapped model bundles")
+    parser.add_argument('--keep-old', action='store_true', help="ไม่ลบ bundle ของเวอร์ชันเก่า")
+    args = parser.parse_args()
+
+    builders = {key: (lambda key=key: ensure_loan_bundle(key)) for key in LOAN_MODEL_FILES}
+    builders['mlp'] = ensure_mlp_bundle
+
+    current = []
+    for name, build in builders.items():
+        if name in LOAN_MODEL_FILES and not os.path.exists(model_path(LOAN_MODEL_FILES[name])):
+            print(f"[{name}] ไม่พบ {LOAN_MODEL_FILES[name]} ข้ามไป")
+            continue
+        directory = build()
+        current.append(directory)
+        arrays, _ = read_bundle(directory)
+        size = sum(array.nbytes for array in arrays.values())
+        print(f"[{name}] {os.path.relpath(directory, HOSTED_DIR)} ({size / 1024:.0f} KB)")
+
+    if not args.keep_old:
+        for entry in prune_bundles(current):
+            print(f"ลบ bundle เก่า: {entry}")
+
+
+if __name__ == '__main__':
+    main()
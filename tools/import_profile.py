@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+from core import ROOT_DIR
+
+# วัดเวลา import ของ app.py และแต่ละหน้า (python -X importtime) แต่ละ script รันใน process ใหม่
+# แบบ bare mode ของ Streamlit จึงนับเฉพาะ module ที่ code path ปกติของหน้านั้น import จริง
+#   python -m tools.import_profile
+#   python -m tools.import_profile --output imports.json --compare baseline.json --budget-ms 1500
+#   MODEL_HOSTING=mmap python -m tools.import_profile pages/02_ml_description.py
+# --budget-ms ใช้ใน CI: ถ้า script ใดใช้เวลา import เกินงบ จะจบด้วย exit code 1
+
+SCRIPTS = ['app.py'] + [os.path.join('pages', name) for name in sorted(os.listdir(os.path.join(ROOT_DIR, 'pages')))
+                        if name.endswith('.py')]
+# module หนักที่ไม่ควรถูก import ถ้าหน้านั้นไม่ได้ใช้
+HEAVY_MODULES = ['tensorflow', 'keras', 'xgboost', 'sklearn', 'scipy', 'matplotlib', 'seaborn', 'plotly', 'h5py']
+
+RUNNER = """
+import logging, runpy, sys
+logging.disable(logging.WARNING)
+sys.path.insert(0, {root!r})
+try:
+    runpy.run_path({path!r}, run_name='__main__')
+except BaseException as e:
+    print('script error:', type(e).__name__, e, file=sys.stdout)
+"""
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+# แยกผลของ -X importtime: คืนค่า {module: (self_us, cumulative_us, ระดับความลึก)}
+def parse_importtime(stderr):
+    modules = {}
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+
+def profile_script(script):
+    # ปิด prewarm ไม่ให้ thread เบื้องหลัง import ปนกับของหน้า
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR, STARTUP_PREWARM='0')
+    code = RUNNER.format(root=ROOT_DIR, path=os.path.join(ROOT_DIR, script))
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT_DIR, env=env,
+                         capture_output=True, text=True)
+    modules = parse_importtime(out.stderr)
+    # streamlit ถูก import ก่อนทุกหน้าอยู่แล้วใน server จริง แยกออกจากเวลาของหน้า
+    top_level = {name: cumulative for name, (_, cumulative, depth) in modules.items() if depth == 0}
+    packages = {}
+    for name, (self_us, _, _) in modules.items():
+        root = name.split('.')[0]
+        packages[root] = packages.get(root, 0) + self_us
+    return {
+        'script': script,
+        'total_ms': sum(top_level.values()) / 1000,
+        'streamlit_ms': top_level.get('streamlit', 0) / 1000,
+        'modules': len(modules),
+        'heavy': sorted(name for name in HEAVY_MODULES if name in modules),
+        'top_packages_ms': {name: us / 1000 for name, us in sorted(packages.items(), key=lambda kv: -kv[1])[:8]},
+        'error': next((line for line in out.stdout.splitlines() if line.startswith('script error:')), None),
+    }
+
+
+# รันหลายรอบแล้วใช้รอบที่มีค่ากลาง (เวลา import แกว่งตาม disk cache/เครื่อง)
+def profile_median(script, repeats):
+    runs = sorted((profile_script(script) for _ in range(repeats)), key=lambda r: r['total_ms'] - r['streamlit_ms'])
+    return runs[len(runs) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile ของ app และแต่ละหน้า")
+    parser.add_argument('scripts', nargs='*', default=SCRIPTS)
+    parser.add_argument('--output', help="เขียนผลเป็น JSON")
+    parser.add_argument('--compare', help="JSON จากรอบก่อนหน้า")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--budget-ms', type=float, help="เวลา import สูงสุดต่อ script (ไม่รวม streamlit)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {r['script']: r for r in json.load(f)['results']}
+
+    results = [profile_median(script, args.repeats) for script in args.scripts]
+    print(f"{'script':<32}{'import ms':>11}{'(ex. st)':>10}{'modules':>9}  heavy")
+    over_budget = []
+    for r in results:
+        own = r['total_ms'] - r['streamlit_ms']
+        line = f"{r['script']:<32}{r['total_ms']:>11.0f}{own:>10.0f}{r['modules']:>9}  {', '.join(r['heavy']) or '-'}"
+        if r['script'] in baseline:
+            before = baseline[r['script']]['total_ms'] - baseline[r['script']]['streamlit_ms']
+            line += f"  ({own - before:+.0f} ms)"
+        print(line)
+        if r['error']:
+            print(f"    {r['error']}")
+        if args.budget_ms is not None and own > args.budget_ms:
+            over_budget.append(r['script'])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results}, f, indent=2, ensure_ascii=False)
+    if over_budget:
+        raise SystemExit(f"เกินงบ {args.budget_ms:.0f} ms: {', '.join(over_budget)}")
+
+
+if __name__ == '__main__':
+    main()
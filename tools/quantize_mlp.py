@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from core import diabetes
+from core.dataset import DIABETES_CSV, DIABETES_SCHEMA, load_frame
+from core.mlp_numpy import NumpyMLP
+from core.mlp_quant import PRECISIONS, QuantizedMLP
+from core.scoring import MLP_NUMPY_FILE, MLP_QUANT_FILES, model_path
+
+# สร้าง models/mlp_model_int8.npz และ mlp_model_float16.npz จาก mlp_model.npz
+# calibrate int8 บนตัวอย่างสุ่มของ diabetes_dataset.csv แล้วรายงานความแม่นยำ/ความเร็วเทียบกับ float32
+#   python -m tools.quantize_mlp
+#   python -m tools.quantize_mlp --calibration-rows 5000 --output report.json
+
+
+def accuracy_report(probs, baseline, y):
+    from sklearn.metrics import roc_auc_score
+
+    diff = np.abs(probs - baseline)
+    labels = probs >= diabetes.THRESHOLD
+    return {
+        'max_abs_diff': float(diff.max()),
+        'mean_abs_diff': float(diff.mean()),
+        'label_agreement': float(np.mean(labels == (baseline >= diabetes.THRESHOLD))),
+        'accuracy': float(np.mean(labels == y)),
+        'auc': float(roc_auc_score(y, probs)),
+    }
+
+
+def latency_report(model, X, batch_sizes, repeats):
+    rows = []
+    for size in batch_sizes:
+        batch = X[:size]
+        model.predict(batch)
+        timings = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            model.predict(batch)
+            timings.append(time.perf_counter() - t0)
+        p50 = float(np.median(timings))
+        rows.append({'batch_size': len(batch), 'p50_ms': p50 * 1000, 'rows_per_s': len(batch) / p50})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize MLP เป็น int8/float16 พร้อมรายงานเทียบกับ float32")
+    parser.add_argument('--source', default=model_path(MLP_NUMPY_FILE))
+    parser.add_argument('--data', default=DIABETES_CSV)
+    parser.add_argument('--precisions', default=','.join(PRECISIONS))
+    parser.add_argument('--calibration-rows', type=int, default=10000)
+    parser.add_argument('--batch-sizes', default='1,100,10000,100000')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="เขียนรายงานเป็น JSON")
+    args = parser.parse_args()
+
+    df = load_frame(args.data, DIABETES_SCHEMA)
+    X = diabetes.encode_frame(df).astype(np.float32)
+    y = df['diabetes'].to_numpy()
+    rng = np.random.default_rng(args.seed)
+    X_calib = X[rng.choice(len(X), min(args.calibration_rows, len(X)), replace=False)]
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',')]
+
+    baseline_model = NumpyMLP.load(args.source)
+    baseline = baseline_model.predict(X)[:, 0]
+    report = {
+        'rows': len(X),
+        'calibration_rows': len(X_calib),
+        'float32': {
+            'model_bytes': sum(a.nbytes for a in baseline_model.kernels + baseline_model.biases),
+            **accuracy_report(baseline, baseline, y),
+            'latency': latency_report(baseline_model, X, batch_sizes, args.repeats),
+        },
+    }
+
+    for precision in args.precisions.split(','):
+        model = QuantizedMLP.from_numpy(baseline_model, precision, X_calib)
+        output = model_path(MLP_QUANT_FILES[precision])
+        model.save(output, args.source)
+        model = QuantizedMLP.load(output)
+        print(f"saved {output} ({os.path.getsize(output):,} bytes)")
+        report[precision] = {
+            'model_bytes': model.nbytes(),
+            **accuracy_report(model.predict(X)[:, 0], baseline, y),
+            'latency': latency_report(model, X, batch_sizes, args.repeats),
+        }
+
+    precisions = [name for name in report if isinstance(report[name], dict)]
+    print(f"\nrows: {report['rows']:,}  calibration rows: {report['calibration_rows']:,}")
+    print(f"{'precision':<10}{'bytes':>8}{'max |diff|':>12}{'mean |diff|':>13}{'agreement':>11}{'accuracy':>10}{'AUC':>8}")
+    for name in precisions:
+        r = report[name]
+        print(f"{name:<10}{r['model_bytes']:>8,}{r['max_abs_diff']:>12.2e}{r['mean_abs_diff']:>13.2e}"
+              f"{r['label_agreement']:>11.5f}{r['accuracy']:>10.5f}{r['auc']:>8.5f}")
+
+    print(f"\n{'batch':>8}" + ''.join(f"{name + ' ms':>14}{'rows/s':>12}" for name in precisions))
+    for i, size in enumerate(batch_sizes):
+        line = f"{report['float32']['latency'][i]['batch_size']:>8,}"
+        for name in precisions:
+            row = report[name]['latency'][i]
+            line += f"{row['p50_ms']:>14.3f}{row['rows_per_s']:>12,.0f}"
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
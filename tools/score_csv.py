@@ -0,0 +1,53 @@
+import argparse
+import json
+import os
+
+from core.loan import CHUNK_SIZE
+from core.parallel import get_parallel_scorer
+from core.registry import get_registry
+from core.streaming import PREFETCH, stream_score
+
+# ทำนายไฟล์ CSV ขนาดใหญ่แบบ streaming (หน่วยความจำคงที่) ด้วยโมเดลใน registry
+#   python -m tools.score_csv xgb data/Loan_default.csv loan_predictions.csv
+#   python -m tools.score_csv mlp data/diabetes_dataset.csv diabetes_predictions.csv --chunk-size 50000
+#   python -m tools.score_csv xgb big.csv out.csv --chunk-size 200000 --workers 32
+# ถ้ามีไฟล์ <output>.checkpoint อยู่ (งานก่อนหน้าหยุดกลางทาง) จะทำต่อจากจุดนั้น ใช้ --restart เพื่อเริ่มใหม่
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming batch scoring ของไฟล์ CSV")
+    parser.add_argument('model', help="ชื่อโมเดลใน registry เช่น xgb, rf, mlp, mlp_int8")
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--prefetch', type=int, default=PREFETCH, help="จำนวน chunk ที่อ่านล่วงหน้า")
+    parser.add_argument('--workers', type=int, default=1, help="จำนวน process ที่ใช้ทำนาย (1 = process เดียว)")
+    parser.add_argument('--checkpoint', help="ค่าเริ่มต้น: <output>.checkpoint")
+    parser.add_argument('--restart', action='store_true', help="ไม่ใช้ checkpoint เดิม")
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or args.output + '.checkpoint'
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    if args.workers > 1:
+        scorer = get_parallel_scorer(args.model, args.workers)
+        scorer.warm_up()
+    else:
+        scorer = get_registry().get(args.model)
+
+    def progress(state):
+        rate = (state['rows'] - state['resumed_from_row']) / max(state['elapsed_s'], 1e-9)
+        print(f"\r{state['rows']:,} แถว ({state['chunks']} chunks, {rate:,.0f} แถว/วินาที)", end='', flush=True)
+
+    summary = stream_score(scorer, args.input, args.output, args.chunk_size, checkpoint, args.prefetch, progress)
+    print()
+    if args.workers > 1:
+        scorer.close()
+    if summary['resumed_from_row']:
+        print(f"ทำต่อจากแถวที่ {summary['resumed_from_row']:,}")
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import json
+
+from core.tuning import ETA, N_CANDIDATES, run_search
+
+# ค้นหา hyperparameter ด้วย successive halving บนข้อมูลจริง (ดู core/tuning.py)
+#   python -m tools.tune xgb --loan-data data/Loan_default.csv --workers 8
+#   python -m tools.tune mlp --latency-sla-ms 0.5 --output mlp_search.json
+# ถูกขัดจังหวะ (Ctrl+C) แล้วรันคำสั่งเดิมอีกครั้งจะทำต่อจากผลที่บันทึกไว้
+
+
+def print_trial(trial):
+    print(f"  #{trial['candidate']:<3} rows {trial['rows']:>7}  auc {trial['roc_auc']:.4f}  fit {trial['fit_s']:6.1f}s  "
+          f"p95 {trial['latency_p95_ms']:.3f} ms  batch {trial['batch_ms']:.1f} ms  {json.dumps(trial['params'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search")
+    parser.add_argument('family', choices=['rf', 'xgb', 'mlp'])
+    parser.add_argument('--loan-data', help="path ของ Loan_default.csv (rf/xgb)")
+    parser.add_argument('--diabetes-data', help="path ของ diabetes_dataset.csv (mlp)")
+    parser.add_argument('--candidates', type=int, default=N_CANDIDATES)
+    parser.add_argument('--eta', type=int, default=ETA, help="เก็บ 1/eta ของ candidate ในแต่ละรอบ")
+    parser.add_argument('--workers', type=int, help="จำนวน process (ค่าเริ่มต้นคือจำนวน core)")
+    parser.add_argument('--store', help="ไฟล์ JSONL เก็บผลของทุก trial (ค่าเริ่มต้นอยู่ใน .cache/tuning/)")
+    parser.add_argument('--latency-sla-ms', type=float, help="latency p95 ทีละแถวสูงสุดที่ยอมรับได้")
+    parser.add_argument('--latency-weight', type=float, default=0.0, help="หัก AUC ต่อ 1 ms ของ latency p95")
+    parser.add_argument('--output', help="เขียนผลทุกรอบเป็น JSON")
+    args = parser.parse_args()
+
+    csv_path = args.diabetes_data if args.family == 'mlp' else args.loan_data
+    result = run_search(args.family, csv_path, args.candidates, args.eta, args.workers, args.store,
+                        args.latency_sla_ms, args.latency_weight, progress=print_trial)
+
+    for rung in result['rungs']:
+        print(f"\nrows {rung['rows']}:")
+        for trial in rung['trials']:
+            print(f"  score {trial['score']:.4f}", end='')
+            print_trial(trial)
+
+    best = result['best']
+    print(f"\nbest #{best['candidate']}: {json.dumps(best['params'])}")
+    print(f"  roc_auc {best['roc_auc']:.4f}  accuracy {best['accuracy']:.4f}  latency p95 {best['latency_p95_ms']:.3f} ms"
+          + ("" if result['meets_sla'] else "  (ไม่มี candidate ที่ผ่าน SLA)"))
+    print(f"store: {result['store']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import os
+
+from core.dataset import DIABETES_CSV
+from core.mlp_numpy import export_mlp
+from core.scoring import MLP_MODEL_FILE, MLP_NUMPY_FILE, SCALER_FILE, model_path
+from core.training import (MLP_PARAMS, STREAM_PARAMS, promote_version, train_diabetes_model, train_diabetes_streaming,
+                           train_loan_models, write_version)
+
+# เทรนโมเดลทั้งหมดใหม่จากข้อมูลจริงแล้วเขียนเป็นเวอร์ชันใน models/versions/
+#   python train.py --loan-data data/Loan_default.csv --promote
+#   python train.py --models mlp --epochs 5
+#   python train.py --models mlp --stream --epochs 50 --patience 3   (อ่าน CSV ทีละ chunk + early stopping)
+# ชุดข้อมูล Loan Default ไม่ได้อยู่ใน repo ต้องดาวน์โหลดจาก Kaggle แล้วระบุ path เอง
+
+
+def print_epoch(record):
+    print(f"[mlp] epoch {record['epoch']:>3}  loss: {record['loss']:.4f}  val_loss: {record['val_loss']:.4f}  "
+          f"val_auc: {record['val_roc_auc']:.4f}  train: {record['train_s']:.1f}s  epoch: {record['epoch_s']:.1f}s"
+          + ("  *" if record['best'] else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training pipeline สำหรับโมเดลใน models/")
+    parser.add_argument('--models', default='rf,xgb,mlp', help="โมเดลที่ต้องการเทรน คั่นด้วย ,")
+    parser.add_argument('--loan-data', help="path ของ Loan_default.csv")
+    parser.add_argument('--diabetes-data', default=DIABETES_CSV)
+    parser.add_argument('--n-jobs', type=int, default=-1, help="จำนวน core สำหรับ RF/XGBoost (-1 = ทั้งหมด)")
+    parser.add_argument('--epochs', type=int, default=MLP_PARAMS['epochs'])
+    parser.add_argument('--batch-size', type=int, default=MLP_PARAMS['batch_size'])
+    parser.add_argument('--stream', action='store_true',
+                        help="เทรน MLP แบบอ่านไฟล์ทีละ chunk และหยุดเมื่อ validation loss ไม่ดีขึ้น (--epochs คือจำนวนสูงสุด)")
+    parser.add_argument('--chunk-size', type=int, default=STREAM_PARAMS['chunk_size'])
+    parser.add_argument('--patience', type=int, default=STREAM_PARAMS['patience'])
+    parser.add_argument('--version', help="ชื่อเวอร์ชัน (ค่าเริ่มต้นคือเวลาปัจจุบัน)")
+    parser.add_argument('--promote', action='store_true', help="คัดลอกผลลัพธ์ไปแทนที่ไฟล์ใน models/")
+    args = parser.parse_args()
+
+    selected = [name.strip() for name in args.models.split(',') if name.strip()]
+    results, datasets = {}, {}
+
+    loan_models = [name for name in selected if name in ('rf', 'xgb')]
+    if loan_models:
+        if not args.loan_data:
+            parser.error("ต้องระบุ --loan-data เพื่อเทรน rf/xgb")
+        loan_results, datasets['loan'] = train_loan_models(args.loan_data, args.n_jobs, loan_models)
+        results.update(loan_results)
+
+    if 'mlp' in selected:
+        params = {'epochs': args.epochs, 'batch_size': args.batch_size}
+        if args.stream:
+            params.update(chunk_size=args.chunk_size, patience=args.patience)
+            mlp_results, datasets['diabetes'] = train_diabetes_streaming(args.diabetes_data, params, print_epoch)
+        else:
+            mlp_results, datasets['diabetes'] = train_diabetes_model(args.diabetes_data, params)
+        results.update(mlp_results)
+
+    if not results:
+        parser.error("ไม่มีโมเดลให้เทรน")
+
+    for name, result in results.items():
+        if result.get('metrics'):
+            metrics = '  '.join(f"{k}: {v:.4f}" for k, v in result['metrics'].items())
+            print(f"[{name}] {metrics}  train: {result['train_time_s']:.1f}s")
+
+    directory = write_version(results, datasets, args.version)
+    print(f"saved {directory}")
+
+    if args.promote:
+        promote_version(directory)
+        if 'mlp' in results:
+            export_mlp(model_path(MLP_MODEL_FILE), model_path(SCALER_FILE), model_path(MLP_NUMPY_FILE))
+        print(f"promoted to {os.path.dirname(model_path(MLP_MODEL_FILE))}")
+
+
+if __name__ == '__main__':
+    main()